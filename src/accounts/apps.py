@@ -4,3 +4,13 @@ from django.apps import AppConfig
 class AccountsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'accounts'
+
+    def ready(self):
+        # Connect the signal handlers that build the avatar derivatives.
+        from . import signals  # noqa: F401
+        from core.images import register_image_field
+        from .models import CustomUser
+        register_image_field(
+            CustomUser, 'avatar', 'avatar_variants',
+            sizes=(('thumb', 64), ('card', 160), ('full', 512)),
+        )
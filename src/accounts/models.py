@@ -34,6 +34,11 @@ class CustomUser(AbstractUser):
         null=True,
         blank=True
     )
+    # Resized derivatives of `avatar`, maintained by core.images.
+    avatar_variants = models.JSONField(_("Avatar Variants"), default=dict, blank=True, editable=False)
+    # Bumped by every profile save (not by logins), for conditional GETs of
+    # payloads rendering the user, e.g. review authors.
+    updated_at = models.DateTimeField(_("Updated At"), auto_now=True)
     # We make first_name and last_name not required by default
     first_name = models.CharField(_("first name"), max_length=150, blank=True)
     last_name = models.CharField(_("last name"), max_length=150, blank=True)
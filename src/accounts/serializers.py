@@ -2,6 +2,8 @@
 
 from rest_framework import serializers
 from django.contrib.auth import get_user_model
+from core.images import variant_urls
+from core.serializers import DynamicFieldsMixin
 
 # Get the custom user model
 User = get_user_model()
@@ -10,10 +12,13 @@ User = get_user_model()
 #  USER SERIALIZER (FOR DISPLAYING USER DATA)
 # =================================================================
 
-class UserSerializer(serializers.ModelSerializer):
+class UserSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """
     Serializer for displaying user information safely.
+    `avatar_variants` holds the resized avatars, or None until they're built.
     """
+    avatar_variants = serializers.SerializerMethodField()
+
     class Meta:
         model = User
         fields = (
@@ -21,9 +26,14 @@ class UserSerializer(serializers.ModelSerializer):
             'username',
             'email',
             'avatar',
+            'avatar_variants',
             'date_joined'
         )
         read_only_fields = ('public_id', 'date_joined')
+        method_field_columns = {'avatar_variants': ('avatar_variants',)}
+
+    def get_avatar_variants(self, obj):
+        return variant_urls(obj.avatar_variants, self.context.get('request'))
 
 
 # =================================================================
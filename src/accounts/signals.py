@@ -0,0 +1,17 @@
+# src/accounts/signals.py
+
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from core.images import schedule_variants
+from .models import CustomUser
+
+# =================================================================
+#  AVATAR DERIVATIVES
+# =================================================================
+
+@receiver(post_save, sender=CustomUser, dispatch_uid='user_avatar_variants')
+def user_avatar_saved(sender, instance, update_fields=None, **kwargs):
+    if update_fields is not None and 'avatar' not in update_fields:
+        return
+    schedule_variants(instance, 'avatar')
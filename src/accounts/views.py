@@ -4,6 +4,7 @@ from django.contrib.auth import get_user_model
 from rest_framework import generics
 from rest_framework.permissions import AllowAny, IsAuthenticated # <--- Import IsAuthenticated
 from .serializers import UserRegistrationSerializer, UserSerializer # <--- Import UserSerializer
+from core.views import SparseFieldsetsMixin
 
 User = get_user_model()
 
@@ -21,7 +22,7 @@ class UserRegistrationView(generics.CreateAPIView):
     serializer_class = UserRegistrationSerializer
 
 
-class UserProfileView(generics.RetrieveUpdateAPIView):
+class UserProfileView(SparseFieldsetsMixin, generics.RetrieveUpdateAPIView):
     """
     API endpoint for retrieving and updating the authenticated user's profile.
     Requires authentication.
@@ -2,13 +2,21 @@
 
 from django.urls import path
 from accounts.views import UserRegistrationView, UserProfileView
-from categories.views import CategoryListView
+from categories.views import CategoryListView, CategorySchemaView
 from listings.views import (
     ListingListCreateView,
+    ListingBatchView,
     ListingDetailView,
     MyListingsView,
 )
+from places.views import PlaceMapView
 from reviews.views import ReviewListCreateView # <--- Import the review view
+from search.views import (
+    ListingSearchView,
+    SavedSearchDetailView,
+    SavedSearchListCreateView,
+    SuggestView,
+)
 from rest_framework_simplejwt.views import (
     TokenObtainPairView,
     TokenRefreshView,
@@ -43,6 +51,16 @@ urlpatterns = [
         MyListingsView.as_view(),
         name='my-listings' # Endpoint for the current user's listings
     ),
+    path(
+        'users/me/saved-searches/',
+        SavedSearchListCreateView.as_view(), # Saved searches notified on new matching listings
+        name='saved-search-list'
+    ),
+    path(
+        'users/me/saved-searches/<int:pk>/',
+        SavedSearchDetailView.as_view(),
+        name='saved-search-detail'
+    ),
 
 
     # --- Content & Taxonomy ---
@@ -51,6 +69,11 @@ urlpatterns = [
         CategoryListView.as_view(),
         name='category-list'
     ),
+    path(
+        'categories/<slug:slug>/schema/',
+        CategorySchemaView.as_view(), # Effective fields of a category, inherited ones included
+        name='category-schema'
+    ),
 
     # --- Listings ---
     path(
@@ -58,11 +81,33 @@ urlpatterns = [
         ListingListCreateView.as_view(), # Handles GET (list) and POST (create)
         name='listing-list-create'
     ),
+    path(
+        'listings/batch/', # Must come before the detail route, which would match 'batch'
+        ListingBatchView.as_view(), # Handles POST (batch create/update)
+        name='listing-batch'
+    ),
     path(
         'listings/<slug:slug>/', # Captures the slug from the URL
         ListingDetailView.as_view(), # Handles GET (retrieve), PUT/PATCH (update), DELETE
         name='listing-detail'
     ),
+    # --- Search ---
+    path(
+        'search/',
+        ListingSearchView.as_view(), # Ranked full-text search with the listing filters
+        name='search'
+    ),
+    path(
+        'search/suggest/',
+        SuggestView.as_view(), # Typo-tolerant autocomplete over listings, categories and places
+        name='search-suggest'
+    ),
+    # --- Places ---
+    path(
+        'places/map/',
+        PlaceMapView.as_view(), # Clustered place markers by bbox and zoom
+        name='place-map'
+    ),
     # --- ADDING NEW ENDPOINT HERE ---
     path(
         'listings/<slug:listing_slug>/reviews/', # Nested under a specific listing
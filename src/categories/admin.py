@@ -25,9 +25,9 @@ class FieldAdmin(ImportExportMixin, admin.ModelAdmin): # <-- Added ImportExportM
     """
     Admin interface for the global Field definitions.
     """
-    list_display = ('name', 'field_type')
+    list_display = ('name', 'key', 'field_type')
     list_filter = ('field_type',)
-    search_fields = ('name',)
+    search_fields = ('name', 'key')
 
 @admin.register(Category)
 class CategoryAdmin(ImportExportMixin, DraggableMPTTAdmin, TabbedTranslationAdmin):
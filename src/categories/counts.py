@@ -0,0 +1,164 @@
+# src/categories/counts.py
+
+from collections import defaultdict
+
+from django.db import connection, transaction
+from django.db.models import Count, F
+from django.db.models.functions import Greatest
+
+from core.cache import bump_namespace_on_commit
+from .models import Category
+
+# =================================================================
+#  PER-CATEGORY LISTING COUNTS
+# =================================================================
+# Every category stores the number of listings shown in it: active, unsold
+# listings filed directly under it (`listing_count`) and in its whole
+# subtree (`subtree_listing_count`). They're adjusted incrementally, with
+# F() updates in the writing transaction, by the listing write paths
+# (listings/signals.py, listings/batch.py) and recomputed from the direct
+# counts when the tree changes shape. `manage.py reconcile_category_counts`
+# recomputes everything from the listings and fixes any drift (e.g. after
+# queryset.update() calls, which send no signals).
+#
+# Recomputing writes absolute values, so it must not interleave with the
+# increments: the writers hold a shared transaction-level advisory lock
+# from their increment to their commit, and the recomputations take it
+# exclusively before reading anything. A listing written meanwhile is then
+# either committed before the recount (and counted by it) or incremented
+# after it.
+
+# Cache namespace of the responses showing the counts, kept apart from
+# 'categories' so listing writes don't invalidate the category caches.
+COUNTS_NAMESPACE = 'category-counts'
+
+# Key of the advisory lock guarding the counts.
+COUNTS_LOCK = 0x6369_6e74
+
+
+def _lock_counts(shared):
+    function = 'pg_advisory_xact_lock_shared' if shared else 'pg_advisory_xact_lock'
+    with connection.cursor() as cursor:
+        cursor.execute(f'SELECT {function}(%s)', [COUNTS_LOCK])
+
+
+def counted_category(listing):
+    """
+    The category a listing is counted in, or None when it isn't counted.
+    """
+    if listing.is_active and not listing.is_sold:
+        return listing.category_id
+    return None
+
+
+def apply_count_deltas(deltas):
+    """
+    Applies `{category_id: delta}` to the direct count of each category
+    and to the subtree count of the category and all of its ancestors.
+    Counts never go below 0 (the columns are unsigned): a drifted count is
+    clamped, and fixed by the next reconciliation.
+    Must run in the transaction writing the listings.
+    """
+    deltas = {category_id: delta for category_id, delta in deltas.items() if category_id and delta}
+    if not deltas:
+        return
+    _lock_counts(shared=True)
+    nodes = Category.objects.filter(pk__in=deltas).values_list('pk', 'tree_id', 'lft', 'rght')
+    for category_id, tree_id, lft, rght in nodes:
+        delta = deltas[category_id]
+        Category.objects.filter(pk=category_id).update(listing_count=Greatest(F('listing_count') + delta, 0))
+        Category.objects.filter(tree_id=tree_id, lft__lte=lft, rght__gte=rght).update(
+            subtree_listing_count=Greatest(F('subtree_listing_count') + delta, 0),
+        )
+    bump_namespace_on_commit(COUNTS_NAMESPACE)
+
+
+def listing_moved(old_category_id, new_category_id):
+    """
+    Adjusts the counts for one listing going from being counted in
+    `old_category_id` to `new_category_id` (either may be None).
+    """
+    if old_category_id == new_category_id:
+        return
+    deltas = defaultdict(int)
+    deltas[old_category_id] -= 1
+    deltas[new_category_id] += 1
+    apply_count_deltas(deltas)
+
+
+def _subtree_counts(rows):
+    """
+    Sums the direct counts of `rows` (`(pk, parent_id, listing_count)`)
+    up the tree and returns `{pk: subtree count}`.
+    """
+    parents = {pk: parent_id for pk, parent_id, _ in rows}
+    totals = {pk: count for pk, _, count in rows}
+    for pk, _, count in rows:
+        parent_id = parents[pk]
+        while parent_id is not None and count:
+            totals[parent_id] += count
+            parent_id = parents.get(parent_id)
+    return totals
+
+
+def recompute_subtree_counts():
+    """
+    Recomputes every subtree count from the direct counts, e.g. after a
+    category moved to another parent. Returns the number of rows fixed.
+    """
+    with transaction.atomic():
+        _lock_counts(shared=False)
+        return _recompute_subtree_counts()
+
+
+def _recompute_subtree_counts():
+    rows = list(Category.objects.values_list('pk', 'parent_id', 'listing_count'))
+    totals = _subtree_counts(rows)
+    current = dict(Category.objects.values_list('pk', 'subtree_listing_count'))
+    changed = [
+        Category(pk=pk, subtree_listing_count=total)
+        for pk, total in totals.items() if current.get(pk) != total
+    ]
+    Category.objects.bulk_update(changed, ['subtree_listing_count'])
+    if changed:
+        bump_namespace_on_commit(COUNTS_NAMESPACE)
+    return len(changed)
+
+
+def reconcile_counts():
+    """
+    Recomputes both counts of every category from the listings, with one
+    grouped query, and writes the ones that drifted.
+    Returns the number of categories fixed.
+    """
+    with transaction.atomic():
+        _lock_counts(shared=False)
+        return _reconcile_counts()
+
+
+def _reconcile_counts():
+    from listings.models import Listing
+
+    direct = dict(
+        Listing.objects.filter(is_active=True, is_sold=False)
+        .order_by().values('category').annotate(count=Count('pk'))
+        .values_list('category', 'count')
+    )
+    rows = [
+        (pk, parent_id, direct.get(pk, 0))
+        for pk, parent_id in Category.objects.values_list('pk', 'parent_id')
+    ]
+    totals = _subtree_counts(rows)
+    current = {
+        pk: (listing_count, subtree_listing_count)
+        for pk, listing_count, subtree_listing_count
+        in Category.objects.values_list('pk', 'listing_count', 'subtree_listing_count')
+    }
+    changed = [
+        Category(pk=pk, listing_count=count, subtree_listing_count=totals[pk])
+        for pk, _, count in rows if current.get(pk) != (count, totals[pk])
+    ]
+    Category.objects.bulk_update(changed, ['listing_count', 'subtree_listing_count'])
+    if changed:
+        bump_namespace_on_commit(COUNTS_NAMESPACE)
+    return len(changed)
@@ -0,0 +1,223 @@
+# src/categories/importer.py
+
+from collections import Counter
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import translation
+from django.utils.text import slugify
+
+from core.cache import bump_namespace_on_commit
+from .counts import recompute_subtree_counts
+from .models import Category
+
+# =================================================================
+#  BULK CATEGORY IMPORT
+# =================================================================
+# Imports a category tree of any depth from JSON:
+#
+#   [{"name": "Vehicles", "slug": "vehicles",
+#     "name_es": "Vehículos", "slug_es": "vehiculos", "is_active": true,
+#     "children": [{"name": "Cars", ...}, ...]}, ...]
+#
+# Only "name" is required; "slug" defaults to slugify(name) and "slug_es"
+# to slugify(name_es). The file is diffed against the stored categories by
+# (default-language) slug into an ImportPlan, which is either reported
+# (dry run) or applied with one bulk_create per tree level and one
+# bulk_update, with MPTT updates disabled and a single rebuild() at the end.
+# Keys absent from a node leave the stored value alone; categories missing
+# from the file are reported, never deleted (that would cascade to their
+# listings).
+
+DEFAULT_BATCH_SIZE = 1000
+
+# Columns compared and written, besides the parent.
+IMPORT_FIELDS = ('name_en', 'name_es', 'slug_en', 'slug_es', 'is_active')
+
+# Columns of the nodes that are unique across the table.
+UNIQUE_FIELDS = ('name_en', 'name_es', 'slug_es')
+
+
+def flatten_tree(entries):
+    """
+    Yields `(node, parent_slug, depth)` for every node of the tree,
+    parents before children, in file order. `node` maps the columns given
+    in the file (see IMPORT_FIELDS) to their values. Raises ValueError on
+    malformed input.
+    """
+    if not isinstance(entries, list):
+        raise ValueError('The file must contain a JSON array of categories.')
+    stack = [(entry, None, 0, f'[{index}]') for index, entry in reversed(list(enumerate(entries)))]
+    while stack:
+        entry, parent_slug, depth, position = stack.pop()
+        if not isinstance(entry, dict) or not str(entry.get('name') or '').strip():
+            raise ValueError(f'{position}: every category needs a "name".')
+        node = {'name_en': str(entry['name']).strip()}
+        node['slug_en'] = entry.get('slug') or slugify(node['name_en'])
+        if entry.get('name_es'):
+            node['name_es'] = str(entry['name_es']).strip()
+        if entry.get('slug_es') or entry.get('name_es'):
+            node['slug_es'] = entry.get('slug_es') or slugify(node['name_es'])
+        if 'is_active' in entry:
+            node['is_active'] = bool(entry['is_active'])
+
+        children = entry.get('children') or []
+        if not isinstance(children, list):
+            raise ValueError(f'{position}: "children" must be an array.')
+        yield node, parent_slug, depth
+        for index in range(len(children) - 1, -1, -1):
+            stack.append((children[index], node['slug_en'], depth + 1, f'{position}.children[{index}]'))
+
+
+class ImportPlan:
+    """
+    The differences between an imported tree and the stored categories:
+    - `creates`: `(node, parent_slug, depth)` of the new categories;
+    - `updates`: `(category, parent_slug, changed column names)`, with the
+      new values already set on `category` (except the parent);
+    - `unchanged`: the number of categories already up to date;
+    - `missing`: slugs of stored categories absent from the file;
+    - `errors`: problems that prevent applying the plan.
+    """
+
+    def __init__(self):
+        self.creates = []
+        self.updates = []
+        self.unchanged = 0
+        self.missing = []
+        self.errors = []
+
+    @property
+    def has_changes(self):
+        return bool(self.creates or self.updates)
+
+    def summary(self):
+        """
+        Returns `{change: count}`, with updates broken down by column.
+        """
+        changes = Counter(field for _, _, fields in self.updates for field in fields)
+        return {
+            'created': len(self.creates),
+            'updated': len(self.updates),
+            **{f'updated {field}': count for field, count in sorted(changes.items())},
+            'unchanged': self.unchanged,
+            'not in file': len(self.missing),
+        }
+
+
+def plan_import(entries):
+    """
+    Diffs the tree `entries` (see flatten_tree) against the stored
+    categories, loaded with a single query. Returns an ImportPlan.
+    """
+    plan = ImportPlan()
+    nodes = list(flatten_tree(entries))
+
+    # Duplicates within the file.
+    for field in ('slug_en', *UNIQUE_FIELDS):
+        counts = Counter(node[field] for node, _, _ in nodes if node.get(field))
+        plan.errors.extend(
+            f'Duplicate {field} in the file: "{value}".' for value, count in counts.items() if count > 1
+        )
+
+    existing = {category.slug_en: category for category in Category.objects.all()}
+    parent_slugs = {category.pk: category.slug_en for category in existing.values()}
+    imported = {node['slug_en'] for node, _, _ in nodes}
+
+    # Unique values held by stored categories the file doesn't rename.
+    taken = {
+        field: {
+            getattr(category, field): slug for slug, category in existing.items()
+            if getattr(category, field)
+        }
+        for field in UNIQUE_FIELDS
+    }
+
+    for node, parent_slug, depth in nodes:
+        slug = node['slug_en']
+        for field in UNIQUE_FIELDS:
+            owner = taken[field].get(node.get(field))
+            if owner is not None and owner != slug and owner not in imported:
+                plan.errors.append(
+                    f'{field} "{node[field]}" of "{slug}" is already used by category "{owner}".'
+                )
+
+        category = existing.get(slug)
+        if category is None:
+            plan.creates.append((node, parent_slug, depth))
+            continue
+        changed = [field for field, value in node.items() if getattr(category, field) != value]
+        for field in changed:
+            setattr(category, field, node[field])
+        if parent_slugs.get(category.parent_id) != parent_slug:
+            changed.append('parent')
+        if changed:
+            plan.updates.append((category, parent_slug, changed))
+        else:
+            plan.unchanged += 1
+
+    plan.missing = sorted(set(existing) - imported)
+    return plan
+
+
+def apply_import(plan, batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Writes an ImportPlan in one transaction: one bulk_create per tree level
+    (so new parents have their pks before their children are inserted), one
+    bulk_update, then a single MPTT rebuild. Bulk writes send no signals, so
+    the caches, card category paths and subtree counts they would have
+    maintained are refreshed here. Raises ValueError if the plan has errors.
+    """
+    if plan.errors:
+        raise ValueError(plan.errors[0])
+    if not plan.has_changes:
+        return
+
+    # Under the default language, `name`/`slug` resolve to the *_en columns,
+    # so the untranslated columns are written with the same values.
+    with transaction.atomic(), translation.override(settings.LANGUAGE_CODE):
+        pks = dict(Category.objects.values_list('slug_en', 'pk'))
+        with Category.objects.disable_mptt_updates():
+            levels = {}
+            for node, parent_slug, depth in plan.creates:
+                levels.setdefault(depth, []).append((node, parent_slug))
+            for depth in sorted(levels):
+                created = Category.objects.bulk_create(
+                    [
+                        Category(parent_id=pks.get(parent_slug), lft=0, rght=0, tree_id=0, level=0, **node)
+                        for node, parent_slug in levels[depth]
+                    ],
+                    batch_size=batch_size,
+                )
+                pks.update((category.slug_en, category.pk) for category in created)
+
+            fields = {'name', 'slug'}
+            for category, parent_slug, changed in plan.updates:
+                category.parent_id = pks.get(parent_slug)
+                fields.update(changed)
+            Category.objects.bulk_update(
+                [category for category, _, _ in plan.updates], sorted(fields), batch_size=batch_size,
+            )
+        Category.objects.rebuild(batch_size=batch_size)
+
+        bump_namespace_on_commit('categories')
+        moved = [category.pk for category, _, changed in plan.updates if 'parent' in changed]
+        renamed = [
+            category.pk for category, _, changed in plan.updates
+            if 'parent' in changed or 'name_en' in changed or 'name_es' in changed
+        ]
+        if moved:
+            recompute_subtree_counts()
+        if renamed:
+            _refresh_card_paths_on_commit(renamed)
+
+
+def _refresh_card_paths_on_commit(category_ids):
+    from listings.cards import refresh_category_paths_of
+
+    subtrees = Category.objects.get_queryset_descendants(
+        Category.objects.filter(pk__in=category_ids), include_self=True,
+    ).values_list('pk', flat=True)
+    category_ids = list(subtrees)
+    transaction.on_commit(lambda: refresh_category_paths_of(category_ids))
+    bump_namespace_on_commit('listings')
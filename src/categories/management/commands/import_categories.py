@@ -1,56 +1,68 @@
 # src/categories/management/commands/import_categories.py
 
 import json
-from django.core.management.base import BaseCommand
-from django.utils.text import slugify
-from categories.models import Category
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from categories.importer import DEFAULT_BATCH_SIZE, apply_import, plan_import
 
 class Command(BaseCommand):
-    help = 'Imports categories from a JSON file into the database'
+    help = (
+        'Imports a category tree of any depth, with translations, from a JSON file '
+        '(see categories/importer.py). Categories are matched by slug; none are deleted.'
+    )
 
-    def handle(self, *args, **options):
-        # Path to the JSON file, relative to the project root
-        file_path = 'data/categories.json'
-        
-        self.stdout.write(self.style.SUCCESS(f'Starting category import from {file_path}...'))
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'path', nargs='?', default='data/categories.json',
+            help='Path of the JSON file. Defaults to data/categories.json.',
+        )
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='Report what would change without writing anything.',
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=DEFAULT_BATCH_SIZE,
+            help=f'Rows per bulk INSERT/UPDATE (default: {DEFAULT_BATCH_SIZE}).',
+        )
 
+    def handle(self, *args, **options):
+        path = options['path']
+        started = time.perf_counter()
         try:
-            with open(file_path, 'r', encoding='utf-8') as f:
+            with open(path, 'r', encoding='utf-8') as f:
                 data = json.load(f)
         except FileNotFoundError:
-            self.stdout.write(self.style.ERROR(f'File not found: {file_path}. Make sure the file exists.'))
+            raise CommandError(f'File not found: {path}.')
+        except json.JSONDecodeError as exc:
+            raise CommandError(f'{path} is not valid JSON: {exc}')
+
+        try:
+            plan = plan_import(data)
+        except ValueError as exc:
+            raise CommandError(str(exc))
+
+        self.stdout.write(f'Import plan for {path}:')
+        for change, count in plan.summary().items():
+            self.stdout.write(f'  {change}: {count}')
+        if options['verbosity'] > 1:
+            for node, parent_slug, _ in plan.creates:
+                self.stdout.write(f'  + {node["slug_en"]} (under {parent_slug or "root"})')
+            for category, _, changed in plan.updates:
+                self.stdout.write(f'  ~ {category.slug_en}: {", ".join(changed)}')
+            for slug in plan.missing:
+                self.stdout.write(f'  ? {slug} is not in the file')
+
+        if plan.errors:
+            for error in plan.errors:
+                self.stderr.write(self.style.ERROR(f'  {error}'))
+            raise CommandError(f'{len(plan.errors)} problem(s) found; nothing was imported.')
+        if options['dry_run']:
+            self.stdout.write(self.style.WARNING('Dry run: nothing was written.'))
             return
-        
-        created_count = 0
-        
-        for entry in data:
-            # Create parent category
-            parent_name = entry.get('name')
-            parent_slug = entry.get('slug', slugify(parent_name))
-            
-            parent_cat, created = Category.objects.get_or_create(
-                name=parent_name,
-                slug=parent_slug,
-                defaults={'parent': None} # Ensure it's a root node
-            )
-            
-            if created:
-                created_count += 1
-                self.stdout.write(f'  Created root category: {parent_cat.name}')
-            
-            # Create children categories
-            for child_entry in entry.get('children', []):
-                child_name = child_entry.get('name')
-                child_slug = child_entry.get('slug', slugify(child_name))
-                
-                child_cat, created = Category.objects.get_or_create(
-                    name=child_name,
-                    slug=child_slug,
-                    defaults={'parent': parent_cat}
-                )
-
-                if created:
-                    created_count += 1
-                    self.stdout.write(f'    - Created child category: {child_cat.name} under {parent_cat.name}')
-
-        self.stdout.write(self.style.SUCCESS(f'Import complete. Total new categories created: {created_count}'))
\ No newline at end of file
+
+        apply_import(plan, batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Import complete in {time.perf_counter() - started:.1f}s: '
+            f'{len(plan.creates)} created, {len(plan.updates)} updated.'
+        ))
@@ -0,0 +1,16 @@
+# src/categories/management/commands/reconcile_category_counts.py
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from categories.counts import reconcile_counts
+
+class Command(BaseCommand):
+    help = 'Recomputes the per-category listing counts from the listings and fixes any drift (run periodically)'
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            fixed = reconcile_counts()
+        if fixed:
+            self.stdout.write(self.style.WARNING(f'Fixed the listing counts of {fixed} categories.'))
+        else:
+            self.stdout.write(self.style.SUCCESS('Category listing counts are up to date.'))
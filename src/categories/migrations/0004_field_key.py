@@ -0,0 +1,45 @@
+# Generated by Django 5.2.4 on 2026-10-18 16:29
+
+from django.db import migrations, models
+from django.utils.text import slugify
+
+
+def populate_field_keys(apps, schema_editor):
+    # The keys must be unique before the constraint is added: names that
+    # slugify alike ("Año", "Ano") get a `_2`, `_3`, ... suffix, and names
+    # without any slug-able character fall back to `field_<pk>`.
+    Field = apps.get_model('categories', 'Field')
+    fields = list(Field.objects.order_by('pk'))
+    taken = set()
+    for field in fields:
+        base = slugify(field.name).replace('-', '_')[:90] or f'field_{field.pk}'
+        key, suffix = base, 1
+        while key in taken:
+            suffix += 1
+            key = f'{base}_{suffix}'
+        taken.add(key)
+        field.key = key
+    Field.objects.bulk_update(fields, ['key'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('categories', '0003_category_name_en_category_name_es_category_slug_en_and_more'),
+    ]
+
+    operations = [
+        # Added without the unique constraint first, so existing rows can be backfilled.
+        migrations.AddField(
+            model_name='field',
+            name='key',
+            field=models.SlugField(blank=True, default='', help_text="Machine name used in API filters, e.g. 'mileage' for ?attr.mileage__lt=100000.", max_length=100, verbose_name='Key'),
+            preserve_default=False,
+        ),
+        migrations.RunPython(populate_field_keys, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='field',
+            name='key',
+            field=models.SlugField(blank=True, help_text="Machine name used in API filters, e.g. 'mileage' for ?attr.mileage__lt=100000.", max_length=100, unique=True, verbose_name='Key'),
+        ),
+    ]
@@ -0,0 +1,50 @@
+# Generated by Django 5.2.4 on 2026-10-18 16:57
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def fill_counts(apps, schema_editor):
+    """
+    Initial counts; afterwards they're maintained by categories/counts.py.
+    """
+    Category = apps.get_model('categories', 'Category')
+    Listing = apps.get_model('listings', 'Listing')
+    direct = dict(
+        Listing.objects.filter(is_active=True, is_sold=False)
+        .order_by().values('category').annotate(count=Count('pk'))
+        .values_list('category', 'count')
+    )
+    parents = dict(Category.objects.values_list('pk', 'parent_id'))
+    totals = dict.fromkeys(parents, 0)
+    for category_id, count in direct.items():
+        while category_id is not None:
+            totals[category_id] += count
+            category_id = parents[category_id]
+    categories = [
+        Category(pk=pk, listing_count=direct.get(pk, 0), subtree_listing_count=total)
+        for pk, total in totals.items()
+    ]
+    Category.objects.bulk_update(categories, ['listing_count', 'subtree_listing_count'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('categories', '0005_trigram_indexes'),
+        ('listings', '0010_trigram_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='category',
+            name='listing_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Listing Count'),
+        ),
+        migrations.AddField(
+            model_name='category',
+            name='subtree_listing_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Subtree Listing Count'),
+        ),
+        migrations.RunPython(fill_counts, migrations.RunPython.noop),
+    ]
@@ -1,6 +1,10 @@
 # src/categories/models.py
 
-from django.db import models
+from decimal import Decimal, InvalidOperation
+
+from django.contrib.postgres.indexes import GinIndex
+from django.db import models, transaction
+from django.utils.text import slugify
 from django.utils.translation import gettext_lazy as _
 from mptt.models import MPTTModel, TreeForeignKey
 
@@ -22,18 +26,33 @@ class Category(MPTTModel):
     
     is_active = models.BooleanField(_("Is Active"), default=True)
 
+    # Active, unsold listings in the category itself and in its whole
+    # subtree; maintained by categories/counts.py.
+    listing_count = models.PositiveIntegerField(_("Listing Count"), default=0, editable=False)
+    subtree_listing_count = models.PositiveIntegerField(_("Subtree Listing Count"), default=0, editable=False)
+
     class MPTTMeta:
         order_insertion_by = ['name']
 
     class Meta:
         verbose_name = _("Category")
         verbose_name_plural = _("Categories")
+        indexes = [
+            # Typo-tolerant name suggestions (search/suggest.py).
+            GinIndex(fields=['name_en'], opclasses=['gin_trgm_ops'], name='category_name_en_trgm'),
+            GinIndex(fields=['name_es'], opclasses=['gin_trgm_ops'], name='category_name_es_trgm'),
+        ]
 
     def __str__(self):
         return self.name
 
 # --- NEW MODELS FOR DYNAMIC FIELDS ---
 
+# Keys are built from at most this much of the name, leaving room for a
+# de-duplicating suffix within Field.key's max_length.
+KEY_BASE_LENGTH = 90
+
+
 class Field(models.Model):
     """
     A global definition of a possible field for a listing.
@@ -45,7 +64,18 @@ class Field(models.Model):
         BOOLEAN = 'boolean', _('Yes / No')
         # We can add more types later, e.g., 'date', 'select'
         
+    # Raw strings accepted for BOOLEAN fields, in lower case.
+    TRUE_VALUES = frozenset(('true', '1', 'yes', 'y', 'on', 'si', 'sí'))
+    FALSE_VALUES = frozenset(('false', '0', 'no', 'n', 'off'))
+
     name = models.CharField(_("Field Name"), max_length=100, unique=True)
+    key = models.SlugField(
+        _("Key"),
+        max_length=100,
+        unique=True,
+        blank=True,
+        help_text=_("Machine name used in API filters, e.g. 'mileage' for ?attr.mileage__lt=100000.")
+    )
     field_type = models.CharField(_("Field Type"), max_length=10, choices=FieldType.choices)
     
     class Meta:
@@ -55,6 +85,70 @@ class Field(models.Model):
         
     def __str__(self):
         return f"{self.name} ({self.get_field_type_display()})"
+
+    def save(self, *args, **kwargs):
+        """
+        Generates the filter key from the name if it's empty: its slug,
+        suffixed `_2`, `_3`, ... if another field has it, or `field_<pk>`
+        for names without any slug-able character.
+        """
+        if not self.key:
+            self.key = self.make_unique_key(self.make_key(self.name))
+        if self.key:
+            return super().save(*args, **kwargs)
+        # A new field without a slug-able name: the key needs its pk.
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            self.key = self.make_unique_key(f'field_{self.pk}')
+            Field.objects.filter(pk=self.pk).update(key=self.key)
+
+    @staticmethod
+    def make_key(name):
+        return slugify(name).replace('-', '_')[:KEY_BASE_LENGTH]
+
+    def make_unique_key(self, base):
+        """
+        Returns `base`, suffixed if another field has it already, or '' if
+        `base` is empty and the field isn't saved yet.
+        """
+        if not base:
+            if self.pk is None:
+                return ''
+            base = f'field_{self.pk}'
+        taken = set(
+            Field.objects.filter(key__startswith=base).exclude(pk=self.pk).values_list('key', flat=True)
+        )
+        key, suffix = base, 1
+        while key in taken:
+            suffix += 1
+            key = f'{base}_{suffix}'
+        return key
+
+    @classmethod
+    def coerce_value(cls, field_type, raw):
+        """
+        Converts a raw string value to the Python type of `field_type`:
+        Decimal for NUMBER, bool for BOOLEAN and a stripped str for TEXT.
+        Raises ValueError if the value can't be converted.
+        """
+        if field_type == cls.FieldType.NUMBER:
+            try:
+                value = Decimal(str(raw).strip())
+            except InvalidOperation:
+                raise ValueError(f"'{raw}' is not a number.")
+            if not value.is_finite():
+                raise ValueError(f"'{raw}' is not a number.")
+            return value
+        if field_type == cls.FieldType.BOOLEAN:
+            if isinstance(raw, bool):
+                return raw
+            lowered = str(raw).strip().lower()
+            if lowered in cls.TRUE_VALUES:
+                return True
+            if lowered in cls.FALSE_VALUES:
+                return False
+            raise ValueError(f"'{raw}' is not a yes/no value.")
+        return str(raw).strip()
         
 
 class CategoryField(models.Model):
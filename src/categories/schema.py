@@ -0,0 +1,99 @@
+# src/categories/schema.py
+
+from django.core.cache import cache
+from django.db.models import Q
+from modeltranslation import settings as mt_settings
+from modeltranslation.utils import build_localized_fieldname, get_language
+
+from core.cache import get_namespace_versions
+from .models import Category, CategoryField
+
+# =================================================================
+#  RESOLVED CATEGORY FIELD SCHEMA
+# =================================================================
+# A CategoryField links a Field to one category, and applies to that
+# category and every category below it. The schema of a category is the
+# fields linked to it and to its ancestors; when the same field is linked
+# at several levels, the link nearest to the category wins (so a subcategory
+# can e.g. make an inherited field required).
+#
+# Schemas are cached per category and language, keyed by the version of the
+# 'categories' cache namespace, which every Category, Field and CategoryField
+# change bumps (see categories/signals.py).
+
+SCHEMA_TIMEOUT = 60 * 60
+
+
+def category_by_slug(slug, queryset=None):
+    """
+    Returns the category with `slug` in any language, or None.
+    """
+    lookup = Q()
+    for language in mt_settings.AVAILABLE_LANGUAGES:
+        lookup |= Q(**{build_localized_fieldname('slug', language): slug})
+    return (queryset if queryset is not None else Category.objects.all()).filter(lookup).first()
+
+
+def resolve_schema(category):
+    """
+    Computes the effective fields of `category`, from one query over the
+    links of the category and its ancestors (MPTT: the nodes whose range
+    contains the category's). Returns a list of dicts, ordered by field name.
+    """
+    links = CategoryField.objects.filter(
+        category__tree_id=category.tree_id,
+        category__lft__lte=category.lft,
+        category__rght__gte=category.rght,
+    ).select_related('field', 'category').order_by('category__level')
+    fields = {}
+    for link in links:
+        # Deeper links come last and override their ancestors'.
+        fields[link.field_id] = {
+            'id': link.pk,
+            'key': link.field.key,
+            'name': link.field.name,
+            'field_type': link.field.field_type,
+            'is_required': link.is_required,
+            'inherited': link.category_id != category.pk,
+            'category': link.category.slug,
+        }
+    return sorted(fields.values(), key=lambda field: field['name'])
+
+
+def _schema_key(category_id, language):
+    version = get_namespace_versions(['categories'])['categories']
+    return f'category-schema:{version}:{language}:{category_id}'
+
+
+def get_category_schema(category):
+    """
+    The cached `resolve_schema()` of `category` in the active language.
+    """
+    key = _schema_key(category.pk, get_language())
+    schema = cache.get(key)
+    if schema is None:
+        schema = resolve_schema(category)
+        cache.set(key, schema, SCHEMA_TIMEOUT)
+    return schema
+
+
+# =================================================================
+#  CACHED CATEGORY TREE
+# =================================================================
+# The shape of the whole tree, for code that rolls per-category numbers up
+# to the ancestors (e.g. the feed facets) without loading the table.
+# Cached like the schemas, keyed by the 'categories' namespace version.
+
+def get_category_tree():
+    """
+    Returns every category as `{'id', 'parent_id', 'slug', 'name'}` in
+    tree order, in the active language. One query when not cached.
+    """
+    version = get_namespace_versions(['categories'])['categories']
+    language = get_language()
+    key = f'category-tree:{version}:{language}'
+    tree = cache.get(key)
+    if tree is None:
+        tree = list(Category.objects.order_by('tree_id', 'lft').values('id', 'parent_id', 'slug', 'name'))
+        cache.set(key, tree, SCHEMA_TIMEOUT)
+    return tree
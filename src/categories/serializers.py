@@ -2,12 +2,14 @@
 
 from rest_framework import serializers
 from .models import Category
+from core.compiled import compile_serializer
+from core.serializers import DynamicFieldsMixin
 
 # =================================================================
 #  CATEGORY SERIALIZER (RECURSIVE)
 # =================================================================
 
-class CategorySerializer(serializers.ModelSerializer):
+class CategorySerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """
     A recursive serializer for the Category model to handle nested children.
     """
@@ -22,6 +24,8 @@ class CategorySerializer(serializers.ModelSerializer):
             'name',
             'slug',
             'parent', # The ID of the parent category
+            'listing_count', # Active listings in this category itself
+            'subtree_listing_count', # Active listings in this category and its descendants
             'children'
         ]
         # We can also add 'read_only_fields' if we want to prevent modification
@@ -31,8 +35,47 @@ class CategorySerializer(serializers.ModelSerializer):
         """
         This method gets all the direct children of the category instance 'obj'
         and serializes them using this same CategorySerializer.
+        On nodes from `get_cached_trees()`, the children are already loaded.
         """
+        children = obj.get_children()
         # We only want to serialize children if they exist
-        if obj.get_children():
-            return CategorySerializer(obj.get_children(), many=True).data
-        return None # Return None or an empty list if there are no children
\ No newline at end of file
+        if children:
+            # Pass the context on, so ?fields= applies at every level.
+            return CategorySerializer(children, many=True, context=self.context).data
+        return None # Return None or an empty list if there are no children
+
+
+# =================================================================
+#  COMPILED CATEGORY TREE
+# =================================================================
+
+def serialize_category_tree(serializer, roots):
+    """
+    Returns the same data as `CategorySerializer(roots, many=True).data`,
+    for a bound CategorySerializer, from a single query: every category of
+    the roots' trees is read in tree order (tree_id, lft), rendered by the
+    compiled serializer and attached to its parent.
+    Raises `core.compiled.CompileError` when the serializer can't be compiled.
+    """
+    compiled = compile_serializer(serializer, deferred=('children',))
+    with_children = 'children' in serializer.fields
+    queryset = Category.objects.filter(
+        tree_id__in=roots.values('tree_id')
+    ).order_by('tree_id', 'lft')
+    rows = list(compiled.project(queryset, extra=('pk', 'parent')))
+    items = compiled.serialize(rows, serializer.context)
+
+    nodes = {}
+    tree = []
+    for row, item in zip(rows, items):
+        nodes[row['pk']] = item
+        if row['parent'] is None:
+            tree.append(item)
+        elif with_children:
+            # In tree order a parent always comes before its children,
+            # and siblings come in the order get_children() returns them.
+            parent = nodes[row['parent']]
+            if parent['children'] is None:
+                parent['children'] = []
+            parent['children'].append(item)
+    return tree
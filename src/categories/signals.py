@@ -0,0 +1,26 @@
+# src/categories/signals.py
+
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from mptt.signals import node_moved
+
+from core.cache import bump_namespace_on_commit
+from .models import Category, CategoryField, Field
+
+# =================================================================
+#  CACHE INVALIDATION
+# =================================================================
+
+@receiver(post_save, sender=Category, dispatch_uid='categories_cache_category_saved')
+@receiver(post_delete, sender=Category, dispatch_uid='categories_cache_category_deleted')
+@receiver(node_moved, sender=Category, dispatch_uid='categories_cache_category_moved')
+def category_changed(sender, instance, **kwargs):
+    bump_namespace_on_commit('categories')
+
+
+@receiver(post_save, sender=CategoryField, dispatch_uid='categories_cache_category_field_saved')
+@receiver(post_delete, sender=CategoryField, dispatch_uid='categories_cache_category_field_deleted')
+@receiver(post_save, sender=Field, dispatch_uid='categories_cache_field_saved')
+@receiver(post_delete, sender=Field, dispatch_uid='categories_cache_field_deleted')
+def category_field_changed(sender, instance, **kwargs):
+    bump_namespace_on_commit('categories')
@@ -1,3 +1,95 @@
+from importlib import import_module
+
+from django.apps import apps
+from django.contrib.auth import get_user_model
 from django.test import TestCase
 
-# Create your tests here.
+from listings.models import Listing
+from .counts import apply_count_deltas, reconcile_counts
+from .models import Category, Field
+
+populate_field_keys = import_module('categories.migrations.0004_field_key').populate_field_keys
+
+
+class FieldKeyTests(TestCase):
+
+    def test_key_is_generated_from_the_name(self):
+        field = Field.objects.create(name='Square Feet', field_type=Field.FieldType.NUMBER)
+        self.assertEqual(field.key, 'square_feet')
+
+    def test_colliding_keys_get_a_suffix(self):
+        first = Field.objects.create(name='Año', field_type=Field.FieldType.NUMBER)
+        second = Field.objects.create(name='Ano', field_type=Field.FieldType.NUMBER)
+        third = Field.objects.create(name='ANO!', field_type=Field.FieldType.NUMBER)
+        self.assertEqual([first.key, second.key, third.key], ['ano', 'ano_2', 'ano_3'])
+
+    def test_names_without_a_slug_fall_back_to_the_pk(self):
+        field = Field.objects.create(name='???', field_type=Field.FieldType.TEXT)
+        self.assertEqual(field.key, f'field_{field.pk}')
+        field.refresh_from_db()
+        self.assertEqual(field.key, f'field_{field.pk}')
+
+        other = Field.objects.create(name='広さ', field_type=Field.FieldType.NUMBER)
+        self.assertEqual(other.key, f'field_{other.pk}')
+
+    def test_an_explicit_key_is_kept(self):
+        field = Field.objects.create(name='Mileage', key='km', field_type=Field.FieldType.NUMBER)
+        self.assertEqual(field.key, 'km')
+
+
+class PopulateFieldKeysMigrationTests(TestCase):
+
+    def test_backfilled_keys_are_unique_and_never_empty(self):
+        names = ['Año', 'Ano', '???', '広さ', 'Mileage']
+        fields = [Field.objects.create(name=name, field_type=Field.FieldType.TEXT) for name in names]
+        # As the rows were before the migration: no key yet.
+        Field.objects.update(key='')
+
+        populate_field_keys(apps, None)
+
+        keys = dict(Field.objects.values_list('name', 'key'))
+        self.assertEqual(keys['Año'], 'ano')
+        self.assertEqual(keys['Ano'], 'ano_2')
+        self.assertEqual(keys['???'], f'field_{fields[2].pk}')
+        self.assertEqual(keys['広さ'], f'field_{fields[3].pk}')
+        self.assertEqual(keys['Mileage'], 'mileage')
+        self.assertEqual(len(set(keys.values())), len(names))
+
+
+class CategoryCountTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.seller = get_user_model().objects.create_user(
+            username='seller', email='seller@example.com', password='secret',
+        )
+        cls.root = Category.objects.create(name='Vehicles', slug='vehicles')
+        cls.cars = Category.objects.create(name='Cars', slug='cars', parent=cls.root)
+
+    def counts(self, category):
+        category.refresh_from_db()
+        return category.listing_count, category.subtree_listing_count
+
+    def test_listing_writes_adjust_the_counts(self):
+        listing = Listing.objects.create(title='Car', category=self.cars, author=self.seller, price=100)
+        self.assertEqual((self.counts(self.cars), self.counts(self.root)), ((1, 1), (0, 1)))
+
+        listing.is_sold = True
+        listing.save()
+        self.assertEqual((self.counts(self.cars), self.counts(self.root)), ((0, 0), (0, 0)))
+
+    def test_drifted_counts_never_go_negative(self):
+        Category.objects.update(listing_count=0, subtree_listing_count=0)
+
+        apply_count_deltas({self.cars.pk: -1})
+        self.assertEqual((self.counts(self.cars), self.counts(self.root)), ((0, 0), (0, 0)))
+
+    def test_reconcile_fixes_drift(self):
+        Listing.objects.create(title='Car', category=self.cars, author=self.seller, price=100)
+        Listing.objects.update(is_active=False)
+        Listing.objects.create(title='Van', category=self.root, author=self.seller, price=100)
+        self.assertEqual(self.counts(self.root), (1, 2))
+
+        self.assertEqual(reconcile_counts(), 2)
+        self.assertEqual((self.counts(self.cars), self.counts(self.root)), ((0, 0), (1, 1)))
+        self.assertEqual(reconcile_counts(), 0)
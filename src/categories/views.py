@@ -1,20 +1,76 @@
 # src/categories/views.py
 
 from rest_framework import generics
+from rest_framework.exceptions import NotFound
 from rest_framework.permissions import AllowAny
+from rest_framework.response import Response
+from core.cache import cache_response, get_namespace_versions
+from core.compiled import CompileError
+from core.conditional import ConditionalGetMixin
+from core.views import SparseFieldsetsMixin
+from .counts import COUNTS_NAMESPACE
 from .models import Category
-from .serializers import CategorySerializer
+from .schema import category_by_slug, get_category_schema
+from .serializers import CategorySerializer, serialize_category_tree
 
 # =================================================================
 #  API VIEWS
 # =================================================================
 
-class CategoryListView(generics.ListAPIView):
+class CategoryListView(ConditionalGetMixin, SparseFieldsetsMixin, generics.ListAPIView):
     """
     API endpoint to list all top-level categories.
     Child categories are nested recursively within their parents.
+    Every node carries its direct and subtree listing counts.
+    The tree is cached per language and query, and carries an ETag that
+    changes whenever a category, a category field or a count changes
+    (304 otherwise).
     """
     # We only want to fetch categories that are at the root of the tree.
     queryset = Category.objects.filter(parent__isnull=True)
     serializer_class = CategorySerializer
-    permission_classes = [AllowAny] # Anyone can view the categories
\ No newline at end of file
+    permission_classes = [AllowAny] # Anyone can view the categories
+
+    def get_condition(self, request):
+        # The versions of the cache namespaces bumped by every change to the
+        # tree (see categories/signals.py) and to its listing counts
+        # (categories/counts.py): no query at all.
+        versions = get_namespace_versions(['categories', COUNTS_NAMESPACE])
+        return (versions['categories'], versions[COUNTS_NAMESPACE]), None
+
+    @cache_response('categories', COUNTS_NAMESPACE)
+    def list(self, request, *args, **kwargs):
+        # The whole tree is rendered from one query (see serialize_category_tree).
+        try:
+            data = serialize_category_tree(self.get_serializer(), self.get_queryset())
+        except CompileError:
+            # Also a single query: get_cached_trees() attaches every node
+            # to its parent, so get_children() doesn't hit the database.
+            roots = Category.objects.filter(
+                tree_id__in=self.get_queryset().values('tree_id')
+            ).order_by('tree_id', 'lft').get_cached_trees()
+            data = self.get_serializer(roots, many=True).data
+        return Response(data)
+
+
+class CategorySchemaView(ConditionalGetMixin, generics.RetrieveAPIView):
+    """
+    API endpoint returning the fields a listing in a category has: the
+    category's own fields plus those inherited from its ancestors, with
+    `key`, `name`, `field_type`, `is_required`, `inherited` and the slug of
+    the `category` defining them. Cached, with an ETag.
+    """
+    permission_classes = [AllowAny]
+
+    def get_condition(self, request):
+        return (self.kwargs['slug'], get_namespace_versions(['categories'])['categories']), None
+
+    @cache_response('categories')
+    def retrieve(self, request, *args, **kwargs):
+        category = category_by_slug(self.kwargs['slug'], Category.objects.filter(is_active=True))
+        if category is None:
+            raise NotFound('No category with this slug.')
+        return Response({
+            'category': category.slug,
+            'fields': get_category_schema(category),
+        })
@@ -30,10 +30,12 @@ INSTALLED_APPS = [
     'django.contrib.messages',
     'django.contrib.staticfiles',
     'django.contrib.gis',
+    'django.contrib.postgres',
 
     # Third-party apps
     'rest_framework', # <--- ADDED DRF
     'corsheaders', # <--- ADDED CORSHEADERS
+    'django_filters',
     'import_export',
     'mptt',
     'modeltranslation',
@@ -104,6 +106,21 @@ DATABASES = {
     'default': env.db_url('DATABASE_URL', engine='django.contrib.gis.db.backends.postgis')
 }
 
+# --- Cache Configuration ---
+# e.g. CACHE_URL=redis://redis:6379/1 (the 'redis' service in docker-compose).
+# It must be shared by every worker process: the cache namespace versions
+# that invalidate responses, ETags and in-process indexes live there (see
+# core/cache.py). The local-memory default is only accepted when
+# ALLOW_LOCAL_CACHE is set, which it is by default with DEBUG, or for a
+# single-process deployment (see core/checks.py).
+CACHES = {
+    'default': env.cache_url('CACHE_URL', default='locmemcache://')
+}
+ALLOW_LOCAL_CACHE = env.bool('ALLOW_LOCAL_CACHE', default=DEBUG)
+# Lifetime (in seconds) of the cached API responses. Entries are invalidated
+# earlier by namespace version bumps, see core/cache.py.
+API_CACHE_TIMEOUT = env.int('API_CACHE_TIMEOUT', default=300)
+
 # --- Password Validation ---
 AUTH_PASSWORD_VALIDATORS = [
     {'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator'},
@@ -138,4 +155,24 @@ AUTH_USER_MODEL = 'accounts.CustomUser'
 
 # --- Media Files Configuration ---
 MEDIA_URL = '/media/'
-MEDIA_ROOT = BASE_DIR / 'media'
\ No newline at end of file
+MEDIA_ROOT = BASE_DIR / 'media'
+
+# Resized derivatives of uploaded images (see core/images.py) are built by
+# a pool of worker threads, off the request path. Turn IMAGE_VARIANTS_ASYNC
+# off to build them inline, when the upload's transaction commits.
+IMAGE_VARIANTS_ASYNC = env.bool('IMAGE_VARIANTS_ASYNC', default=True)
+IMAGE_VARIANT_WORKERS = env.int('IMAGE_VARIANT_WORKERS', default=2)
+
+# --- Search ---
+# 'postgres' ranks with the full-text search documents (search/documents.py);
+# 'index' with the in-process BM25 snapshot built by `manage.py
+# build_search_index` into SEARCH_INDEX_DIR (see search/index.py).
+SEARCH_BACKEND = env('SEARCH_BACKEND', default='postgres')
+SEARCH_INDEX_DIR = env('SEARCH_INDEX_DIR', default=str(BASE_DIR / 'search_index'))
+# --- Map tiles ---
+# Vector tiles (`/tiles/<layer>/<z>/<x>/<y>.mvt`) are cached as files under
+# TILE_CACHE_DIR, one directory per layer version (see places/vector_tiles.py).
+# Edits delete the tiles they touch; TILE_CACHE_TIMEOUT (seconds) bounds the
+# age of any tile served from disk.
+TILE_CACHE_DIR = env('TILE_CACHE_DIR', default=str(BASE_DIR / 'tile_cache'))
+TILE_CACHE_TIMEOUT = env.int('TILE_CACHE_TIMEOUT', default=24 * 60 * 60)
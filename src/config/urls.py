@@ -4,6 +4,7 @@ from django.conf import settings
 from django.conf.urls.static import static
 from django.contrib import admin
 from django.urls import path, include # <-- Added 'include'
+from places.views import vector_tile
 
 urlpatterns = [
     # Admin Panel
@@ -12,6 +13,9 @@ urlpatterns = [
     # API v1
     # This line includes all URLs from the 'api' app under the 'api/v1/' prefix.
     path('api/v1/', include('api.urls', namespace='api')),
+
+    # Map vector tiles (binary, so outside the JSON API)
+    path('tiles/<slug:layer>/<int:z>/<int:x>/<int:y>.mvt', vector_tile, name='vector-tile'),
 ]
 
 # --- Media Files Serving (for development) ---
@@ -0,0 +1,135 @@
+# src/core/cache.py
+
+import hashlib
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from modeltranslation.utils import get_language
+from rest_framework.response import Response
+
+# =================================================================
+#  NAMESPACE VERSIONS
+# =================================================================
+# Every cached response is keyed by the current version of the namespaces
+# it depends on (e.g. 'listings', 'categories'). Invalidation never deletes
+# keys: bumping a namespace's version makes every key built from the old
+# version unreachable, and those entries simply expire.
+
+VERSION_KEY_PREFIX = 'ns-version:'
+
+
+def _version_key(namespace):
+    return f'{VERSION_KEY_PREFIX}{namespace}'
+
+
+def _initial_version():
+    # Seeded from the clock, so a version counter that was evicted from the
+    # cache never restarts at a value that older entries were keyed on.
+    return int(time.time() * 1000)
+
+
+def get_namespace_versions(namespaces):
+    """
+    Returns `{namespace: version}`, creating missing counters.
+    Costs a single cache round trip when every counter exists.
+    """
+    keys = {_version_key(namespace): namespace for namespace in namespaces}
+    found = cache.get_many(keys)
+    versions = {}
+    for key, namespace in keys.items():
+        if key not in found:
+            cache.add(key, _initial_version(), timeout=None)
+            found[key] = cache.get(key)
+        versions[namespace] = found[key]
+    return versions
+
+
+def bump_namespace(*namespaces):
+    """
+    Invalidates every cached response depending on any of `namespaces`.
+    """
+    for namespace in namespaces:
+        key = _version_key(namespace)
+        try:
+            cache.incr(key)
+        except ValueError:
+            # The counter doesn't exist (yet, or any more).
+            cache.set(key, _initial_version(), timeout=None)
+
+
+def bump_namespace_on_commit(*namespaces):
+    """
+    Bumps `namespaces` once the current transaction commits, so a reader
+    can't re-cache the old data between the bump and the commit.
+    """
+    transaction.on_commit(lambda: bump_namespace(*namespaces))
+
+
+# =================================================================
+#  RESPONSE CACHE
+# =================================================================
+
+def normalize_query(query_params):
+    """
+    Returns a canonical string for a QueryDict: keys and repeated values are
+    sorted and empty values dropped, so `?b=2&a=1` and `?a=1&b=2&c=` match.
+    """
+    items = []
+    for key in sorted(query_params):
+        values = sorted(value for value in query_params.getlist(key) if value != '')
+        items.extend(f'{key}={value}' for value in values)
+    return '&'.join(items)
+
+
+def response_cache_key(request, namespaces):
+    versions = get_namespace_versions(namespaces)
+    version_part = ','.join(f'{namespace}.{versions[namespace]}' for namespace in namespaces)
+    raw = '|'.join((
+        version_part,
+        get_language(),
+        request.accepted_media_type or '',
+        # Part of the key because paginated responses carry absolute links.
+        request.get_host(),
+        request.path,
+        normalize_query(request.query_params),
+    ))
+    return 'response:' + hashlib.md5(raw.encode('utf-8')).hexdigest()
+
+
+def cache_response(*namespaces, timeout=None):
+    """
+    Caches the successful responses of a DRF view method (e.g. `list` or
+    `retrieve`), keyed by the request path, the normalized query parameters,
+    the active language and the versions of `namespaces`.
+
+    Only the response data is cached, so content negotiation and rendering
+    still happen per request; the database and the serializers are skipped.
+
+        @cache_response('listings')
+        def retrieve(self, request, *args, **kwargs):
+            ...
+    """
+    def decorator(view_method):
+        @wraps(view_method)
+        def wrapper(self, request, *args, **kwargs):
+            key = response_cache_key(request, namespaces)
+            data = cache.get(key)
+            if data is not None:
+                response = Response(data)
+                response['X-Cache'] = 'HIT'
+                return response
+
+            response = view_method(self, request, *args, **kwargs)
+            if response.status_code == 200:
+                cache.set(
+                    key,
+                    response.data,
+                    settings.API_CACHE_TIMEOUT if timeout is None else timeout,
+                )
+                response['X-Cache'] = 'MISS'
+            return response
+        return wrapper
+    return decorator
@@ -0,0 +1,37 @@
+# src/core/checks.py
+
+from django.conf import settings
+from django.core.checks import Error, Tags, register
+
+# =================================================================
+#  SYSTEM CHECKS
+# =================================================================
+
+# Cache backends whose entries live in each process's own memory.
+PROCESS_LOCAL_CACHES = frozenset((
+    'django.core.cache.backends.locmem.LocMemCache',
+))
+
+
+@register(Tags.caches)
+def check_shared_cache(app_configs, **kwargs):
+    """
+    The namespace versions of core/cache.py (and through them the cached
+    responses, ETags, suggest index and geocoder tree) only invalidate
+    across workers through a cache they all share. A process-local default
+    cache is an error unless ALLOW_LOCAL_CACHE says the site runs a single
+    process. The setting defaults to DEBUG, read once at startup: the test
+    runner turns DEBUG off before running the checks.
+    """
+    if settings.ALLOW_LOCAL_CACHE:
+        return []
+    backend = settings.CACHES['default']['BACKEND']
+    if backend not in PROCESS_LOCAL_CACHES:
+        return []
+    return [Error(
+        f"The default cache ({backend}) isn't shared between processes, so "
+        "cache invalidations in one worker never reach the others.",
+        hint='Set CACHE_URL to a shared cache, e.g. redis://redis:6379/1, '
+             'or ALLOW_LOCAL_CACHE=True for a single-process deployment.',
+        id='core.E001',
+    )]
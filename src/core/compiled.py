@@ -0,0 +1,339 @@
+# src/core/compiled.py
+
+import threading
+from collections import OrderedDict
+from operator import itemgetter
+from types import SimpleNamespace
+
+from django.core.exceptions import FieldDoesNotExist
+from django.db import models
+from modeltranslation import settings as mt_settings
+from modeltranslation.fields import TranslationFieldDescriptor
+from modeltranslation.utils import build_localized_fieldname
+from rest_framework import relations, serializers
+from rest_framework.settings import api_settings
+
+# =================================================================
+#  COMPILED READ-ONLY SERIALIZATION
+# =================================================================
+# DRF renders a list by calling, for every row and every field,
+# `field.get_attribute(instance)` and `field.to_representation(value)` on a
+# model instance. For read-only list responses most of that work is the
+# same for every row, so it's done once here: a serializer's fields are
+# compiled into the `values()` lookups they need and one converter per
+# field, and rows are rendered straight from `values()` dicts.
+# The output is the same as the serializer's `.data`, key for key.
+
+
+class CompileError(Exception):
+    """
+    Raised when a serializer uses a field that can't be compiled (e.g. a
+    SerializerMethodField without `Meta.method_field_columns`, or a source
+    that isn't a model field). Callers fall back to the serializer itself.
+    """
+
+
+class _RenderState:
+    """
+    Per-call state shared by the converters: the serializer context, and
+    the serializer instances that SerializerMethodFields are called on.
+    """
+
+    def __init__(self, context):
+        self.context = context
+        self._serializers = {}
+
+    def serializer_for(self, compiled):
+        serializer = self._serializers.get(compiled)
+        if serializer is None:
+            serializer = compiled.serializer_class(context=self.context)
+            self._serializers[compiled] = serializer
+        return serializer
+
+
+class CompiledSerializer:
+    """
+    The compiled form of a (bound) ModelSerializer: `project()` turns a
+    queryset into the `values()` rows it needs, and `serialize()` turns
+    those rows into the data the serializer would have returned.
+
+    Supported fields:
+    - model fields (including dotted sources through forward relations and
+      modeltranslation fields, resolved with the same fallbacks),
+    - file and image fields,
+    - PrimaryKeyRelatedFields,
+    - nested serializers over forward relations, flattened into the row,
+    - nested `many=True` serializers over reverse foreign keys, fetched with
+      one extra query per relation (top-level serializer only),
+    - SerializerMethodFields whose serializer declares the columns the
+      method reads in `Meta.method_field_columns = {name: (column, ...)}`.
+      The method is then called with an object exposing only those columns.
+    - fields whose source is a queryset annotation, listed in
+      `Meta.annotated_fields` (the queryset must carry the annotation).
+
+    Fields listed in `deferred` are rendered as None, in their position,
+    for the caller to fill in (e.g. the children of a category tree).
+    """
+
+    def __init__(self, serializer, prefix='', deferred=()):
+        self.serializer_class = type(serializer)
+        self.model = serializer.Meta.model
+        self.prefix = prefix
+        self.lookups = []
+        self.converters = []
+        self.many = []
+        for name, field in serializer.fields.items():
+            if field.write_only:
+                continue
+            if name in deferred:
+                self.converters.append((name, _none))
+            else:
+                self.converters.append((name, self._compile_field(field)))
+        if self.many:
+            self.read_pk = self._reader(['pk'])
+
+    # --- Columns ---
+
+    def _add_lookup(self, lookup):
+        if lookup not in self.lookups:
+            self.lookups.append(lookup)
+
+    def _resolve(self, attrs):
+        """
+        Returns `(model, model_field)` for a source path such as
+        ['author', 'username'], which may only cross forward relations.
+        """
+        model = self.model
+        for position, attr in enumerate(attrs):
+            try:
+                field = model._meta.pk if attr == 'pk' else model._meta.get_field(attr)
+            except FieldDoesNotExist:
+                raise CompileError(f'{self.serializer_class.__name__}: {attr!r} is not a field of {model.__name__}.')
+            if not field.concrete or field.many_to_many:
+                raise CompileError(f'{self.serializer_class.__name__}: {attr!r} is not a concrete field.')
+            if position < len(attrs) - 1:
+                if not field.is_relation:
+                    raise CompileError(f'{self.serializer_class.__name__}: {attr!r} is not a relation.')
+                model = field.related_model
+        return model, field
+
+    def _reader(self, attrs, wrap_files=False):
+        """
+        Registers the lookups needed to read `attrs` and returns a function
+        reading the value from a row. Translated fields are read from every
+        language column and resolved by the modeltranslation descriptor.
+        With `wrap_files`, file names are wrapped in their FieldFile class,
+        as they would be on a model instance.
+        """
+        model, field = self._resolve(attrs)
+        path = self.prefix + '__'.join(attrs)
+
+        descriptor = model.__dict__.get(field.name)
+        if isinstance(descriptor, TranslationFieldDescriptor):
+            columns = {}
+            for language in mt_settings.AVAILABLE_LANGUAGES:
+                lookup = build_localized_fieldname(path, language)
+                self._add_lookup(lookup)
+                columns[build_localized_fieldname(field.name, language)] = lookup
+
+            def read(row):
+                holder = SimpleNamespace(**{attr: row[lookup] for attr, lookup in columns.items()})
+                return descriptor.__get__(holder, None)
+            return read
+
+        self._add_lookup(path)
+        if wrap_files and isinstance(field, models.FileField):
+            def read(row):
+                return field.attr_class(None, field, row[path])
+            return read
+        return itemgetter(path)
+
+    # --- Fields ---
+
+    def _compile_field(self, field):
+        if isinstance(field, serializers.SerializerMethodField):
+            return self._compile_method_field(field)
+        if field.source == '*':
+            raise CompileError(f'{self.serializer_class.__name__}.{field.field_name}: source="*" is not supported.')
+        attrs = field.source_attrs
+
+        if attrs[0] in getattr(self.serializer_class.Meta, 'annotated_fields', ()):
+            path = self.prefix + field.source
+            self._add_lookup(path)
+            return _converted(itemgetter(path), field.to_representation)
+        if isinstance(field, serializers.ListSerializer):
+            return self._compile_many(field, attrs)
+        if isinstance(field, serializers.ModelSerializer):
+            return self._compile_nested(field, attrs)
+        if isinstance(field, relations.PrimaryKeyRelatedField) and field.pk_field is None:
+            # values() already returns the related primary key.
+            return _plain(self._reader(attrs))
+        if isinstance(field, (relations.RelatedField, relations.ManyRelatedField, serializers.BaseSerializer)):
+            raise CompileError(f'{self.serializer_class.__name__}.{field.field_name}: {type(field).__name__} is not supported.')
+        if isinstance(field, serializers.FileField):
+            return self._compile_file(field, attrs)
+        return _converted(self._reader(attrs), field.to_representation)
+
+    def _compile_method_field(self, field):
+        columns = getattr(self.serializer_class.Meta, 'method_field_columns', {}).get(field.field_name)
+        if columns is None:
+            raise CompileError(
+                f'{self.serializer_class.__name__}.{field.field_name}: '
+                'declare the columns it reads in Meta.method_field_columns.'
+            )
+        readers = [(column, self._reader(column.split('__'), wrap_files=True)) for column in columns]
+        method_name = field.method_name
+
+        def convert(row, state):
+            obj = SimpleNamespace(**{column: read(row) for column, read in readers})
+            return getattr(state.serializer_for(self), method_name)(obj)
+        return convert
+
+    def _compile_file(self, field, attrs):
+        read = self._reader(attrs)
+        model_field = self._resolve(attrs)[1]
+        if not isinstance(model_field, models.FileField):
+            raise CompileError(f'{self.serializer_class.__name__}.{field.field_name}: not a model file field.')
+        storage = model_field.storage
+        use_url = getattr(field, 'use_url', api_settings.UPLOADED_FILES_USE_URL)
+
+        def convert(row, state):
+            name = read(row)
+            if not name:
+                return None
+            if not use_url:
+                return name
+            url = storage.url(name)
+            request = state.context.get('request')
+            if request is not None:
+                return request.build_absolute_uri(url)
+            return url
+        return convert
+
+    def _compile_nested(self, field, attrs):
+        relation = self._resolve(attrs)[1]
+        if not relation.is_relation:
+            raise CompileError(f'{self.serializer_class.__name__}.{field.field_name}: not a relation.')
+        read_key = self._reader(attrs)
+        child = CompiledSerializer(field, prefix=self.prefix + '__'.join(attrs) + '__')
+        for lookup in child.lookups:
+            self._add_lookup(lookup)
+
+        def convert(row, state):
+            if read_key(row) is None:
+                return None
+            return child.build(row, state)
+        return convert
+
+    def _compile_many(self, field, attrs):
+        if self.prefix or len(attrs) != 1 or not isinstance(field.child, serializers.ModelSerializer):
+            raise CompileError(f'{self.serializer_class.__name__}.{field.field_name}: unsupported nested list.')
+        try:
+            relation = self.model._meta.get_field(attrs[0])
+        except FieldDoesNotExist:
+            raise CompileError(f'{self.serializer_class.__name__}.{field.field_name}: not a relation.')
+        if not relation.one_to_many:
+            raise CompileError(f'{self.serializer_class.__name__}.{field.field_name}: only reverse foreign keys are supported.')
+        self.many.append((field.field_name, CompiledSerializer(field.child), relation.field.name))
+        # Filled in by serialize(), once the rows of the page are known.
+        return _none
+
+    # --- Rendering ---
+
+    def project(self, queryset, extra=()):
+        """
+        Returns `queryset` as `values()` rows holding every lookup the
+        fields need, plus `extra` (e.g. the paginator's key columns).
+        """
+        lookups = list(self.lookups)
+        lookups.extend(lookup for lookup in extra if lookup not in lookups)
+        # values() rows can't be prefetched into; nested lists are fetched by serialize().
+        return queryset.prefetch_related(None).values(*lookups)
+
+    def build(self, row, state):
+        return {name: convert(row, state) for name, convert in self.converters}
+
+    def serialize(self, rows, context):
+        """
+        Renders `rows` (from `project()`) as the serializer's `many=True`
+        data would, with one extra query per nested list.
+        """
+        state = _RenderState(context)
+        rows = list(rows)
+        data = [self.build(row, state) for row in rows]
+        if self.many and rows:
+            keys = [self.read_pk(row) for row in rows]
+            for name, child, foreign_key in self.many:
+                groups = child.fetch_grouped(foreign_key, keys, state)
+                for item, key in zip(data, keys):
+                    item[name] = groups.get(key, [])
+        return data
+
+    def fetch_grouped(self, foreign_key, keys, state):
+        """
+        Returns `{key: [item, ...]}` for the rows of this (child) serializer's
+        model whose `foreign_key` is in `keys`, in the model's default ordering,
+        the same rows and order a prefetch of the relation would return.
+        """
+        rows = self.model._default_manager.filter(**{f'{foreign_key}__in': keys})
+        groups = {}
+        for row in self.project(rows, extra=(foreign_key,)):
+            groups.setdefault(row[foreign_key], []).append(self.build(row, state))
+        return groups
+
+
+def _none(row, state):
+    return None
+
+
+def _plain(read):
+    def convert(row, state):
+        return read(row)
+    return convert
+
+
+def _converted(read, to_representation):
+    def convert(row, state):
+        value = read(row)
+        # DRF skips to_representation() for None values.
+        return None if value is None else to_representation(value)
+    return convert
+
+
+# =================================================================
+#  COMPILED SERIALIZER CACHE
+# =================================================================
+
+# Each `?fields=` / `?expand=` combination compiles its own entry, so the
+# cache is bounded: the least recently used entries are evicted past this.
+MAX_COMPILED = 256
+
+_compiled = OrderedDict()
+_compiled_lock = threading.Lock()
+
+
+def compile_serializer(serializer, deferred=()):
+    """
+    Returns the CompiledSerializer of a bound serializer instance, compiled
+    once per process for each serializer class and set of rendered fields
+    (which depend on `?fields=` / `?expand=`), and kept while it is among
+    the MAX_COMPILED most recently used.
+    Raises CompileError when the serializer can't be compiled.
+    """
+    key = (type(serializer), tuple(serializer.fields), tuple(deferred))
+    with _compiled_lock:
+        compiled = _compiled.get(key)
+        if compiled is not None:
+            _compiled.move_to_end(key)
+    if compiled is None:
+        try:
+            compiled = CompiledSerializer(serializer, deferred=deferred)
+        except CompileError as exc:
+            compiled = exc
+        with _compiled_lock:
+            _compiled[key] = compiled
+            while len(_compiled) > MAX_COMPILED:
+                _compiled.popitem(last=False)
+    if isinstance(compiled, CompileError):
+        raise compiled
+    return compiled
@@ -0,0 +1,64 @@
+# src/core/conditional.py
+
+import hashlib
+
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+from modeltranslation.utils import get_language
+
+from .cache import normalize_query
+
+# =================================================================
+#  CONDITIONAL GET (ETag / Last-Modified / 304)
+# =================================================================
+
+def make_etag(request, values):
+    """
+    Builds a strong ETag from the values describing a resource's state,
+    the active language and the normalized query parameters (e.g. the cursor
+    of a paginated list), since all of them shape the response body.
+    """
+    raw = '|'.join((
+        repr(values),
+        get_language(),
+        normalize_query(request.query_params),
+    ))
+    return quote_etag(hashlib.md5(raw.encode('utf-8')).hexdigest())
+
+
+class ConditionalGetMixin:
+    """
+    Adds `If-None-Match` / `If-Modified-Since` support to a DRF view's GET.
+
+    Subclasses implement `get_condition()`, which should describe the state
+    of the response with a cheap query (timestamps, counts) without loading
+    the object graph. When the client's validators still match, a 304 is
+    returned before the serializer, and any nested relation, is touched.
+    """
+
+    def get_condition(self, request):
+        """
+        Returns a `(values, last_modified)` pair, where `values` is a tuple
+        that changes whenever the response body would change and
+        `last_modified` is an aware datetime (or None).
+        Returns None to skip conditional handling (e.g. the object is missing).
+        """
+        raise NotImplementedError('Subclasses must implement get_condition().')
+
+    def get(self, request, *args, **kwargs):
+        condition = self.get_condition(request)
+        if condition is None:
+            return super().get(request, *args, **kwargs)
+
+        values, last_modified = condition
+        etag = make_etag(request, values)
+        last_modified = int(last_modified.timestamp()) if last_modified else None
+
+        response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if response is None:
+            response = super().get(request, *args, **kwargs)
+        if response.status_code in (200, 304):
+            response['ETag'] = etag
+            if last_modified is not None:
+                response['Last-Modified'] = http_date(last_modified)
+        return response
@@ -0,0 +1,288 @@
+# src/core/images.py
+
+import base64
+import logging
+import posixpath
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from django.apps import apps
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import close_old_connections, transaction
+from django.dispatch import Signal
+from django.utils import timezone
+from PIL import Image, ImageOps
+
+logger = logging.getLogger(__name__)
+
+# =================================================================
+#  IMAGE DERIVATIVES
+# =================================================================
+# Uploaded images are served through resized derivatives ("variants"):
+# every size of an image field is encoded as WebP and JPEG, next to a tiny
+# blurred placeholder (LQIP) inlined as a data URI. Derivatives are written
+# next to the original, under a `variants/` directory, and described in a
+# JSON column of the model:
+#
+#   {'source': 'listings/images/<id>/car.jpg', 'width': 4032, 'height': 3024,
+#    'placeholder': 'data:image/webp;base64,...',
+#    'sizes': {'thumb': {'width': 160, 'height': 120,
+#                        'webp': '.../variants/car_thumb.webp',
+#                        'jpeg': '.../variants/car_thumb.jpg'}, ...}}
+#
+# `source` is the original they were built from, so a replaced upload is
+# detected and re-processed.
+
+# (name, longest edge in pixels), smallest first.
+DEFAULT_SIZES = (('thumb', 160), ('card', 480), ('full', 1280))
+
+# format -> (Pillow format, extension, save options)
+FORMATS = {
+    'webp': ('WEBP', 'webp', {'quality': 80, 'method': 4}),
+    'jpeg': ('JPEG', 'jpg', {'quality': 82, 'optimize': True, 'progressive': True}),
+}
+
+PLACEHOLDER_SIZE = 16
+
+# Sent (from the worker) once new variants of an image are stored, with
+# `instance` and `field_name`, e.g. to refresh a read model showing them.
+variants_ready = Signal()
+
+
+class ImageSpec:
+    """
+    An image field registered for derivatives (see `register_image_field`).
+    """
+
+    def __init__(self, model, field_name, variants_field, sizes):
+        self.model = model
+        self.field_name = field_name
+        self.variants_field = variants_field
+        self.sizes = sizes
+
+    @property
+    def key(self):
+        return f'{self.model._meta.label}.{self.field_name}'
+
+
+_specs = {}
+
+
+def register_image_field(model, field_name, variants_field, sizes=DEFAULT_SIZES):
+    """
+    Declares that `model.<field_name>` gets derivatives of `sizes`, described
+    in the JSON field `variants_field`. Called from the owning app's `ready()`.
+    """
+    spec = ImageSpec(model, field_name, variants_field, sizes)
+    _specs[spec.key] = spec
+    return spec
+
+
+def get_spec(model, field_name):
+    return _specs[f'{model._meta.label}.{field_name}']
+
+
+def registered_specs():
+    return list(_specs.values())
+
+
+def needs_variants(instance, field_name):
+    """
+    True when the image of `instance` has no variants built from it yet.
+    """
+    spec = get_spec(type(instance), field_name)
+    name = getattr(instance, field_name).name
+    return bool(name) and (getattr(instance, spec.variants_field) or {}).get('source') != name
+
+
+# --- Rendering ---
+
+def _encode(image, image_format):
+    pillow_format, _, options = FORMATS[image_format]
+    buffer = BytesIO()
+    image.save(buffer, pillow_format, **options)
+    return buffer.getvalue()
+
+
+def _open(field_file):
+    with field_file.open('rb') as source:
+        image = Image.open(source)
+        # Phone photos are often stored rotated, with an EXIF orientation tag.
+        image = ImageOps.exif_transpose(image)
+        image.load()
+    if image.mode not in ('RGB', 'L'):
+        # JPEG has no alpha: flatten transparent images on white.
+        background = Image.new('RGB', image.size, (255, 255, 255))
+        background.paste(image, mask=image.convert('RGBA').getchannel('A'))
+        image = background
+    return image.convert('RGB')
+
+
+def build_variants(field_file, sizes=DEFAULT_SIZES):
+    """
+    Renders and stores the derivatives of `field_file` and returns their
+    description (see the format above). Sizes larger than the original are
+    not upscaled: they share the files of the largest real size.
+    """
+    storage = field_file.storage
+    directory, filename = posixpath.split(field_file.name)
+    stem = posixpath.splitext(filename)[0]
+    image = _open(field_file)
+
+    placeholder = image.copy()
+    placeholder.thumbnail((PLACEHOLDER_SIZE, PLACEHOLDER_SIZE))
+    variants = {
+        'source': field_file.name,
+        'width': image.width,
+        'height': image.height,
+        'placeholder': 'data:image/webp;base64,' + base64.b64encode(
+            _encode(placeholder, 'webp')
+        ).decode('ascii'),
+        'sizes': {},
+    }
+
+    previous = None
+    for name, edge in sizes:
+        resized = image.copy()
+        resized.thumbnail((edge, edge), Image.Resampling.LANCZOS)
+        if previous is not None and previous['width'] == resized.width:
+            variants['sizes'][name] = previous
+            continue
+        entry = {'width': resized.width, 'height': resized.height}
+        for image_format, (_, extension, _) in FORMATS.items():
+            path = posixpath.join(directory, 'variants', f'{stem}_{name}.{extension}')
+            entry[image_format] = storage.save(path, ContentFile(_encode(resized, image_format)))
+        variants['sizes'][name] = entry
+        previous = entry
+    return variants
+
+
+def delete_variants(variants, storage):
+    """
+    Deletes the files of a variants description (e.g. of a replaced upload).
+    """
+    paths = set()
+    for entry in (variants or {}).get('sizes', {}).values():
+        paths.update(entry[image_format] for image_format in FORMATS if entry.get(image_format))
+    for path in paths:
+        storage.delete(path)
+
+
+def variant_urls(variants, request=None):
+    """
+    Returns the API representation of a variants description, with URLs
+    (absolute when a request is given) and `srcset` strings per format,
+    or None when the variants haven't been built yet.
+    """
+    if not variants or not variants.get('sizes'):
+        return None
+
+    def url(path):
+        location = default_storage.url(path)
+        return request.build_absolute_uri(location) if request is not None else location
+
+    sizes = {}
+    srcset = {image_format: [] for image_format in FORMATS}
+    seen = set()
+    for name, entry in variants['sizes'].items():
+        sizes[name] = {
+            'width': entry['width'],
+            'height': entry['height'],
+            **{image_format: url(entry[image_format]) for image_format in FORMATS},
+        }
+        if entry['width'] not in seen:
+            seen.add(entry['width'])
+            for image_format in FORMATS:
+                srcset[image_format].append(f"{sizes[name][image_format]} {entry['width']}w")
+    return {
+        'width': variants['width'],
+        'height': variants['height'],
+        'placeholder': variants['placeholder'],
+        'sizes': sizes,
+        'srcset': {image_format: ', '.join(items) for image_format, items in srcset.items()},
+    }
+
+
+# --- Processing ---
+
+def process_image(model_label, pk, field_name, force=False):
+    """
+    Builds the variants of one stored image and saves their description.
+    Images whose variants are up to date are skipped, unless `force` is set.
+    Safe to run concurrently and repeatedly: the description is only written
+    if the image is still the one the variants were built from.
+    Returns True when new variants were stored.
+    """
+    model = apps.get_model(model_label)
+    spec = get_spec(model, field_name)
+    instance = model._default_manager.filter(pk=pk).first()
+    if instance is None or not getattr(instance, field_name):
+        return False
+    if not force and not needs_variants(instance, field_name):
+        return False
+
+    field_file = getattr(instance, field_name)
+    old_variants = getattr(instance, spec.variants_field)
+    variants = build_variants(field_file, spec.sizes)
+    changes = {spec.variants_field: variants}
+    # update() doesn't apply auto_now, and `updated_at` feeds conditional GETs.
+    for field in model._meta.concrete_fields:
+        if getattr(field, 'auto_now', False):
+            changes[field.name] = timezone.now()
+    updated = model._default_manager.filter(pk=pk, **{field_name: field_file.name}).update(**changes)
+    if not updated:
+        # Replaced or deleted meanwhile; the new upload has its own job.
+        delete_variants(variants, field_file.storage)
+        return False
+
+    delete_variants(old_variants, field_file.storage)
+    setattr(instance, spec.variants_field, variants)
+    variants_ready.send(sender=model, instance=instance, field_name=field_name)
+    return True
+
+
+def _run_job(model_label, pk, field_name):
+    try:
+        process_image(model_label, pk, field_name)
+    except Exception:
+        logger.exception('Building the variants of %s %s (%s) failed.', model_label, pk, field_name)
+    finally:
+        # Worker threads open their own database connections.
+        close_old_connections()
+
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    """
+    The process-wide worker pool building variants off the request path.
+    Its size is settings.IMAGE_VARIANT_WORKERS.
+    """
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.IMAGE_VARIANT_WORKERS,
+                thread_name_prefix='image-variants',
+            )
+    return _executor
+
+
+def schedule_variants(instance, field_name):
+    """
+    Queues the variants of `instance`'s image for the worker pool once the
+    current transaction commits (so the worker sees the saved row).
+    With settings.IMAGE_VARIANTS_ASYNC off, they're built on commit, inline.
+    """
+    if not needs_variants(instance, field_name):
+        return
+    job = (instance._meta.label, instance.pk, field_name)
+    if settings.IMAGE_VARIANTS_ASYNC:
+        transaction.on_commit(lambda: get_executor().submit(_run_job, *job))
+    else:
+        transaction.on_commit(lambda: process_image(*job))
@@ -0,0 +1,123 @@
+# src/core/management/commands/benchmark_serializers.py
+
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.renderers import JSONRenderer
+
+from categories.models import Category
+from categories.serializers import CategorySerializer, serialize_category_tree
+from core.compiled import compile_serializer
+from listings.models import Listing, ListingCard
+from listings.serializers import ListingCardSerializer, ListingSerializer
+from reviews.models import Review
+from reviews.serializers import ReviewSerializer
+
+# (label, serializer class, model, expanded fields) of the list payloads to compare.
+TARGETS = (
+    ('listings', ListingSerializer, Listing, ('owner', 'images')),
+    ('listing cards', ListingCardSerializer, ListingCard, ()),
+    ('reviews', ReviewSerializer, Review, ('author',)),
+)
+
+
+class _BenchmarkView:
+    """
+    Stands in for the API view in the serializer context, so expandable
+    fields are expanded as they are on the real endpoints.
+    """
+
+    def __init__(self, serializer_class):
+        self.serializer_class = serializer_class
+
+    def get_serializer_class(self):
+        return self.serializer_class
+
+
+class Command(BaseCommand):
+    help = 'Compares the compiled read-only serializers with the DRF serializers (rows/second, identical JSON)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--rows',
+            type=int,
+            default=100,
+            help='Number of rows per list (the page size being measured).'
+        )
+        parser.add_argument(
+            '--repeat',
+            type=int,
+            default=20,
+            help='Number of times each list is rendered.'
+        )
+
+    def handle(self, *args, **options):
+        rows, repeat = options['rows'], options['repeat']
+        renderer = JSONRenderer()
+
+        for label, serializer_class, model, expand in TARGETS:
+            context = {
+                'request': None,
+                'view': _BenchmarkView(serializer_class),
+                'fields': None,
+                'expand': expand,
+            }
+            queryset = model.objects.order_by('-created_at', '-pk')
+
+            def render_drf():
+                page = serializer_class.prepare_queryset(queryset, None, expand)[:rows]
+                return serializer_class(page, many=True, context=context).data
+
+            def render_compiled():
+                compiled = compile_serializer(serializer_class(context=context))
+                return compiled.serialize(compiled.project(queryset)[:rows], context)
+
+            self.compare(label, render_drf, render_compiled, repeat, renderer)
+
+        context = {
+            'request': None,
+            'view': _BenchmarkView(CategorySerializer),
+            'fields': None,
+            'expand': (),
+        }
+        roots = Category.objects.filter(parent__isnull=True)
+        self.compare(
+            'category tree',
+            lambda: CategorySerializer(roots, many=True, context=context).data,
+            lambda: serialize_category_tree(CategorySerializer(context=context), roots),
+            repeat,
+            renderer,
+        )
+
+    def compare(self, label, render_drf, render_compiled, repeat, renderer):
+        """
+        Renders the list both ways `repeat` times, checks that the JSON is
+        byte-identical and reports the throughput of each.
+        """
+        expected = renderer.render(render_drf())
+        actual = renderer.render(render_compiled())
+        if expected != actual:
+            raise CommandError(f'{label}: the compiled output differs from the serializer output.')
+
+        count = self.count_items(render_drf())
+        if not count:
+            self.stdout.write(self.style.WARNING(f'{label}: no rows to benchmark.'))
+            return
+
+        timings = {}
+        for name, render in (('serializer', render_drf), ('compiled', render_compiled)):
+            started = time.perf_counter()
+            for _ in range(repeat):
+                renderer.render(render())
+            timings[name] = time.perf_counter() - started
+
+        drf_rate = count * repeat / timings['serializer']
+        compiled_rate = count * repeat / timings['compiled']
+        self.stdout.write(self.style.SUCCESS(
+            f'{label}: {count} rows, serializer {drf_rate:,.0f} rows/s, '
+            f'compiled {compiled_rate:,.0f} rows/s ({compiled_rate / drf_rate:.1f}x), identical JSON'
+        ))
+
+    def count_items(self, data):
+        # Nested children count as rows too (the category tree).
+        return sum(1 + self.count_items(item.get('children') or []) for item in data)
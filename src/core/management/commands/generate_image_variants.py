@@ -0,0 +1,54 @@
+# src/core/management/commands/generate_image_variants.py
+
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from core.images import process_image, registered_specs
+
+
+class Command(BaseCommand):
+    help = 'Builds the missing resized derivatives of every registered image field (backfill)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=4,
+            help='Number of images processed in parallel.'
+        )
+        parser.add_argument(
+            '--force',
+            action='store_true',
+            help='Rebuild the variants of every image, not only the missing ones.'
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write(self.style.SUCCESS('Building image variants...'))
+        built = failed = 0
+
+        for spec in registered_specs():
+            queryset = spec.model._default_manager.exclude(**{spec.field_name: ''}).exclude(
+                **{f'{spec.field_name}__isnull': True}
+            )
+            pks = list(queryset.order_by('pk').values_list('pk', flat=True))
+
+            def run(pk):
+                try:
+                    return process_image(spec.model._meta.label, pk, spec.field_name, force=options['force'])
+                finally:
+                    close_old_connections()
+
+            with ThreadPoolExecutor(max_workers=options['workers']) as executor:
+                futures = [executor.submit(run, pk) for pk in pks]
+                for pk, future in zip(pks, futures):
+                    try:
+                        built += bool(future.result())
+                    except Exception as exc:
+                        failed += 1
+                        self.stderr.write(f'{spec.key} #{pk}: {exc}')
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Variants built: {built}, failures: {failed}'
+        ))
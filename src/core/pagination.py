@@ -0,0 +1,226 @@
+# src/core/pagination.py
+
+from base64 import b64decode, b64encode
+import math
+from datetime import datetime
+
+from django.db.models import F, Q
+from django.db.models.fields.tuple_lookups import Tuple, TupleGreaterThan, TupleLessThan
+from django.utils.translation import gettext_lazy as _
+from rest_framework.exceptions import ValidationError
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+# =================================================================
+#  KEYSET (CURSOR) PAGINATION
+# =================================================================
+
+class KeysetPagination(BasePagination):
+    """
+    Opaque-cursor pagination keyed on (created_at, id), newest first.
+
+    Unlike offset pagination, every page is fetched with a row comparison
+    `(created_at, id) < (cursor_created_at, cursor_id)` followed by a LIMIT,
+    so page N costs the same index range scan as page 1.
+    The querysets paginated with this class should be backed by a composite
+    index on ('-created_at', '-<pk>') (see the Meta.indexes of ListingCard and Review).
+
+    Subclasses can page on other keys by overriding `key_fields`,
+    `descending` and the `parse_key` / `format_key` cursor codec of the
+    first key (see DistancePagination).
+    """
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    cursor_query_param = 'cursor'
+    invalid_cursor_message = _('Invalid cursor')
+    # Cursor pks must fit the bigint primary keys.
+    max_pk = 2 ** 63 - 1
+
+    # The keyset columns, in descending order of significance. 'pk' rather
+    # than 'id' so models with a non-'id' primary key work as well.
+    key_fields = ('created_at', 'pk')
+    # Whether the feed walks the keys from the highest down.
+    descending = True
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+        position, self.reverse = self.decode_cursor(request)
+
+        # Walking backwards takes the rows just *before* the cursor in the
+        # opposite order, then flips them back.
+        if self.descending != self.reverse:
+            ordering = tuple(f'-{name}' for name in self.key_fields)
+            if position is not None:
+                queryset = queryset.filter(self.get_position_filter(position, before=True))
+        else:
+            ordering = self.key_fields
+            if position is not None:
+                queryset = queryset.filter(self.get_position_filter(position, before=False))
+
+        # Fetch one extra row to find out whether there is another page.
+        results = list(queryset.order_by(*ordering)[:self.page_size + 1])
+        has_more = len(results) > self.page_size
+        self.page = results[:self.page_size]
+        if self.reverse:
+            self.page.reverse()
+            self.has_next = position is not None
+            self.has_previous = has_more
+        else:
+            self.has_next = has_more
+            self.has_previous = position is not None
+        return self.page
+
+    def get_position_filter(self, position, before):
+        """
+        The condition selecting the rows before (or after) `position`, in
+        ascending key order.
+        """
+        keys = Tuple(*(F(name) for name in self.key_fields))
+        return (TupleLessThan if before else TupleGreaterThan)(keys, position)
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        if size <= 0:
+            return self.page_size
+        return min(size, self.max_page_size)
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous or not self.page:
+            return None
+        return self.encode_cursor(self.page[0], reverse=True)
+
+    # --- Cursor encoding ---
+
+    def decode_cursor(self, request):
+        """
+        Returns a `(position, reverse)` pair from the cursor query parameter.
+        `position` is None when no cursor was supplied (the first page).
+        A cursor that doesn't decode to a valid position is a 400.
+        """
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None, False
+        try:
+            raw = b64decode(encoded.encode('ascii'), altchars=b'-_').decode('ascii')
+            direction, key, pk = raw.split('|')
+            position = (self.parse_key(key), int(pk))
+            if direction not in ('f', 'r') or not 0 < position[1] <= self.max_pk:
+                raise ValueError(raw)
+        except (TypeError, ValueError, UnicodeError, OverflowError):
+            raise ValidationError({self.cursor_query_param: [self.invalid_cursor_message]})
+        return position, direction == 'r'
+
+    def encode_cursor(self, instance, reverse):
+        # Pages are model instances, or values() rows for compiled serializers.
+        if isinstance(instance, dict):
+            key, pk = (instance[name] for name in self.key_fields)
+        else:
+            key, pk = (getattr(instance, name) for name in self.key_fields)
+        raw = '|'.join(('r' if reverse else 'f', self.format_key(key), str(pk)))
+        encoded = b64encode(raw.encode('ascii'), altchars=b'-_').decode('ascii')
+        return replace_query_param(self.base_url, self.cursor_query_param, encoded)
+
+    def parse_key(self, raw):
+        return datetime.fromisoformat(raw)
+
+    def format_key(self, value):
+        return value.isoformat()
+
+    # --- Response ---
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+    def get_schema_operation_parameters(self, view):
+        return [
+            {
+                'name': self.cursor_query_param,
+                'required': False,
+                'in': 'query',
+                'description': 'The pagination cursor value.',
+                'schema': {'type': 'string'},
+            },
+            {
+                'name': self.page_size_query_param,
+                'required': False,
+                'in': 'query',
+                'description': 'Number of results to return per page.',
+                'schema': {'type': 'integer'},
+            },
+        ]
+
+
+class DistancePagination(KeysetPagination):
+    """
+    Keyset pagination keyed on (distance, id), nearest first, for querysets
+    annotated with a `distance` whose ordering a KNN (`<->`) index scan
+    serves (see ListingListCreateView).
+
+    Pages only go forward: a "previous" page would be ordered by
+    `-distance`, which the KNN scan can't serve, so it would sort every
+    matching row. There are no previous links and reverse cursors are a 400.
+
+    Later pages are bounded by `distance >= last distance` (the tie-breaker
+    on id only applies to rows at exactly that distance). A KNN scan can't
+    start mid-way, though: the bound is checked as the scan walks out from
+    the point, so page N still visits the index entries of the rows before
+    the cursor. They are not sorted and their rows are not returned, but
+    deep pages cost O(rows before the cursor). Clients paging far should
+    pass `radius`, whose ST_DWithin is an index condition that bounds the
+    scan.
+    """
+    key_fields = ('distance', 'pk')
+    descending = False
+
+    def decode_cursor(self, request):
+        position, reverse = super().decode_cursor(request)
+        if reverse:
+            raise ValidationError({self.cursor_query_param: [self.invalid_cursor_message]})
+        return position, reverse
+
+    def get_previous_link(self):
+        return None
+
+    def get_position_filter(self, position, before):
+        # Only called going forward: reverse cursors are rejected.
+        distance, pk = position
+        # `distance >= last` on its own, so it is checked before the
+        # tie-breaker, which only matters for rows at the same distance.
+        return Q(distance__gte=distance) & (Q(distance__gt=distance) | Q(pk__gt=pk))
+
+    def parse_key(self, raw):
+        value = float(raw)
+        if not math.isfinite(value):
+            raise ValueError(raw)
+        return value
+
+    def format_key(self, value):
+        # repr() round-trips a float exactly.
+        return repr(value)
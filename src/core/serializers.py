@@ -0,0 +1,110 @@
+# src/core/serializers.py
+
+from django.contrib.gis.geos import Point
+from django.utils.translation import gettext_lazy as _
+from rest_framework import serializers
+
+# =================================================================
+#  SPARSE FIELDSETS AND OPT-IN EXPANSION
+# =================================================================
+
+class DynamicFieldsMixin:
+    """
+    ModelSerializer mixin adding sparse fieldsets (`?fields=id,title`) and
+    opt-in expansion of nested relations (`?expand=owner,images`).
+
+    Serializers declare, in their Meta:
+    - `expandable_fields`: `{name: (serializer_class, kwargs)}` for nested
+      relations that are only rendered when expanded. Their names are listed
+      in `Meta.fields` as usual, which sets their position in the output.
+    - `select_related_fields` / `prefetch_related_fields`: `{name: lookup}`,
+      the relations each field needs, so `prepare_queryset()` only joins or
+      prefetches what the response will actually contain.
+
+    The requested fields and expansions are read from the serializer context
+    (see `core.views.SparseFieldsetsMixin`) and only apply to the view's own
+    serializer class, never to serializers nested inside it.
+    """
+
+    @classmethod
+    def resolve_field_names(cls, fields=None, expand=()):
+        """
+        Returns the names of the fields that will be rendered.
+        A field listed in `fields` that is expandable is expanded implicitly.
+        """
+        expandable = getattr(cls.Meta, 'expandable_fields', {})
+        expanded = set(expand) | (set(fields or ()) & set(expandable))
+        names = [
+            name for name in cls.Meta.fields
+            if name not in expandable or name in expanded
+        ]
+        if fields is not None:
+            names = [name for name in names if name in fields]
+        return names
+
+    @classmethod
+    def prepare_queryset(cls, queryset, fields=None, expand=()):
+        """
+        Adds the select_related/prefetch_related calls needed by the fields
+        that will be rendered, and nothing else.
+        """
+        names = cls.resolve_field_names(fields, expand)
+        select_related = getattr(cls.Meta, 'select_related_fields', {})
+        prefetch_related = getattr(cls.Meta, 'prefetch_related_fields', {})
+        selects = [select_related[name] for name in names if name in select_related]
+        prefetches = [prefetch_related[name] for name in names if name in prefetch_related]
+        if selects:
+            queryset = queryset.select_related(*selects)
+        if prefetches:
+            queryset = queryset.prefetch_related(*prefetches)
+        return queryset
+
+    def _requested(self):
+        view = self.context.get('view')
+        if view is None or 'expand' not in self.context:
+            return None, ()
+        if not isinstance(self, view.get_serializer_class()):
+            return None, ()
+        return self.context.get('fields'), self.context['expand']
+
+    def get_field_names(self, declared_fields, info):
+        # Expandable fields aren't model fields: they're added in get_fields().
+        expandable = getattr(self.Meta, 'expandable_fields', {})
+        return [
+            name for name in super().get_field_names(declared_fields, info)
+            if name not in expandable
+        ]
+
+    def get_fields(self):
+        fields = super().get_fields()
+        requested, expand = self._requested()
+        names = self.resolve_field_names(requested, expand)
+        for name, (serializer_class, kwargs) in getattr(self.Meta, 'expandable_fields', {}).items():
+            if name in names:
+                fields[name] = serializer_class(**kwargs)
+        return {name: fields[name] for name in names if name in fields}
+
+
+# =================================================================
+#  GEOGRAPHIC POINTS
+# =================================================================
+
+class LatLngField(serializers.Field):
+    """
+    A WGS84 PointField as `{"lat": ..., "lng": ...}` (None when unset).
+    """
+    default_error_messages = {
+        'invalid': _('Expected an object with "lat" and "lng" in degrees.'),
+    }
+
+    def to_representation(self, value):
+        return {'lat': value.y, 'lng': value.x}
+
+    def to_internal_value(self, data):
+        try:
+            lat, lng = float(data['lat']), float(data['lng'])
+        except (TypeError, KeyError, ValueError):
+            self.fail('invalid')
+        if not (-90 <= lat <= 90 and -180 <= lng <= 180):
+            self.fail('invalid')
+        return Point(lng, lat, srid=4326)
@@ -1,3 +1,69 @@
-from django.test import TestCase
+from unittest import mock
 
-# Create your tests here.
+from django.test import SimpleTestCase, override_settings
+from rest_framework import serializers
+
+from reviews.models import Review
+from . import compiled
+from .checks import check_shared_cache
+from .compiled import compile_serializer
+
+
+class ReviewFieldsSerializer(serializers.ModelSerializer):
+    """
+    Renders the fields it is given, like `?fields=` does.
+    """
+
+    class Meta:
+        model = Review
+        fields = ('id', 'rating', 'text', 'created_at')
+
+    def __init__(self, *args, fields=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        for name in set(self.fields) - set(fields or self.fields):
+            self.fields.pop(name)
+
+
+class CompiledSerializerCacheTests(SimpleTestCase):
+
+    def setUp(self):
+        patcher = mock.patch.object(compiled, '_compiled', compiled.OrderedDict())
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_entries_are_reused(self):
+        first = compile_serializer(ReviewFieldsSerializer(fields=['id', 'rating']))
+        self.assertIs(compile_serializer(ReviewFieldsSerializer(fields=['id', 'rating'])), first)
+        self.assertIsNot(compile_serializer(ReviewFieldsSerializer(fields=['id'])), first)
+
+    def test_the_least_recently_used_entries_are_evicted(self):
+        combinations = [['id'], ['rating'], ['text'], ['id', 'rating']]
+        with mock.patch.object(compiled, 'MAX_COMPILED', 2):
+            first = compile_serializer(ReviewFieldsSerializer(fields=combinations[0]))
+            compile_serializer(ReviewFieldsSerializer(fields=combinations[1]))
+            # Used again: the second combination is now the oldest.
+            compile_serializer(ReviewFieldsSerializer(fields=combinations[0]))
+            compile_serializer(ReviewFieldsSerializer(fields=combinations[2]))
+            self.assertEqual(len(compiled._compiled), 2)
+            self.assertIs(compile_serializer(ReviewFieldsSerializer(fields=combinations[0])), first)
+
+            compile_serializer(ReviewFieldsSerializer(fields=combinations[3]))
+            compile_serializer(ReviewFieldsSerializer(fields=combinations[2]))
+            self.assertIsNot(compile_serializer(ReviewFieldsSerializer(fields=combinations[0])), first)
+
+
+LOCAL_CACHE = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+SHARED_CACHE = {'default': {'BACKEND': 'django.core.cache.backends.redis.RedisCache', 'LOCATION': 'redis://redis'}}
+
+
+class SharedCacheCheckTests(SimpleTestCase):
+
+    @override_settings(ALLOW_LOCAL_CACHE=False, CACHES=LOCAL_CACHE)
+    def test_a_local_cache_is_an_error(self):
+        self.assertEqual([error.id for error in check_shared_cache(None)], ['core.E001'])
+
+    def test_a_shared_or_allowed_cache_passes(self):
+        for allow_local_cache, caches in ((False, SHARED_CACHE), (True, LOCAL_CACHE)):
+            with self.subTest(allow_local_cache=allow_local_cache), \
+                    override_settings(ALLOW_LOCAL_CACHE=allow_local_cache, CACHES=caches):
+                self.assertEqual(check_shared_cache(None), [])
@@ -0,0 +1,109 @@
+# src/core/tiles.py
+
+import math
+
+# =================================================================
+#  WEB MERCATOR TILES
+# =================================================================
+# The XYZ tile scheme of web maps: at zoom z the world (EPSG:3857, square
+# between +/-ORIGIN_SHIFT metres) is split into 2^z x 2^z tiles, x growing
+# eastwards and y southwards from the top-left corner.
+
+MAX_ZOOM = 22
+
+# Half the width of the world in EPSG:3857 metres.
+ORIGIN_SHIFT = 20037508.342789244
+
+# Latitudes beyond this have no Web Mercator projection.
+MAX_LATITUDE = 85.0511287798066
+
+
+def tile_size(zoom):
+    """
+    The width of a tile at `zoom`, in EPSG:3857 metres.
+    """
+    return 2 * ORIGIN_SHIFT / (1 << zoom)
+
+
+def lnglat_to_tile(lng, lat, zoom):
+    """
+    Returns the `(x, y)` of the tile containing a WGS84 point.
+    """
+    lat = max(-MAX_LATITUDE, min(MAX_LATITUDE, lat))
+    n = 1 << zoom
+    x = int((lng + 180.0) / 360.0 * n)
+    y = int((1.0 - math.asinh(math.tan(math.radians(lat))) / math.pi) / 2.0 * n)
+    return min(max(x, 0), n - 1), min(max(y, 0), n - 1)
+
+
+def tiles_touching(lng, lat, zoom, buffer=0.0):
+    """
+    Returns the `(x, y)` of every tile at `zoom` whose extent, grown by
+    `buffer` (a fraction of the tile width) on every side, contains a WGS84
+    point: the tiles whose rendering can include it.
+    """
+    lat = max(-MAX_LATITUDE, min(MAX_LATITUDE, lat))
+    n = 1 << zoom
+    fx = (lng + 180.0) / 360.0 * n
+    fy = (1.0 - math.asinh(math.tan(math.radians(lat))) / math.pi) / 2.0 * n
+    xs = range(max(int(fx - buffer), 0), min(int(fx + buffer), n - 1) + 1)
+    ys = range(max(int(fy - buffer), 0), min(int(fy + buffer), n - 1) + 1)
+    return [(x, y) for x in xs for y in ys]
+
+
+def tile_bounds(zoom, x, y):
+    """
+    Returns the `(west, south, east, north)` of a tile in WGS84 degrees.
+    """
+    n = 1 << zoom
+
+    def latitude(row):
+        return math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * row / n))))
+
+    return x / n * 360.0 - 180.0, latitude(y + 1), (x + 1) / n * 360.0 - 180.0, latitude(y)
+
+
+def tile_mercator_bounds(zoom, x, y):
+    """
+    Returns the `(xmin, ymin, xmax, ymax)` of a tile in EPSG:3857 metres.
+    """
+    size = tile_size(zoom)
+    return (
+        -ORIGIN_SHIFT + x * size, ORIGIN_SHIFT - (y + 1) * size,
+        -ORIGIN_SHIFT + (x + 1) * size, ORIGIN_SHIFT - y * size,
+    )
+
+
+def tiles_in_bbox(west, south, east, north, zoom):
+    """
+    Returns the `(x, y)` of every tile intersecting a WGS84 bounding box.
+    """
+    min_x, max_y = lnglat_to_tile(west, south, zoom)
+    max_x, min_y = lnglat_to_tile(east, north, zoom)
+    return [(x, y) for x in range(min_x, max_x + 1) for y in range(min_y, max_y + 1)]
+
+
+def parse_bbox(raw):
+    """
+    Parses 'west,south,east,north' (WGS84 degrees). Raises ValueError.
+    """
+    try:
+        west, south, east, north = (float(part) for part in raw.split(','))
+    except (AttributeError, ValueError):
+        raise ValueError('Expected "west,south,east,north" in degrees.')
+    if not (-180 <= west < east <= 180 and -90 <= south < north <= 90):
+        raise ValueError('Invalid bounding box.')
+    return west, south, east, north
+
+
+def parse_lat_lng(raw):
+    """
+    Parses 'lat,lng' (WGS84 degrees). Returns `(lat, lng)`; raises ValueError.
+    """
+    try:
+        lat, lng = (float(part) for part in raw.split(','))
+    except (AttributeError, ValueError):
+        raise ValueError('Expected "lat,lng" in degrees.')
+    if not (-90 <= lat <= 90 and -180 <= lng <= 180):
+        raise ValueError('Coordinates out of range.')
+    return lat, lng
@@ -1,3 +1,80 @@
-from django.shortcuts import render
+# src/core/views.py
 
-# Create your views here.
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.response import Response
+
+from .compiled import CompileError, compile_serializer
+
+# =================================================================
+#  VIEW MIXINS
+# =================================================================
+
+class SparseFieldsetsMixin:
+    """
+    Generic view mixin for serializers using `core.serializers.DynamicFieldsMixin`.
+
+    Parses `?fields=a,b` and `?expand=x,y` on safe requests, passes them to
+    the serializer through its context and trims the queryset's
+    select_related/prefetch_related to what will be rendered.
+    `default_expand` is used when the request has no `expand` parameter;
+    an empty `?expand=` turns every expansion off.
+    """
+    fields_query_param = 'fields'
+    expand_query_param = 'expand'
+    default_expand = ()
+
+    def _split_param(self, name):
+        value = self.request.query_params.get(name)
+        if value is None:
+            return None
+        return [part.strip() for part in value.split(',') if part.strip()]
+
+    def get_requested_fields(self):
+        if self.request.method not in SAFE_METHODS:
+            return None
+        return self._split_param(self.fields_query_param)
+
+    def get_requested_expand(self):
+        expand = None
+        if self.request.method in SAFE_METHODS:
+            expand = self._split_param(self.expand_query_param)
+        return tuple(self.default_expand) if expand is None else tuple(expand)
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context['fields'] = self.get_requested_fields()
+        context['expand'] = self.get_requested_expand()
+        return context
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        serializer_class = self.get_serializer_class()
+        if hasattr(serializer_class, 'prepare_queryset'):
+            queryset = serializer_class.prepare_queryset(
+                queryset, self.get_requested_fields(), self.get_requested_expand()
+            )
+        return queryset
+
+
+class CompiledListMixin:
+    """
+    ListAPIView mixin rendering GET lists through `core.compiled`: the
+    page is fetched as `values()` rows and rendered by the compiled form of
+    the view's serializer, with no model instances. Falls back to the regular
+    serializer when it can't be compiled.
+    """
+
+    def list(self, request, *args, **kwargs):
+        try:
+            compiled = compile_serializer(self.get_serializer())
+        except CompileError:
+            return super().list(request, *args, **kwargs)
+
+        queryset = self.filter_queryset(self.get_queryset())
+        # The paginator reads its cursor from the rows, so project its keys too.
+        rows = compiled.project(queryset, extra=getattr(self.paginator, 'key_fields', ()))
+        page = self.paginate_queryset(rows)
+        data = compiled.serialize(rows if page is None else page, self.get_serializer_context())
+        if page is not None:
+            return self.get_paginated_response(data)
+        return Response(data)
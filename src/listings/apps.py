@@ -4,3 +4,10 @@ from django.apps import AppConfig
 class ListingsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'listings'
+
+    def ready(self):
+        # Connect the signal handlers that keep the listing cards in sync.
+        from . import signals  # noqa: F401
+        from core.images import register_image_field
+        from .models import ListingImage
+        register_image_field(ListingImage, 'image', 'variants')
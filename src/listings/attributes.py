@@ -0,0 +1,121 @@
+# src/listings/attributes.py
+
+from functools import reduce
+from operator import or_
+
+from django.db.models import Q
+
+from categories.models import Field
+from categories.schema import resolve_schema
+from core.cache import get_namespace_versions
+from .models import ListingFieldValue
+
+# =================================================================
+#  DYNAMIC ATTRIBUTE VALIDATION
+# =================================================================
+# Listings carry the values of their category's dynamic fields (own and
+# inherited, see categories/schema.py) as `attributes`, keyed by `Field.key`:
+# {"bedrooms": 3, "furnished": true}. Each category's schema is compiled
+# once into an AttributeValidator (a key -> definition map plus the set of
+# required keys), cached per process until the 'categories' namespace
+# version changes, so validating a listing is one in-memory pass.
+
+MAX_VALUE_LENGTH = ListingFieldValue._meta.get_field('value').max_length
+
+
+class AttributeValidator:
+    """
+    The compiled attribute checks of one category.
+    """
+
+    def __init__(self, schema):
+        # key -> (category_field_id, field_type)
+        self.fields = {field['key']: (field['id'], field['field_type']) for field in schema}
+        self.required = frozenset(field['key'] for field in schema if field['is_required'])
+        self.category_field_ids = frozenset(field['id'] for field in schema)
+
+    def validate(self, attributes, partial=False):
+        """
+        Checks `attributes` and returns `(values, errors)`: the valid values
+        as `(category_field_id, field_type, raw_value)` triples, and
+        `{key: [message]}`. With `partial`, missing required keys are allowed
+        (an update keeps the stored values).
+        """
+        errors = {}
+        values = []
+        for key, raw in attributes.items():
+            definition = self.fields.get(key)
+            if definition is None:
+                errors[key] = ['Unknown attribute for this category.']
+                continue
+            category_field_id, field_type = definition
+            raw = str(raw).strip()
+            if len(raw) > MAX_VALUE_LENGTH:
+                errors[key] = ['This value is too long.']
+                continue
+            try:
+                Field.coerce_value(field_type, raw)
+            except ValueError as exc:
+                errors[key] = [str(exc)]
+                continue
+            values.append((category_field_id, field_type, raw))
+        if not partial:
+            for key in self.required.difference(attributes):
+                errors[key] = ['This attribute is required.']
+        return values, errors
+
+
+_validators = {}
+
+
+def get_attribute_validator(category):
+    """
+    Returns the AttributeValidator of `category`, compiled on first use and
+    again after any category, field or link change. Costs one cache round
+    trip when compiled, plus one query when not.
+    """
+    version = get_namespace_versions(['categories'])['categories']
+    cached = _validators.get(category.pk)
+    if cached is None or cached[0] != version:
+        cached = (version, AttributeValidator(resolve_schema(category)))
+        _validators[category.pk] = cached
+    return cached[1]
+
+
+def build_field_values(listing, values):
+    """
+    Yields the unsaved ListingFieldValues of validated `values`.
+    """
+    for category_field_id, field_type, raw in values:
+        value = ListingFieldValue(listing=listing, field_id=category_field_id, value=raw)
+        value.set_typed_value(field_type)
+        yield value
+
+
+def save_field_values(values, batch_size=None):
+    """
+    Writes ListingFieldValues with a single (upserting) bulk_create.
+    """
+    if values:
+        ListingFieldValue.objects.bulk_create(
+            values,
+            update_conflicts=True,
+            unique_fields=['listing', 'field'],
+            update_fields=['value', 'value_number', 'value_boolean'],
+            batch_size=batch_size,
+        )
+
+
+def delete_stale_field_values(listings):
+    """
+    Deletes the values of fields outside the schema of their listing's
+    category, for `(listing_id, validator)` pairs of listings that changed
+    category, with a single DELETE. Otherwise the attribute filters and
+    facets would still match them on their old category's values.
+    """
+    conditions = [
+        Q(listing_id=listing_id) & ~Q(field_id__in=validator.category_field_ids)
+        for listing_id, validator in listings
+    ]
+    if conditions:
+        ListingFieldValue.objects.filter(reduce(or_, conditions)).delete()
@@ -0,0 +1,210 @@
+# src/listings/batch.py
+
+from collections import defaultdict
+
+from django.db import transaction
+from django.utils import timezone
+from modeltranslation.translator import translator
+from modeltranslation.utils import build_localized_fieldname, get_language
+
+from categories.counts import apply_count_deltas, counted_category
+from categories.models import Category
+from core.cache import bump_namespace_on_commit
+from locations.geocoder import nearest_city_ids
+from locations.models import City
+from places.vector_tiles import invalidate_cities_on_commit, invalidate_points_on_commit
+from search.percolator import enqueue_listings_on_commit
+from .attributes import build_field_values, delete_stale_field_values, get_attribute_validator, save_field_values
+from .cards import refresh_listing_cards
+from .models import Listing
+from .serializers import NEAREST_CITY_MAX_DISTANCE, ListingBatchItemSerializer
+
+# =================================================================
+#  BATCH LISTING CREATE / UPDATE
+# =================================================================
+# A batch is validated item by item against lookups prefetched once for
+# the whole batch, then every valid item is written in one transaction
+# with bulk_create/bulk_update. Bulk writes don't send post_save, so the
+# listing cards and the response cache are refreshed, and the listings
+# queued for saved-search percolation, here explicitly; the category
+# listing counts are adjusted in the same transaction.
+
+MAX_BATCH_SIZE = 1000
+
+# Rows per INSERT/UPDATE statement.
+WRITE_BATCH_SIZE = 500
+
+
+def _as_int(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _is_slug(value):
+    return isinstance(value, str) and bool(value)
+
+
+def build_context(user, items):
+    """
+    Prefetches everything the items refer to, with one query per table:
+    the user's listings being updated, the categories and the cities, and
+    the compiled attribute validator of every category involved.
+    """
+    slugs = {item['slug'] for item in items if _is_slug(item.get('slug'))}
+    existing = {
+        listing.slug: listing
+        for listing in Listing.objects.filter(author=user, slug__in=slugs)
+    } if slugs else {}
+
+    category_ids = {_as_int(item.get('category')) for item in items} - {None}
+    city_ids = {_as_int(item.get('city')) for item in items} - {None}
+    categories = Category.objects.in_bulk(
+        category_ids | {listing.category_id for listing in existing.values()}
+    )
+    cities = City.objects.in_bulk(city_ids)
+
+    return existing, {
+        'categories': {pk: category for pk, category in categories.items() if pk in category_ids},
+        'cities': cities,
+        'attribute_validators': {
+            pk: get_attribute_validator(category) for pk, category in categories.items()
+        },
+    }
+
+
+def _update_fields(names):
+    """
+    Maps serializer field names to the columns bulk_update must write:
+    translated fields are assigned to the active language's column as well.
+    """
+    translated = translator.get_options_for_model(Listing).fields
+    columns = []
+    for name in names:
+        columns.append(name)
+        if name in translated:
+            columns.append(build_localized_fieldname(name, get_language()))
+    return columns
+
+
+def save_listing_batch(user, items, context=None):
+    """
+    Creates or updates the listings described by `items` (dicts, as parsed
+    from the request body) on behalf of `user`.
+
+    Invalid items are reported and skipped; the valid ones are written in
+    a single transaction. Returns one result per item, in input order:
+    `{'index', 'status': 'created' | 'updated' | 'invalid', 'slug', 'errors'}`.
+    """
+    items = [item if isinstance(item, dict) else {} for item in items]
+    existing, lookups = build_context(user, items)
+    context = {**(context or {}), **lookups}
+
+    results = []
+    creates = []
+    updates = []
+    # (listing_id, validator) of the listings moved to another category.
+    moved = []
+    seen_slugs = set()
+    # Map tiles to invalidate: around where the listings are drawn (their
+    # location, else their city's) before and after the batch.
+    places = [(listing.city_id, listing.location) for listing in existing.values()]
+    for index, item in enumerate(items):
+        result = {'index': index, 'status': 'invalid', 'slug': item.get('slug'), 'errors': None}
+        results.append(result)
+
+        instance = None
+        if _is_slug(item.get('slug')):
+            instance = existing.get(item['slug'])
+            if instance is None:
+                result['errors'] = {'slug': ['You have no listing with this slug.']}
+                continue
+            if item['slug'] in seen_slugs:
+                result['errors'] = {'slug': ['This listing is already updated by another item of the batch.']}
+                continue
+            seen_slugs.add(item['slug'])
+        serializer = ListingBatchItemSerializer(
+            instance, data=item, partial=instance is not None, context=context,
+        )
+        if not serializer.is_valid():
+            result['errors'] = serializer.errors
+            continue
+
+        data = dict(serializer.validated_data)
+        attributes = data.pop('attributes', [])
+        data.pop('slug', None)
+        if instance is None:
+            # public_id is generated by the constructor, so the slug can be
+            # built without a save().
+            listing = Listing(author=user, **data)
+            listing.slug = listing.generate_slug()
+            creates.append((result, listing, attributes))
+        else:
+            counted = counted_category(instance)
+            previous_category_id = instance.category_id
+            for name, value in data.items():
+                setattr(instance, name, value)
+            if instance.category_id != previous_category_id:
+                moved.append((instance.pk, context['attribute_validators'][instance.category_id]))
+            updates.append((result, instance, list(data), attributes, counted))
+
+    # New listings with a location but no city get the nearest one, all
+    # looked up at once in the in-process geocoder.
+    unplaced = [listing for _, listing, _ in creates if listing.city_id is None and listing.location is not None]
+    if unplaced:
+        city_ids = nearest_city_ids(
+            [(listing.location.y, listing.location.x) for listing in unplaced], NEAREST_CITY_MAX_DISTANCE,
+        )
+        for listing, city_id in zip(unplaced, city_ids):
+            listing.city_id = city_id
+
+    now = timezone.now()
+    with transaction.atomic():
+        if creates:
+            Listing.objects.bulk_create(
+                [listing for _, listing, _ in creates], batch_size=WRITE_BATCH_SIZE,
+            )
+        if updates:
+            for _, listing, _, _, _ in updates:
+                # bulk_update() doesn't apply auto_now.
+                listing.updated_at = now
+            fields = {'updated_at'}
+            for _, _, names, _, _ in updates:
+                fields.update(_update_fields(names))
+            Listing.objects.bulk_update(
+                [listing for _, listing, _, _, _ in updates], sorted(fields), batch_size=WRITE_BATCH_SIZE,
+            )
+
+        delete_stale_field_values(moved)
+        values = []
+        for _, listing, attributes in creates:
+            values.extend(build_field_values(listing, attributes))
+        for _, listing, _, attributes, _ in updates:
+            values.extend(build_field_values(listing, attributes))
+        save_field_values(values, batch_size=WRITE_BATCH_SIZE)
+
+        count_deltas = defaultdict(int)
+        for _, listing, _ in creates:
+            count_deltas[counted_category(listing)] += 1
+        for _, listing, _, _, counted in updates:
+            count_deltas[counted] -= 1
+            count_deltas[counted_category(listing)] += 1
+        apply_count_deltas(count_deltas)
+
+        listing_ids = [listing.pk for _, listing, _ in creates]
+        listing_ids += [listing.pk for _, listing, _, _, _ in updates]
+        if listing_ids:
+            transaction.on_commit(lambda: refresh_listing_cards(listing_ids))
+            bump_namespace_on_commit('listings')
+            enqueue_listings_on_commit(listing_ids)
+            places += [(listing.city_id, listing.location) for _, listing, _ in creates]
+            places += [(listing.city_id, listing.location) for _, listing, _, _, _ in updates]
+            invalidate_cities_on_commit({city_id for city_id, _ in places})
+            invalidate_points_on_commit('listings', [location for _, location in places])
+
+    for result, listing, _ in creates:
+        result.update(status='created', slug=listing.slug)
+    for result, listing, _, _, _ in updates:
+        result.update(status='updated', slug=listing.slug)
+    return results
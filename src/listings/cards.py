@@ -0,0 +1,170 @@
+# src/listings/cards.py
+
+from django.db.models import Avg, Count, JSONField, OuterRef, Subquery
+from django.utils import timezone
+
+from categories.models import Category
+from locations.models import City
+from reviews.models import Review
+from .models import Listing, ListingCard, ListingImage
+
+# =================================================================
+#  LISTING CARD MAINTENANCE
+# =================================================================
+
+# ListingCard columns rewritten on every refresh (everything but the key).
+CARD_FIELDS = [
+    field.name for field in ListingCard._meta.concrete_fields if not field.primary_key
+]
+
+
+def category_paths(category_ids):
+    """
+    Returns `{category_id: (path_en, path_es)}`, where each path is the list
+    of category names from the root down to the category itself.
+    Built from a single query over the (small) category table.
+    """
+    rows = {
+        row['id']: row
+        for row in Category.objects.values('id', 'parent_id', 'name_en', 'name_es')
+    }
+    paths = {}
+    for category_id in category_ids:
+        path_en, path_es = [], []
+        node = rows.get(category_id)
+        while node is not None:
+            path_en.append(node['name_en'])
+            path_es.append(node['name_es'] or node['name_en'])
+            node = rows.get(node['parent_id'])
+        paths[category_id] = (path_en[::-1], path_es[::-1])
+    return paths
+
+
+def refresh_listing_cards(listing_ids):
+    """
+    Rebuilds the cards of the given listings from the source tables and
+    upserts them in one statement. Listings that no longer exist are skipped
+    (their cards are removed by the ON DELETE CASCADE).
+    """
+    listing_ids = list(listing_ids)
+    if not listing_ids:
+        return 0
+
+    reviews = Review.objects.filter(listing=OuterRef('pk')).order_by().values('listing')
+    cover = ListingImage.objects.filter(listing=OuterRef('pk')).order_by('order', 'pk')
+    rows = Listing.objects.filter(pk__in=listing_ids).values(
+        'pk', 'slug', 'title_en', 'title_es', 'category_id', 'author_id', 'city_id',
+        'price', 'currency', 'sale_type', 'condition', 'is_active', 'is_sold', 'created_at',
+        'location', 'city__name', 'city__location', 'author__public_id', 'author__username', 'author__avatar',
+        'author__avatar_variants',
+    ).annotate(
+        rating_average=Subquery(reviews.annotate(value=Avg('rating')).values('value')),
+        rating_count=Subquery(reviews.annotate(value=Count('pk')).values('value')),
+        cover_image=Subquery(cover.values('image')[:1]),
+        cover_image_variants=Subquery(cover.values('variants')[:1], output_field=JSONField()),
+    )
+    rows = list(rows)
+    paths = category_paths({row['category_id'] for row in rows})
+
+    cards = []
+    for row in rows:
+        path_en, path_es = paths.get(row['category_id'], ([], []))
+        cards.append(ListingCard(
+            listing_id=row['pk'],
+            slug=row['slug'],
+            title_en=row['title_en'] or '',
+            title_es=row['title_es'] or '',
+            category_id=row['category_id'],
+            author_id=row['author_id'],
+            city_id=row['city_id'],
+            price=row['price'],
+            currency=row['currency'],
+            sale_type=row['sale_type'],
+            condition=row['condition'],
+            is_active=row['is_active'],
+            is_sold=row['is_sold'],
+            created_at=row['created_at'],
+            category_path_en=path_en,
+            category_path_es=path_es,
+            city_name=row['city__name'] or '',
+            location=row['location'] or row['city__location'],
+            seller_public_id=row['author__public_id'],
+            seller_username=row['author__username'],
+            seller_avatar=row['author__avatar'] or '',
+            seller_avatar_variants=row['author__avatar_variants'] or {},
+            cover_image=row['cover_image'] or '',
+            cover_image_variants=row['cover_image_variants'] or {},
+            rating_average=row['rating_average'],
+            rating_count=row['rating_count'] or 0,
+        ))
+    ListingCard.objects.bulk_create(
+        cards,
+        update_conflicts=True,
+        unique_fields=['listing'],
+        update_fields=CARD_FIELDS,
+    )
+    return len(cards)
+
+
+def refresh_seller(user):
+    """
+    Rewrites the seller summary on every card of `user` with one UPDATE.
+    """
+    return ListingCard.objects.filter(author=user).update(
+        seller_username=user.username,
+        seller_avatar=user.avatar.name if user.avatar else '',
+        seller_avatar_variants=user.avatar_variants or {},
+        updated_at=timezone.now(),
+    )
+
+
+def refresh_category_paths(category):
+    """
+    Rewrites the category path of every card in `category`'s subtree,
+    after a rename or an MPTT move. One UPDATE per category in the subtree.
+    """
+    return refresh_category_paths_of(
+        category.get_descendants(include_self=True).values_list('pk', flat=True)
+    )
+
+
+def refresh_category_paths_of(category_ids):
+    """
+    Rewrites the category path of every card in the given categories.
+    One UPDATE per category.
+    """
+    paths = category_paths(category_ids)
+    updated = 0
+    for category_id, (path_en, path_es) in paths.items():
+        updated += ListingCard.objects.filter(category_id=category_id).update(
+            category_path_en=path_en,
+            category_path_es=path_es,
+            updated_at=timezone.now(),
+        )
+    return updated
+
+
+def refresh_city(city):
+    """
+    Rewrites the city name on every card in `city`, and the location of
+    those placed at the city, with two UPDATEs.
+    """
+    updated = ListingCard.objects.filter(city=city).update(
+        city_name=city.name,
+        updated_at=timezone.now(),
+    )
+    refresh_city_locations([city.pk])
+    return updated
+
+
+def refresh_city_locations(city_ids):
+    """
+    Moves the cards placed at the given cities (their listings have no
+    location of their own) to the cities' current location, with one UPDATE.
+    """
+    return ListingCard.objects.filter(
+        city_id__in=city_ids, listing__location__isnull=True,
+    ).update(
+        location=Subquery(City.objects.filter(pk=OuterRef('city_id')).order_by().values('location')),
+        updated_at=timezone.now(),
+    )
@@ -0,0 +1,153 @@
+# src/listings/facets.py
+
+from decimal import Decimal
+from functools import reduce
+from operator import and_
+
+from django.db.models import Count, Q
+
+from categories.schema import get_category_tree
+from .models import Listing
+
+# =================================================================
+#  FACET DEFINITIONS
+# =================================================================
+
+# Low-cardinality dimensions whose facet values are known up front.
+CHOICE_FACETS = {
+    'sale_type': Listing.SaleType.values,
+    'condition': Listing.Condition.values,
+    'currency': [code for code, _label in Listing._meta.get_field('currency').choices],
+}
+
+# Price buckets as (min, max) pairs: min is inclusive, max is exclusive.
+PRICE_BUCKETS = (
+    (None, Decimal('100')),
+    (Decimal('100'), Decimal('500')),
+    (Decimal('500'), Decimal('1000')),
+    (Decimal('1000'), Decimal('5000')),
+    (Decimal('5000'), Decimal('20000')),
+    (Decimal('20000'), None),
+)
+
+
+def _price_bucket_q(low, high):
+    q = Q()
+    if low is not None:
+        q &= Q(price__gte=low)
+    if high is not None:
+        q &= Q(price__lt=high)
+    return q
+
+
+def _count(condition):
+    # An empty Q() means "no filter": count every row of the base queryset.
+    return Count('pk', filter=condition) if condition else Count('pk')
+
+
+# =================================================================
+#  FACET ENGINE
+# =================================================================
+
+def compute_facets(queryset, predicates):
+    """
+    Computes facet counts for every listing dimension in two SQL round trips
+    (the category tree comes from the cache).
+
+    `queryset` is the base ListingCard queryset (before the request filters are applied),
+    and `predicates` is the `{dimension: Q}` dict from
+    `ListingFilter.get_predicates()`.
+
+    Facets are disjunctive: the counts for a dimension are computed against
+    all the *other* active filters, so selecting "for_sale" still shows how
+    many "for_rent" listings there would be. This is done with conditional
+    aggregates (`COUNT(*) FILTER (WHERE ...)`) instead of one query per value.
+    """
+    def others(dimension):
+        conditions = [q for name, q in predicates.items() if name != dimension]
+        return reduce(and_, conditions, Q())
+
+    queryset = queryset.order_by()
+
+    # --- Round trip 1: every fixed-value dimension in one aggregate ---
+    aggregates = {'total': _count(others(None))}
+    choice_keys = {}
+    for dimension, values in CHOICE_FACETS.items():
+        base = others(dimension)
+        for index, value in enumerate(values):
+            key = f'{dimension}_{index}'
+            choice_keys[key] = (dimension, value)
+            aggregates[key] = _count(base & Q(**{dimension: value}))
+    base = others('price')
+    for index, (low, high) in enumerate(PRICE_BUCKETS):
+        aggregates[f'price_{index}'] = _count(base & _price_bucket_q(low, high))
+    base = others('is_sold')
+    aggregates['is_sold_true'] = _count(base & Q(is_sold=True))
+    aggregates['is_sold_false'] = _count(base & Q(is_sold=False))
+
+    counts = queryset.aggregate(**aggregates)
+
+    facets = {dimension: [] for dimension in CHOICE_FACETS}
+    for key, (dimension, value) in choice_keys.items():
+        facets[dimension].append({'value': value, 'count': counts[key]})
+    facets['price'] = [
+        {'min': low, 'max': high, 'count': counts[f'price_{index}']}
+        for index, (low, high) in enumerate(PRICE_BUCKETS)
+    ]
+    facets['is_sold'] = [
+        {'value': True, 'count': counts['is_sold_true']},
+        {'value': False, 'count': counts['is_sold_false']},
+    ]
+
+    # --- Round trip 2: category and city, grouped together ---
+    rows = queryset.values('category_id', 'city_id', 'city_name').annotate(
+        for_category=_count(others('category')),
+        for_city=_count(others('city')),
+    )
+    direct_category_counts = {}
+    city_counts = {}
+    for row in rows:
+        if row['for_category']:
+            category_id = row['category_id']
+            direct_category_counts[category_id] = (
+                direct_category_counts.get(category_id, 0) + row['for_category']
+            )
+        if row['for_city'] and row['city_id'] is not None:
+            city = city_counts.setdefault(
+                row['city_id'], {'id': row['city_id'], 'name': row['city_name'], 'count': 0}
+            )
+            city['count'] += row['for_city']
+
+    facets['category'] = _category_subtree_counts(direct_category_counts)
+    facets['city'] = sorted(city_counts.values(), key=lambda city: -city['count'])
+    facets['total'] = counts['total']
+    return facets
+
+
+def _category_subtree_counts(direct_counts):
+    """
+    Rolls the per-category counts up the cached category tree, so every
+    category reports the listings in its whole subtree. Returns the
+    non-empty categories in tree order.
+    """
+    if not direct_counts:
+        return []
+    categories = get_category_tree()
+    parents = {category['id']: category['parent_id'] for category in categories}
+    totals = {}
+    for category_id, count in direct_counts.items():
+        node = category_id
+        while node is not None:
+            totals[node] = totals.get(node, 0) + count
+            node = parents.get(node)
+    return [
+        {
+            'id': category['id'],
+            'slug': category['slug'],
+            'name': category['name'],
+            'parent': category['parent_id'],
+            'count': totals[category['id']],
+        }
+        for category in categories
+        if category['id'] in totals
+    ]
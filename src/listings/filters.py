@@ -0,0 +1,241 @@
+# src/listings/filters.py
+
+import django_filters
+from django.contrib.gis.geos import Point
+from django.contrib.gis.measure import D
+from django.db.models import Exists, FloatField, OuterRef, Q
+from django.db.models.expressions import RawSQL
+from django_filters import utils
+from django_filters.rest_framework import DjangoFilterBackend
+from rest_framework.exceptions import ValidationError
+
+from categories.models import Category, CategoryField, Field
+from core.tiles import parse_lat_lng
+from locations.models import City
+from .models import Listing, ListingCard, ListingFieldValue
+
+# Query parameters starting with this prefix filter on dynamic category
+# fields, e.g. `?attr.mileage__lt=100000` or `?attr.bedrooms__gte=2`.
+ATTRIBUTE_PREFIX = 'attr.'
+
+# For each field type: the typed ListingFieldValue column to filter on,
+# and the lookups that can use its (field, column) B-tree index.
+ATTRIBUTE_LOOKUPS = {
+    Field.FieldType.NUMBER: ('value_number', ('exact', 'lt', 'lte', 'gt', 'gte', 'in')),
+    Field.FieldType.BOOLEAN: ('value_boolean', ('exact',)),
+    Field.FieldType.TEXT: ('value', ('exact', 'in')),
+}
+
+# =================================================================
+#  LISTING FILTERSET
+# =================================================================
+
+class ListingFilter(django_filters.FilterSet):
+    """
+    Filters for the public listings feed.
+
+    Every filter is turned into a `Q` predicate keyed by its facet dimension
+    (see `get_predicates`), so the facet engine can count each dimension
+    against "all the other filters" without re-parsing the query string.
+    Multi-value filters (e.g. `?sale_type=for_sale&sale_type=for_rent`) are OR-ed.
+    Dynamic category fields are filtered with `attr.<key>__<lookup>` parameters.
+    """
+    category = django_filters.ModelChoiceFilter(
+        queryset=Category.objects.filter(is_active=True),
+        to_field_name='slug',
+        help_text='Category slug. Matches the category and all of its descendants.',
+    )
+    city = django_filters.ModelMultipleChoiceFilter(queryset=City.objects.all())
+    min_price = django_filters.NumberFilter(field_name='price', lookup_expr='gte')
+    max_price = django_filters.NumberFilter(field_name='price', lookup_expr='lte')
+    sale_type = django_filters.MultipleChoiceFilter(choices=Listing.SaleType.choices)
+    condition = django_filters.MultipleChoiceFilter(choices=Listing.Condition.choices)
+    currency = django_filters.MultipleChoiceFilter(
+        choices=Listing._meta.get_field('currency').choices
+    )
+    is_sold = django_filters.BooleanFilter()
+
+    class Meta:
+        model = Listing
+        fields = []
+
+    def get_predicates(self):
+        """
+        Returns a `{dimension: Q}` dict for every filter present in the request.
+        Must be called after the filterset has been validated.
+        """
+        if not hasattr(self, '_predicates'):
+            self._predicates = self.build_predicates()
+        return self._predicates
+
+    def build_predicates(self):
+        data = self.form.cleaned_data
+        predicates = {}
+
+        category = data.get('category')
+        if category is not None:
+            # MPTT subtree: every descendant has lft/rght inside the node's range.
+            # Resolved as a subquery so the predicate needs no join and works
+            # on any model with a `category` FK (Listing and ListingCard).
+            predicates['category'] = Q(category__in=Category.objects.filter(
+                tree_id=category.tree_id,
+                lft__gte=category.lft,
+                rght__lte=category.rght,
+            ).values('pk'))
+
+        if data.get('city'):
+            predicates['city'] = Q(city__in=data['city'])
+
+        price = Q()
+        if data.get('min_price') is not None:
+            price &= Q(price__gte=data['min_price'])
+        if data.get('max_price') is not None:
+            price &= Q(price__lte=data['max_price'])
+        if price:
+            predicates['price'] = price
+
+        for name in ('sale_type', 'condition', 'currency'):
+            if data.get(name):
+                predicates[name] = Q(**{f'{name}__in': data[name]})
+
+        if data.get('is_sold') is not None:
+            predicates['is_sold'] = Q(is_sold=data['is_sold'])
+
+        predicates.update(self.get_attribute_predicates())
+        return predicates
+
+    def get_attribute_predicates(self):
+        """
+        Turns `attr.<key>__<lookup>=<value>` parameters into
+        `{'attr.<key>': Q(Exists(...))}` predicates over the typed columns of
+        ListingFieldValue. Every parameter for the same key goes into a single
+        EXISTS, so `attr.mileage__gte=10&attr.mileage__lt=20` is one range scan.
+        """
+        requested = {}
+        for param in self.data:
+            if not param.startswith(ATTRIBUTE_PREFIX):
+                continue
+            key, _, lookup = param[len(ATTRIBUTE_PREFIX):].partition('__')
+            requested.setdefault(key, []).append((param, lookup or 'exact'))
+        if not requested:
+            return {}
+
+        # Resolve every requested key in one query: the field type and the
+        # CategoryField ids the field is linked through.
+        definitions = {}
+        links = CategoryField.objects.filter(field__key__in=requested).values_list(
+            'field__key', 'field__field_type', 'id'
+        )
+        for key, field_type, category_field_id in links:
+            definition = definitions.setdefault(key, (field_type, []))
+            definition[1].append(category_field_id)
+
+        predicates = {}
+        errors = {}
+        for key, params in requested.items():
+            if key not in definitions:
+                errors[params[0][0]] = [f"Unknown attribute '{key}'."]
+                continue
+            field_type, category_field_ids = definitions[key]
+            column, allowed_lookups = ATTRIBUTE_LOOKUPS[field_type]
+            conditions = {}
+            for param, lookup in params:
+                if lookup not in allowed_lookups:
+                    errors[param] = [f"Unsupported lookup '{lookup}' for this attribute."]
+                    continue
+                raw = self.data.get(param)
+                try:
+                    if lookup == 'in':
+                        value = [Field.coerce_value(field_type, part) for part in raw.split(',')]
+                    else:
+                        value = Field.coerce_value(field_type, raw)
+                except ValueError as exc:
+                    errors[param] = [str(exc)]
+                    continue
+                conditions[f'{column}__{lookup}'] = value
+            if conditions:
+                predicates[f'{ATTRIBUTE_PREFIX}{key}'] = Q(Exists(
+                    ListingFieldValue.objects.filter(
+                        listing=OuterRef('pk'), field_id__in=category_field_ids, **conditions
+                    )
+                ))
+        if errors:
+            raise ValidationError(errors)
+        return predicates
+
+    def filter_queryset(self, queryset):
+        return queryset.filter(*self.get_predicates().values())
+
+
+class ListingCardFilter(ListingFilter):
+    """
+    The same filters, applied to the ListingCard read model. The card shares
+    the listing's primary key and filter columns, so every predicate
+    (including the attribute EXISTS on `listing=OuterRef('pk')`) applies as is.
+
+    The card also carries the listing's location, for the "near me" search:
+    `?near=<lat>,<lng>` keeps the located cards (the view sorts them by
+    distance) and `&radius=<km>` those within that distance, with
+    ST_DWithin on the GiST-indexed geography column.
+    """
+    near = django_filters.CharFilter(help_text='"lat,lng" to sort the listings by distance from.')
+    radius = django_filters.NumberFilter(help_text='With `near`: maximum distance, in km.')
+
+    class Meta:
+        model = ListingCard
+        fields = []
+
+    def build_predicates(self):
+        predicates = super().build_predicates()
+        data = self.form.cleaned_data
+        radius = data.get('radius')
+        if not data.get('near'):
+            if radius is not None:
+                raise ValidationError({'radius': ['Requires `near`.']})
+            return predicates
+
+        try:
+            lat, lng = parse_lat_lng(data['near'])
+        except ValueError as exc:
+            raise ValidationError({'near': [str(exc)]})
+        if radius is None:
+            predicates['near'] = Q(location__isnull=False)
+        elif radius <= 0:
+            raise ValidationError({'radius': ['Must be greater than 0.']})
+        else:
+            predicates['near'] = Q(location__dwithin=(Point(lng, lat, srid=4326), D(km=radius)))
+        return predicates
+
+
+def distance_from(lat, lng):
+    """
+    The distance of a card from a WGS84 point, in metres, as the geography
+    `<->` operator computes it, so ordering by it is a KNN scan of the
+    GiST index on ListingCard.location.
+    """
+    return RawSQL(
+        f'"{ListingCard._meta.db_table}"."location" <-> ST_SetSRID(ST_MakePoint(%s, %s), 4326)::geography',
+        (lng, lat),
+        output_field=FloatField(),
+    )
+
+
+# =================================================================
+#  FILTER BACKEND
+# =================================================================
+
+class ListingFilterBackend(DjangoFilterBackend):
+    """
+    A DjangoFilterBackend that keeps the validated filterset on the view
+    (as `view.filterset`), so the view can reuse its predicates for facets.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        filterset = self.get_filterset(request, queryset, view)
+        if filterset is None:
+            return queryset
+
+        if not filterset.is_valid() and self.raise_exception:
+            raise utils.translate_validation(filterset.errors)
+        view.filterset = filterset
+        return filterset.qs
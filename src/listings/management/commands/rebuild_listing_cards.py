@@ -0,0 +1,38 @@
+# src/listings/management/commands/rebuild_listing_cards.py
+
+from django.core.management.base import BaseCommand
+from listings.cards import refresh_listing_cards
+from listings.models import Listing, ListingCard
+
+class Command(BaseCommand):
+    help = 'Rebuilds the denormalized ListingCard read model from the listings tables'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Number of listings rebuilt per upsert.'
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        self.stdout.write(self.style.SUCCESS('Rebuilding listing cards...'))
+
+        # Drop the cards of listings that no longer exist (shouldn't happen
+        # thanks to ON DELETE CASCADE, but keeps the command a full resync).
+        orphans, _ = ListingCard.objects.exclude(listing__in=Listing.objects.all()).delete()
+
+        rebuilt = 0
+        ids = Listing.objects.order_by('pk').values_list('pk', flat=True)
+        batch = []
+        for listing_id in ids.iterator(chunk_size=batch_size):
+            batch.append(listing_id)
+            if len(batch) >= batch_size:
+                rebuilt += refresh_listing_cards(batch)
+                batch = []
+        rebuilt += refresh_listing_cards(batch)
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Rebuild complete. Cards rebuilt: {rebuilt}, orphans removed: {orphans}'
+        ))
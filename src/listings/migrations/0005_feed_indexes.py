@@ -0,0 +1,25 @@
+# Generated by Django 5.2.4 on 2026-10-18 16:26
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('categories', '0003_category_name_en_category_name_es_category_slug_en_and_more'),
+        ('listings', '0004_listing_description_en_listing_description_es_and_more'),
+        ('locations', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='listing',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['-created_at', '-id'], name='listing_active_feed_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='listing',
+            index=models.Index(fields=['author', '-created_at', '-id'], name='listing_author_feed_idx'),
+        ),
+    ]
@@ -0,0 +1,88 @@
+# Generated by Django 5.2.4 on 2026-10-18 16:29
+
+from decimal import Decimal, InvalidOperation
+
+from django.db import migrations, models
+
+# Frozen copies of Field.coerce_value and ListingFieldValue.MAX_NUMBER as
+# they were when the typed columns were added: a migration must not follow
+# later changes to the models.
+TRUE_VALUES = frozenset(('true', '1', 'yes', 'y', 'on', 'si', 'sí'))
+FALSE_VALUES = frozenset(('false', '0', 'no', 'n', 'off'))
+MAX_NUMBER = 10 ** 14
+
+
+def coerce_number(raw):
+    try:
+        value = Decimal(str(raw).strip())
+    except InvalidOperation:
+        return None
+    if not value.is_finite() or abs(value) >= MAX_NUMBER:
+        return None
+    return value
+
+
+def coerce_boolean(raw):
+    lowered = str(raw).strip().lower()
+    if lowered in TRUE_VALUES:
+        return True
+    if lowered in FALSE_VALUES:
+        return False
+    return None
+
+
+def populate_typed_values(apps, schema_editor):
+    ListingFieldValue = apps.get_model('listings', 'ListingFieldValue')
+    batch = []
+    values = ListingFieldValue.objects.select_related('field__field').iterator(chunk_size=2000)
+    for field_value in values:
+        field_type = field_value.field.field.field_type
+        if field_type == 'number':
+            field_value.value_number = coerce_number(field_value.value)
+            if field_value.value_number is None:
+                continue
+        elif field_type == 'boolean':
+            field_value.value_boolean = coerce_boolean(field_value.value)
+            if field_value.value_boolean is None:
+                continue
+        else:
+            continue
+        batch.append(field_value)
+        if len(batch) >= 2000:
+            ListingFieldValue.objects.bulk_update(batch, ['value_number', 'value_boolean'])
+            batch = []
+    ListingFieldValue.objects.bulk_update(batch, ['value_number', 'value_boolean'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('categories', '0004_field_key'),
+        ('listings', '0005_feed_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='listingfieldvalue',
+            name='value_boolean',
+            field=models.BooleanField(blank=True, editable=False, null=True, verbose_name='Boolean Value'),
+        ),
+        migrations.AddField(
+            model_name='listingfieldvalue',
+            name='value_number',
+            field=models.DecimalField(blank=True, decimal_places=4, editable=False, max_digits=18, null=True, verbose_name='Numeric Value'),
+        ),
+        migrations.RunPython(populate_typed_values, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='listingfieldvalue',
+            index=models.Index(condition=models.Q(('value_number__isnull', False)), fields=['field', 'value_number'], name='fieldvalue_number_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='listingfieldvalue',
+            index=models.Index(condition=models.Q(('value_boolean__isnull', False)), fields=['field', 'value_boolean'], name='fieldvalue_boolean_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='listingfieldvalue',
+            index=models.Index(fields=['field', 'value'], name='fieldvalue_text_idx'),
+        ),
+    ]
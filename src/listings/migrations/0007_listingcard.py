@@ -0,0 +1,124 @@
+# Generated by Django 5.2.4 on 2026-10-18 16:31
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Avg, Count, OuterRef, Subquery
+
+
+def populate_listing_cards(apps, schema_editor):
+    """
+    Builds the card of every existing listing, as listings/cards.py does,
+    so the feeds aren't empty until the cards are rebuilt by hand.
+    """
+    Category = apps.get_model('categories', 'Category')
+    Listing = apps.get_model('listings', 'Listing')
+    ListingCard = apps.get_model('listings', 'ListingCard')
+    ListingImage = apps.get_model('listings', 'ListingImage')
+    Review = apps.get_model('reviews', 'Review')
+
+    categories = {row['id']: row for row in Category.objects.values('id', 'parent_id', 'name_en', 'name_es')}
+    paths = {}
+    for category_id in categories:
+        path_en, path_es = [], []
+        node = categories.get(category_id)
+        while node is not None:
+            path_en.append(node['name_en'])
+            path_es.append(node['name_es'] or node['name_en'])
+            node = categories.get(node['parent_id'])
+        paths[category_id] = (path_en[::-1], path_es[::-1])
+
+    reviews = Review.objects.filter(listing=OuterRef('pk')).order_by().values('listing')
+    cover = ListingImage.objects.filter(listing=OuterRef('pk')).order_by('order', 'pk')
+    rows = Listing.objects.order_by('pk').values(
+        'pk', 'slug', 'title_en', 'title_es', 'category_id', 'author_id', 'city_id',
+        'price', 'currency', 'sale_type', 'condition', 'is_active', 'is_sold', 'created_at',
+        'city__name', 'author__public_id', 'author__username', 'author__avatar',
+    ).annotate(
+        rating_average=Subquery(reviews.annotate(value=Avg('rating')).values('value')),
+        rating_count=Subquery(reviews.annotate(value=Count('pk')).values('value')),
+        cover_image=Subquery(cover.values('image')[:1]),
+    )
+
+    cards = []
+    for row in rows.iterator(chunk_size=2000):
+        path_en, path_es = paths.get(row['category_id'], ([], []))
+        cards.append(ListingCard(
+            listing_id=row['pk'],
+            slug=row['slug'],
+            title_en=row['title_en'] or '',
+            title_es=row['title_es'] or '',
+            category_id=row['category_id'],
+            author_id=row['author_id'],
+            city_id=row['city_id'],
+            price=row['price'],
+            currency=row['currency'],
+            sale_type=row['sale_type'],
+            condition=row['condition'],
+            is_active=row['is_active'],
+            is_sold=row['is_sold'],
+            created_at=row['created_at'],
+            category_path_en=path_en,
+            category_path_es=path_es,
+            city_name=row['city__name'] or '',
+            seller_public_id=row['author__public_id'],
+            seller_username=row['author__username'],
+            seller_avatar=row['author__avatar'] or '',
+            cover_image=row['cover_image'] or '',
+            rating_average=row['rating_average'],
+            rating_count=row['rating_count'] or 0,
+        ))
+        if len(cards) >= 2000:
+            ListingCard.objects.bulk_create(cards)
+            cards = []
+    ListingCard.objects.bulk_create(cards)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0003_alter_customuser_public_id'),
+        ('categories', '0004_field_key'),
+        ('listings', '0006_listingfieldvalue_typed_values'),
+        ('locations', '0001_initial'),
+        ('reviews', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ListingCard',
+            fields=[
+                ('listing', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='card', serialize=False, to='listings.listing')),
+                ('slug', models.SlugField(max_length=255, verbose_name='Slug')),
+                ('title_en', models.CharField(blank=True, max_length=200, verbose_name='Title (English)')),
+                ('title_es', models.CharField(blank=True, max_length=200, verbose_name='Title (Spanish)')),
+                ('price', models.DecimalField(decimal_places=2, max_digits=10, verbose_name='Price')),
+                ('currency', models.CharField(max_length=3, verbose_name='Currency')),
+                ('sale_type', models.CharField(max_length=10, verbose_name='Sale Type')),
+                ('condition', models.CharField(max_length=10, verbose_name='Condition')),
+                ('is_active', models.BooleanField(verbose_name='Is Active')),
+                ('is_sold', models.BooleanField(verbose_name='Is Sold')),
+                ('created_at', models.DateTimeField(verbose_name='Created At')),
+                ('category_path_en', models.JSONField(default=list, verbose_name='Category Path (English)')),
+                ('category_path_es', models.JSONField(default=list, verbose_name='Category Path (Spanish)')),
+                ('city_name', models.CharField(blank=True, max_length=100, verbose_name='City Name')),
+                ('seller_public_id', models.UUIDField(verbose_name='Seller Public ID')),
+                ('seller_username', models.CharField(max_length=150, verbose_name='Seller Username')),
+                ('seller_avatar', models.ImageField(blank=True, max_length=255, upload_to='', verbose_name='Seller Avatar')),
+                ('cover_image', models.ImageField(blank=True, max_length=255, upload_to='', verbose_name='Cover Image')),
+                ('rating_average', models.DecimalField(blank=True, decimal_places=2, max_digits=3, null=True, verbose_name='Rating Average')),
+                ('rating_count', models.PositiveIntegerField(default=0, verbose_name='Rating Count')),
+                ('author', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('category', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='categories.category')),
+                ('city', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='locations.city')),
+            ],
+            options={
+                'verbose_name': 'Listing Card',
+                'verbose_name_plural': 'Listing Cards',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(condition=models.Q(('is_active', True)), fields=['-created_at', '-listing'], name='listingcard_active_feed_idx'), models.Index(fields=['author', '-created_at', '-listing'], name='listingcard_author_feed_idx')],
+            },
+        ),
+        migrations.RunPython(populate_listing_cards, migrations.RunPython.noop),
+    ]
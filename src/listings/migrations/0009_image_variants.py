@@ -0,0 +1,28 @@
+# Generated by Django 5.2.4 on 2026-10-18 16:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('listings', '0008_updated_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='listingcard',
+            name='cover_image_variants',
+            field=models.JSONField(blank=True, default=dict, verbose_name='Cover Image Variants'),
+        ),
+        migrations.AddField(
+            model_name='listingcard',
+            name='seller_avatar_variants',
+            field=models.JSONField(blank=True, default=dict, verbose_name='Seller Avatar Variants'),
+        ),
+        migrations.AddField(
+            model_name='listingimage',
+            name='variants',
+            field=models.JSONField(blank=True, default=dict, editable=False, verbose_name='Variants'),
+        ),
+    ]
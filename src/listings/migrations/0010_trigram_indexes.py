@@ -0,0 +1,27 @@
+# Generated by Django 5.2.4 on 2026-10-18 16:50
+
+import django.contrib.postgres.indexes
+from django.conf import settings
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('search', '0003_trigram_extension'),
+        ('categories', '0005_trigram_indexes'),
+        ('listings', '0009_image_variants'),
+        ('locations', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='listingcard',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['title_en'], name='listingcard_title_en_trgm', opclasses=['gin_trgm_ops']),
+        ),
+        migrations.AddIndex(
+            model_name='listingcard',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['title_es'], name='listingcard_title_es_trgm', opclasses=['gin_trgm_ops']),
+        ),
+    ]
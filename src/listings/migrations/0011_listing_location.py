@@ -0,0 +1,32 @@
+# Generated by Django 5.2.4 on 2026-10-18 17:08
+
+import django.contrib.gis.db.models.fields
+from django.db import migrations
+
+# Listings had no location of their own: place every card at its city.
+FILL_CARD_LOCATIONS = '''
+    UPDATE listings_listingcard AS card
+    SET location = city.location::geography
+    FROM locations_city AS city
+    WHERE city.id = card.city_id AND city.location IS NOT NULL
+'''
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('listings', '0010_trigram_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='listing',
+            name='location',
+            field=django.contrib.gis.db.models.fields.PointField(blank=True, null=True, srid=4326, verbose_name='Location'),
+        ),
+        migrations.AddField(
+            model_name='listingcard',
+            name='location',
+            field=django.contrib.gis.db.models.fields.PointField(blank=True, geography=True, null=True, srid=4326, verbose_name='Location'),
+        ),
+        migrations.RunSQL(FILL_CARD_LOCATIONS, migrations.RunSQL.noop),
+    ]
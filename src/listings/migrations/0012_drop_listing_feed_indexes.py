@@ -0,0 +1,21 @@
+# Generated by Django 5.2.4 on 2026-10-18 17:35
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('listings', '0011_listing_location'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='listing',
+            name='listing_active_feed_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='listing',
+            name='listing_author_feed_idx',
+        ),
+    ]
@@ -2,12 +2,15 @@
 
 import uuid
 from django.conf import settings
-from django.db import models
+from django.contrib.gis.db.models import PointField
+from django.contrib.postgres.indexes import GinIndex
+from django.db import models, transaction
 from django.utils.text import slugify # <-- ADD THIS IMPORT
 from django.utils.translation import gettext_lazy as _
 
 # Import related models from other apps
-from categories.models import Category, CategoryField
+from categories.counts import counted_category
+from categories.models import Category, CategoryField, Field
 from locations.models import City
 
 
@@ -40,6 +43,9 @@ class Listing(models.Model):
     category = models.ForeignKey(Category, on_delete=models.PROTECT, related_name='listings')
     author = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='listings')
     city = models.ForeignKey(City, on_delete=models.SET_NULL, null=True, blank=True, related_name='listings')
+    # Where the listing is, when more precise than its city. Listings without
+    # one are placed at their city's location (see ListingCard.location).
+    location = PointField(_("Location"), null=True, blank=True)
     
     # Pricing and Sale Type
     price = models.DecimalField(_("Price"), max_digits=10, decimal_places=2)
@@ -59,23 +65,49 @@ class Listing(models.Model):
     public_id = models.UUIDField(default=uuid.uuid4, editable=False, unique=True)
     
     # --- Overridden Methods ---
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # The category the listing is counted in as loaded, so a save can
+        # adjust the category listing counts without re-reading the row.
+        if {'category_id', 'is_active', 'is_sold'}.issubset(field_names):
+            instance._counted_category_id = counted_category(instance)
+        # Where the listing is drawn on the map as loaded (its location, else
+        # its city's), so a save can invalidate the map tiles it leaves
+        # (listings/signals.py).
+        if {'city_id', 'location'}.issubset(field_names):
+            instance._loaded_place = (instance.city_id, instance.location)
+        return instance
     
     def save(self, *args, **kwargs):
         """
         Overrides the save method to automatically generate the slug if it's empty.
         """
         if not self.slug:
-            # Create a base slug from the title
-            base_slug = slugify(self.title)
-            # To ensure uniqueness, append the public_id
-            # This is a simple and robust way to prevent slug collisions.
-            self.slug = f"{base_slug}-{str(self.public_id)[:8]}"
-        super().save(*args, **kwargs)
+            self.slug = self.generate_slug()
+        # One transaction with the category count increments of post_save
+        # (see categories/counts.py).
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
+    def generate_slug(self):
+        """
+        Builds the slug from the title and the public_id, which is generated
+        when the instance is created, so slugs can be built before saving
+        (e.g. for bulk inserts).
+        """
+        # Create a base slug from the title
+        base_slug = slugify(self.title)
+        # To ensure uniqueness, append the public_id
+        # This is a simple and robust way to prevent slug collisions.
+        return f"{base_slug}-{str(self.public_id)[:8]}"
 
     class Meta:
         verbose_name = _("Listing")
         verbose_name_plural = _("Listings")
         ordering = ['-created_at']
+        # The feeds are read from ListingCard, whose indexes back them.
 
     def __str__(self):
         return self.title
@@ -96,7 +128,10 @@ class ListingImage(models.Model):
         help_text=_("A short description of the image for accessibility and SEO.")
     )
     order = models.PositiveIntegerField(_("Order"), default=0, help_text=_("Order in which images are displayed."))
+    # Resized derivatives of `image`, maintained by core.images.
+    variants = models.JSONField(_("Variants"), default=dict, blank=True, editable=False)
     created_at = models.DateTimeField(_("Created At"), auto_now_add=True)
+    updated_at = models.DateTimeField(_("Updated At"), auto_now=True)
 
     class Meta:
         verbose_name = _("Listing Image")
@@ -110,16 +145,138 @@ class ListingFieldValue(models.Model):
     """
     Stores the actual value for a dynamic field for a specific listing.
     e.g., Listing "Toyota Corolla" -> Field "Mileage" -> Value "150000"
+
+    `value` keeps the raw string as entered. Next to it, the value is also
+    stored in a typed column matching `Field.field_type` (`value_number` or
+    `value_boolean`), so attribute filters such as "Mileage < 100000" are
+    index range scans instead of full scans with a string cast.
     """
     listing = models.ForeignKey(Listing, on_delete=models.CASCADE, related_name='field_values')
     field = models.ForeignKey(CategoryField, on_delete=models.CASCADE, related_name='listing_values')
     value = models.CharField(_("Value"), max_length=500)
+
+    # Largest magnitude that fits value_number (max_digits - decimal_places).
+    MAX_NUMBER = 10 ** 14
+
+    # Typed projections of `value`, maintained by `set_typed_value()`.
+    value_number = models.DecimalField(_("Numeric Value"), max_digits=18, decimal_places=4, null=True, blank=True, editable=False)
+    value_boolean = models.BooleanField(_("Boolean Value"), null=True, blank=True, editable=False)
     
     class Meta:
         verbose_name = _("Listing Field Value")
         verbose_name_plural = _("Listing Field Values")
         # A listing should only have one value for a specific field
         unique_together = ('listing', 'field')
+        indexes = [
+            models.Index(
+                fields=['field', 'value_number'],
+                condition=models.Q(value_number__isnull=False),
+                name='fieldvalue_number_idx',
+            ),
+            models.Index(
+                fields=['field', 'value_boolean'],
+                condition=models.Q(value_boolean__isnull=False),
+                name='fieldvalue_boolean_idx',
+            ),
+            models.Index(fields=['field', 'value'], name='fieldvalue_text_idx'),
+        ]
         
     def __str__(self):
-        return f'{self.listing.title} - {self.field.field.name}: {self.value}'
\ No newline at end of file
+        return f'{self.listing.title} - {self.field.field.name}: {self.value}'
+
+    def save(self, *args, **kwargs):
+        """
+        Keeps the typed columns in sync with the raw value.
+        """
+        self.set_typed_value(self.field.field.field_type)
+        super().save(*args, **kwargs)
+
+    def set_typed_value(self, field_type):
+        """
+        Fills `value_number`/`value_boolean` from the raw value.
+        Values that can't be coerced to the field's type are left untyped
+        (and so never match a typed attribute filter).
+        Takes the field type explicitly so bulk writers can skip the lookup.
+        """
+        self.value_number = None
+        self.value_boolean = None
+        if field_type == Field.FieldType.TEXT:
+            return
+        try:
+            typed = Field.coerce_value(field_type, self.value)
+        except ValueError:
+            return
+        if field_type == Field.FieldType.NUMBER:
+            # Out-of-range numbers can't be stored in the typed column.
+            if abs(typed) < self.MAX_NUMBER:
+                self.value_number = typed
+        elif field_type == Field.FieldType.BOOLEAN:
+            self.value_boolean = typed
+
+
+class ListingCard(models.Model):
+    """
+    Denormalized read model: one row per listing holding exactly the payload
+    of a listing card in the list endpoints (title per language, price,
+    category path, city name, seller summary, cover image, rating summary).
+
+    Rows are maintained by `listings.cards` from the Listing, ListingImage,
+    Review, CustomUser, Category and City write paths (see listings/signals.py),
+    so list pages are served from one indexed scan of this table with no joins
+    or prefetches. Run `manage.py rebuild_listing_cards` to (re)build it.
+    """
+    listing = models.OneToOneField(Listing, on_delete=models.CASCADE, primary_key=True, related_name='card')
+
+    # Copied from Listing; the FKs are kept as plain columns so the listing
+    # filters and facets work unchanged on this table.
+    slug = models.SlugField(_("Slug"), max_length=255)
+    title_en = models.CharField(_("Title (English)"), max_length=200, blank=True)
+    title_es = models.CharField(_("Title (Spanish)"), max_length=200, blank=True)
+    category = models.ForeignKey(Category, on_delete=models.CASCADE, related_name='+')
+    author = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='+')
+    city = models.ForeignKey(City, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    price = models.DecimalField(_("Price"), max_digits=10, decimal_places=2)
+    currency = models.CharField(_("Currency"), max_length=3)
+    sale_type = models.CharField(_("Sale Type"), max_length=10)
+    condition = models.CharField(_("Condition"), max_length=10)
+    is_active = models.BooleanField(_("Is Active"))
+    is_sold = models.BooleanField(_("Is Sold"))
+    created_at = models.DateTimeField(_("Created At"))
+
+    # Denormalized from related rows.
+    category_path_en = models.JSONField(_("Category Path (English)"), default=list)
+    category_path_es = models.JSONField(_("Category Path (Spanish)"), default=list)
+    city_name = models.CharField(_("City Name"), max_length=100, blank=True)
+    # The listing's own location, else its city's. A geography column, so its
+    # GiST index serves true-distance KNN (<->) and radius (ST_DWithin) queries.
+    location = PointField(_("Location"), geography=True, null=True, blank=True)
+    seller_public_id = models.UUIDField(_("Seller Public ID"))
+    seller_username = models.CharField(_("Seller Username"), max_length=150)
+    seller_avatar = models.ImageField(_("Seller Avatar"), max_length=255, blank=True)
+    seller_avatar_variants = models.JSONField(_("Seller Avatar Variants"), default=dict, blank=True)
+    cover_image = models.ImageField(_("Cover Image"), max_length=255, blank=True)
+    cover_image_variants = models.JSONField(_("Cover Image Variants"), default=dict, blank=True)
+    rating_average = models.DecimalField(_("Rating Average"), max_digits=3, decimal_places=2, null=True, blank=True)
+    rating_count = models.PositiveIntegerField(_("Rating Count"), default=0)
+
+    # When the card was last rewritten; used as a conditional GET validator.
+    updated_at = models.DateTimeField(_("Updated At"), auto_now=True)
+
+    class Meta:
+        verbose_name = _("Listing Card")
+        verbose_name_plural = _("Listing Cards")
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(
+                fields=['-created_at', '-listing'],
+                condition=models.Q(is_active=True),
+                name='listingcard_active_feed_idx',
+            ),
+            models.Index(fields=['author', '-created_at', '-listing'], name='listingcard_author_feed_idx'),
+            # Typo-tolerant title suggestions (search/suggest.py).
+            GinIndex(fields=['title_en'], opclasses=['gin_trgm_ops'], name='listingcard_title_en_trgm'),
+            GinIndex(fields=['title_es'], opclasses=['gin_trgm_ops'], name='listingcard_title_es_trgm'),
+        ]
+
+    def __str__(self):
+        return self.title_en or self.slug
@@ -20,4 +20,4 @@ class IsOwnerOrReadOnly(permissions.BasePermission):
 
         # Write permissions are only allowed to the owner of the listing.
         # 'obj' is the Listing instance here.
-        return obj.owner == request.user
\ No newline at end of file
+        return obj.author == request.user
\ No newline at end of file
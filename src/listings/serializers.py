@@ -1,8 +1,18 @@
 # src/listings/serializers.py
 
+from django.db import transaction
+from modeltranslation.utils import get_language
 from rest_framework import serializers
-from .models import Listing, ListingImage
+from .attributes import build_field_values, delete_stale_field_values, get_attribute_validator, save_field_values
+from .models import Listing, ListingCard, ListingImage
 from accounts.serializers import UserSerializer # To show owner details
+from core.images import variant_urls
+from core.serializers import DynamicFieldsMixin, LatLngField
+from locations.geocoder import nearest_city_id
+
+# A listing created with a location but no city gets the nearest city,
+# if there is one within this distance (km).
+NEAREST_CITY_MAX_DISTANCE = 50
 
 # =================================================================
 #  LISTING IMAGE SERIALIZER
@@ -11,30 +21,35 @@ from accounts.serializers import UserSerializer # To show owner details
 class ListingImageSerializer(serializers.ModelSerializer):
     """
     Serializer for the ListingImage model.
+    `variants` holds the resized derivatives (URLs per size and format,
+    srcset strings and a placeholder), or None until they're built.
     """
+    variants = serializers.SerializerMethodField()
+
     class Meta:
         model = ListingImage
-        fields = ('id', 'image')
+        fields = ('id', 'image', 'variants')
+        method_field_columns = {'variants': ('variants',)}
+
+    def get_variants(self, obj):
+        return variant_urls(obj.variants, self.context.get('request'))
 
 
 # =================================================================
 #  LISTING SERIALIZER (FOR LIST AND DETAIL VIEWS)
 # =================================================================
 
-class ListingSerializer(serializers.ModelSerializer):
+class ListingSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """
     Serializer for displaying a list of listings or a single listing's details.
     It provides rich, readable information about related models.
+    The nested owner and images are only rendered when expanded (?expand=).
     """
-    # Use the UserSerializer to show nested owner details instead of just an ID
-    owner = UserSerializer(read_only=True)
-
-    # Use a simple string representation for related fields
-    category = serializers.StringRelatedField()
-    city = serializers.StringRelatedField()
-
-    # Use the ListingImageSerializer for the nested images
-    images = ListingImageSerializer(many=True, read_only=True)
+    # Use a simple string representation for related fields (their name,
+    # as str() would), declared by source so the list can be compiled.
+    category = serializers.CharField(source='category.name', read_only=True, default=None)
+    city = serializers.CharField(source='city.name', read_only=True, default=None)
+    location = LatLngField(read_only=True)
 
     class Meta:
         model = Listing
@@ -48,10 +63,110 @@ class ListingSerializer(serializers.ModelSerializer):
             'owner',
             'category',
             'city',
+            'location',
             'images', # This will be a list of image objects
             'created_at',
             'updated_at',
         )
+        expandable_fields = {
+            # Use the UserSerializer to show nested owner details instead of just an ID
+            'owner': (UserSerializer, {'source': 'author', 'read_only': True}),
+            # Use the ListingImageSerializer for the nested images
+            'images': (ListingImageSerializer, {'many': True, 'read_only': True}),
+        }
+        select_related_fields = {'owner': 'author', 'category': 'category', 'city': 'city'}
+        prefetch_related_fields = {'images': 'images'}
+
+
+# =================================================================
+#  LISTING CARD SERIALIZER (FOR LIST VIEWS)
+# =================================================================
+
+class ListingCardSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
+    """
+    Serializer for the listing cards of the list views.
+    Reads only the denormalized ListingCard row: no joins or prefetches.
+    Translated values are picked for the active language.
+    """
+    id = serializers.IntegerField(source='pk', read_only=True)
+    title = serializers.SerializerMethodField()
+    category_path = serializers.SerializerMethodField()
+    city = serializers.CharField(source='city_name', read_only=True)
+    seller = serializers.SerializerMethodField()
+    cover_image = serializers.ImageField(read_only=True)
+    cover_image_variants = serializers.SerializerMethodField()
+    rating = serializers.SerializerMethodField()
+
+    class Meta:
+        model = ListingCard
+        fields = (
+            'id',
+            'title',
+            'slug',
+            'price',
+            'currency',
+            'sale_type',
+            'condition',
+            'is_active',
+            'is_sold',
+            'category_path',
+            'city',
+            'seller',
+            'cover_image',
+            'cover_image_variants',
+            'rating',
+            'created_at',
+        )
+        # The card columns each method reads, for the compiled list path.
+        method_field_columns = {
+            'title': ('title_en', 'title_es'),
+            'category_path': ('category_path_en', 'category_path_es'),
+            'seller': ('seller_public_id', 'seller_username', 'seller_avatar', 'seller_avatar_variants'),
+            'cover_image_variants': ('cover_image_variants',),
+            'rating': ('rating_average', 'rating_count'),
+        }
+
+    def get_title(self, obj):
+        return getattr(obj, f'title_{get_language()}') or obj.title_en
+
+    def get_category_path(self, obj):
+        return getattr(obj, f'category_path_{get_language()}') or obj.category_path_en
+
+    def get_seller(self, obj):
+        avatar = None
+        if obj.seller_avatar:
+            avatar = obj.seller_avatar.url
+            request = self.context.get('request')
+            if request is not None:
+                avatar = request.build_absolute_uri(avatar)
+        return {
+            'public_id': str(obj.seller_public_id),
+            'username': obj.seller_username,
+            'avatar': avatar,
+            'avatar_variants': variant_urls(obj.seller_avatar_variants, self.context.get('request')),
+        }
+
+    def get_cover_image_variants(self, obj):
+        return variant_urls(obj.cover_image_variants, self.context.get('request'))
+
+    def get_rating(self, obj):
+        return {
+            'average': obj.rating_average,
+            'count': obj.rating_count,
+        }
+
+
+class NearbyListingCardSerializer(ListingCardSerializer):
+    """
+    The listing cards of a "near me" search (`?near=`), with their
+    `distance` from that point, in metres.
+    """
+    distance = serializers.FloatField(read_only=True)
+
+    class Meta(ListingCardSerializer.Meta):
+        fields = ListingCardSerializer.Meta.fields + ('distance',)
+        # Annotated by ListingListCreateView.
+        annotated_fields = ('distance',)
 
 
 # =================================================================
@@ -62,7 +177,16 @@ class ListingCreateSerializer(serializers.ModelSerializer):
     """
     Serializer for creating a new listing.
     This serializer handles write operations.
+    `attributes` holds the dynamic category field values, keyed by `Field.key`,
+    e.g. {"mileage": 150000, "automatic": true}, checked against the
+    category's compiled validator (see `listings.attributes`).
+    `location` ({"lat": ..., "lng": ...}) is optional; listings without one
+    are placed at their city, and new listings with one but no city get
+    the nearest city (see `locations.geocoder`).
     """
+    attributes = serializers.DictField(required=False, write_only=True)
+    location = LatLngField(required=False, allow_null=True)
+
     class Meta:
         model = Listing
         # These are the fields a user submits when creating a listing.
@@ -74,4 +198,127 @@ class ListingCreateSerializer(serializers.ModelSerializer):
             'price',
             'category',
             'city',
-        )
\ No newline at end of file
+            'location',
+            'attributes',
+        )
+
+    def validate(self, attrs):
+        """
+        Validates the attributes against the fields of the listing's category
+        (the new one, or the current one of an updated listing) and turns them
+        into `(category_field_id, field_type, raw_value)` triples.
+        Required attributes may be omitted on updates that keep the category.
+        """
+        location = attrs.get('location')
+        if self.instance is None and location is not None and attrs.get('city') is None:
+            attrs.pop('city', None)
+            attrs['city_id'] = nearest_city_id(location.y, location.x, NEAREST_CITY_MAX_DISTANCE)
+
+        category = attrs.get('category') or self.instance.category
+        keeps_category = self.instance is not None and category.pk == self.instance.category_id
+        if 'attributes' not in attrs and keeps_category:
+            return attrs
+        values, errors = get_attribute_validator(category).validate(
+            attrs.get('attributes', {}), partial=keeps_category,
+        )
+        if errors:
+            raise serializers.ValidationError({'attributes': errors})
+        attrs['attributes'] = values
+        return attrs
+
+    @transaction.atomic
+    def create(self, validated_data):
+        values = validated_data.pop('attributes', [])
+        listing = super().create(validated_data)
+        save_field_values(list(build_field_values(listing, values)))
+        return listing
+
+    @transaction.atomic
+    def update(self, instance, validated_data):
+        values = validated_data.pop('attributes', [])
+        previous_category_id = instance.category_id
+        listing = super().update(instance, validated_data)
+        if listing.category_id != previous_category_id:
+            delete_stale_field_values([(listing.pk, get_attribute_validator(listing.category))])
+        save_field_values(list(build_field_values(listing, values)))
+        return listing
+
+
+class ListingUpdateSerializer(ListingCreateSerializer):
+    """
+    Serializer for updating a listing: the create fields, plus its status.
+    """
+    class Meta(ListingCreateSerializer.Meta):
+        fields = ListingCreateSerializer.Meta.fields + ('is_active', 'is_sold')
+
+
+# =================================================================
+#  LISTING BATCH ITEM SERIALIZER (FOR BATCH CREATE/UPDATE)
+# =================================================================
+
+class ListingBatchItemSerializer(serializers.ModelSerializer):
+    """
+    Serializer for one item of a batch create/update (see `listings.batch`).
+    Items with a `slug` update that listing (partially); the others are created.
+    `attributes` holds the dynamic category field values, keyed by `Field.key`,
+    e.g. {"mileage": 150000, "automatic": true}.
+
+    Related objects are looked up in maps prefetched once for the whole batch
+    and passed in the context (`categories`, `cities`, `attribute_validators`),
+    so validating an item runs no query.
+    """
+    # Declared explicitly: the model's unique validators would query per item.
+    slug = serializers.SlugField(max_length=255, required=False)
+    category = serializers.IntegerField()
+    city = serializers.IntegerField(required=False, allow_null=True)
+    location = LatLngField(required=False, allow_null=True)
+    attributes = serializers.DictField(required=False)
+
+    class Meta:
+        model = Listing
+        fields = (
+            'slug',
+            'title',
+            'description',
+            'price',
+            'currency',
+            'sale_type',
+            'condition',
+            'is_active',
+            'is_sold',
+            'category',
+            'city',
+            'location',
+            'attributes',
+        )
+
+    def validate_category(self, value):
+        category = self.context['categories'].get(value)
+        if category is None:
+            raise serializers.ValidationError('Invalid category.')
+        return category
+
+    def validate_city(self, value):
+        if value is None:
+            return None
+        city = self.context['cities'].get(value)
+        if city is None:
+            raise serializers.ValidationError('Invalid city.')
+        return city
+
+    def validate(self, attrs):
+        """
+        Checks the attributes against the compiled validator of the listing's
+        category (the new one, or the current one of an updated listing),
+        prefetched in the context as `attribute_validators`, and turns them
+        into `(category_field_id, field_type, raw_value)` triples.
+        """
+        category = attrs.get('category')
+        category_id = category.pk if category is not None else self.instance.category_id
+        values, errors = self.context['attribute_validators'][category_id].validate(
+            attrs.get('attributes', {}), partial=self.instance is not None,
+        )
+        if errors:
+            raise serializers.ValidationError({'attributes': errors})
+        attrs['attributes'] = values
+        return attrs
@@ -0,0 +1,175 @@
+# src/listings/signals.py
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+from mptt.signals import node_moved
+
+from categories.counts import counted_category, listing_moved, recompute_subtree_counts
+from categories.models import Category
+from core.cache import bump_namespace, bump_namespace_on_commit
+from core.images import schedule_variants, variants_ready
+from locations.models import City
+from places.vector_tiles import bump_layer_on_commit, invalidate_cities_on_commit, invalidate_points_on_commit
+from . import cards
+from .models import Listing, ListingImage
+
+# =================================================================
+#  LISTING CARD SYNCHRONISATION AND CACHE INVALIDATION
+# =================================================================
+# Cards are refreshed after the surrounding transaction commits, so a
+# rolled-back write never leaves a card behind and a card never sees
+# half-written related rows (e.g. a listing saved with its admin inlines).
+# The 'listings' response cache namespace is bumped after the card refresh
+# (on_commit callbacks run in registration order).
+
+# User fields shown in listing payloads; other user saves (e.g. last_login) are ignored.
+PUBLIC_USER_FIELDS = frozenset(('username', 'email', 'avatar'))
+
+
+def _refresh_card_on_commit(listing_id):
+    transaction.on_commit(lambda: cards.refresh_listing_cards([listing_id]))
+    bump_namespace_on_commit('listings')
+
+
+@receiver(post_save, sender=Listing, dispatch_uid='listing_card_listing_saved')
+def listing_saved(sender, instance, **kwargs):
+    _refresh_card_on_commit(instance.pk)
+
+
+@receiver(post_delete, sender=Listing, dispatch_uid='listing_card_listing_deleted')
+def listing_deleted(sender, instance, **kwargs):
+    # The card itself is removed by ON DELETE CASCADE.
+    bump_namespace_on_commit('listings')
+
+
+@receiver(post_save, sender=ListingImage, dispatch_uid='listing_card_image_saved')
+@receiver(post_delete, sender=ListingImage, dispatch_uid='listing_card_image_deleted')
+def listing_image_changed(sender, instance, **kwargs):
+    _refresh_card_on_commit(instance.listing_id)
+
+
+@receiver(post_save, sender='reviews.Review', dispatch_uid='listing_card_review_saved')
+@receiver(post_delete, sender='reviews.Review', dispatch_uid='listing_card_review_deleted')
+def review_changed(sender, instance, **kwargs):
+    _refresh_card_on_commit(instance.listing_id)
+
+
+@receiver(post_save, sender=ListingImage, dispatch_uid='listing_image_variants')
+def listing_image_saved(sender, instance, **kwargs):
+    schedule_variants(instance, 'image')
+
+
+@receiver(variants_ready, sender=ListingImage, dispatch_uid='listing_card_image_variants_ready')
+def listing_image_variants_ready(sender, instance, **kwargs):
+    # Sent by the image worker, outside of any transaction.
+    cards.refresh_listing_cards([instance.listing_id])
+    bump_namespace('listings')
+
+
+@receiver(variants_ready, sender=get_user_model(), dispatch_uid='listing_card_avatar_variants_ready')
+def avatar_variants_ready(sender, instance, **kwargs):
+    cards.refresh_seller(instance)
+    bump_namespace('listings')
+
+
+@receiver(post_save, sender=get_user_model(), dispatch_uid='listing_card_user_saved')
+def user_saved(sender, instance, created, update_fields=None, **kwargs):
+    if created or (update_fields is not None and not PUBLIC_USER_FIELDS.intersection(update_fields)):
+        return
+    transaction.on_commit(lambda: cards.refresh_seller(instance))
+    bump_namespace_on_commit('listings')
+
+
+@receiver(post_save, sender=Category, dispatch_uid='listing_card_category_saved')
+@receiver(node_moved, sender=Category, dispatch_uid='listing_card_category_moved')
+def category_changed(sender, instance, **kwargs):
+    if kwargs.get('created'):
+        return
+    transaction.on_commit(lambda: cards.refresh_category_paths(instance))
+    bump_namespace_on_commit('listings')
+
+
+@receiver(post_save, sender=City, dispatch_uid='listing_card_city_saved')
+def city_saved(sender, instance, created, **kwargs):
+    if created:
+        return
+    transaction.on_commit(lambda: cards.refresh_city(instance))
+    bump_namespace_on_commit('listings')
+
+
+# =================================================================
+#  CATEGORY LISTING COUNTS
+# =================================================================
+# Adjusted in the writing transaction, from the state the listing was
+# loaded with (see Listing.from_db) to the state it's saved with.
+
+@receiver(pre_save, sender=Listing, dispatch_uid='category_counts_listing_saving')
+def listing_saving(sender, instance, **kwargs):
+    if instance._state.adding:
+        instance._counted_category_id = None
+    elif not hasattr(instance, '_counted_category_id'):
+        # Loaded with deferred fields: read the stored state.
+        stored = Listing.objects.filter(pk=instance.pk).values('category_id', 'is_active', 'is_sold').first()
+        instance._counted_category_id = (
+            stored['category_id'] if stored and stored['is_active'] and not stored['is_sold'] else None
+        )
+
+
+@receiver(post_save, sender=Listing, dispatch_uid='category_counts_listing_saved')
+def listing_counted(sender, instance, **kwargs):
+    counted = counted_category(instance)
+    listing_moved(instance._counted_category_id, counted)
+    instance._counted_category_id = counted
+
+
+@receiver(post_delete, sender=Listing, dispatch_uid='category_counts_listing_deleted')
+def listing_uncounted(sender, instance, **kwargs):
+    listing_moved(getattr(instance, '_counted_category_id', counted_category(instance)), None)
+
+
+@receiver(node_moved, sender=Category, dispatch_uid='category_counts_category_moved')
+def category_moved(sender, instance, **kwargs):
+    recompute_subtree_counts()
+
+
+# =================================================================
+#  MAP TILES
+# =================================================================
+# Listings are drawn on the 'listings' vector tile layer (see
+# places/vector_tiles.py) at their own location, else at their city's. A
+# listing write deletes the cached tiles around where it's drawn before and
+# after the write; a city write invalidates the whole layer.
+
+@receiver(pre_save, sender=Listing, dispatch_uid='map_tiles_listing_saving')
+def listing_tiles_saving(sender, instance, **kwargs):
+    if instance._state.adding:
+        instance._loaded_place = (None, None)
+    elif not hasattr(instance, '_loaded_place'):
+        # Loaded with deferred fields: read the stored position.
+        instance._loaded_place = Listing.objects.filter(pk=instance.pk).values_list('city_id', 'location').first()
+
+
+def _invalidate_listing_tiles(*places):
+    invalidate_cities_on_commit({city_id for city_id, _ in places})
+    invalidate_points_on_commit('listings', [location for _, location in places])
+
+
+@receiver(post_save, sender=Listing, dispatch_uid='map_tiles_listing_saved')
+def listing_tiles_saved(sender, instance, **kwargs):
+    place = (instance.city_id, instance.location)
+    _invalidate_listing_tiles(instance._loaded_place or (None, None), place)
+    instance._loaded_place = place
+
+
+@receiver(post_delete, sender=Listing, dispatch_uid='map_tiles_listing_deleted')
+def listing_tiles_deleted(sender, instance, **kwargs):
+    _invalidate_listing_tiles((instance.city_id, instance.location))
+
+
+@receiver(post_save, sender=City, dispatch_uid='map_tiles_city_saved')
+@receiver(post_delete, sender=City, dispatch_uid='map_tiles_city_deleted')
+def city_tiles_changed(sender, instance, **kwargs):
+    if not kwargs.get('created'):
+        bump_layer_on_commit('listings')
@@ -1,3 +1,526 @@
-from django.test import TestCase
+from base64 import b64encode
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+from importlib import import_module
+from unittest import mock
+from urllib.parse import parse_qs, urlsplit
 
-# Create your tests here.
+from django.apps import apps
+from django.contrib.auth import get_user_model
+from django.contrib.gis.geos import Point
+from django.core.cache import cache
+from django.db import DatabaseError, connection
+from django.db.models import Q
+from django.test import SimpleTestCase, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.exceptions import ValidationError
+from rest_framework.request import Request
+from rest_framework.test import APIClient, APIRequestFactory
+
+from categories.models import Category, CategoryField, Field
+from core.pagination import DistancePagination, KeysetPagination
+from .facets import compute_facets
+from locations.models import City, Country
+from .models import Listing, ListingCard, ListingFieldValue
+
+User = get_user_model()
+
+
+class ListingTestCase(TestCase):
+    """
+    A seller, a category and a city, with helpers writing listings the way
+    the app does: the card refresh and cache bumps run on commit.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.seller = User.objects.create_user(username='seller', email='seller@example.com', password='secret')
+        cls.other = User.objects.create_user(username='other', email='other@example.com', password='secret')
+        cls.category = Category.objects.create(name='Cars', slug='cars')
+        cls.country = Country.objects.create(name='Gibraltar', code='GI')
+        cls.city = City.objects.create(country=cls.country, name='Gibraltar')
+
+    def setUp(self):
+        # Responses are cached by namespace version, across tests too.
+        cache.clear()
+        self.client = APIClient()
+
+    def create_listing(self, title='Listing', **fields):
+        fields = {'category': self.category, 'author': self.seller, 'city': self.city, 'price': 100, **fields}
+        with self.captureOnCommitCallbacks(execute=True):
+            return Listing.objects.create(title=title, **fields)
+
+    def get_feed(self, url=None, **params):
+        response = self.client.get(url or reverse('api:listing-list-create'), params)
+        self.assertEqual(response.status_code, 200, response.content)
+        return response.json()
+
+    def walk(self, url, direction='next', **params):
+        """
+        Follows the `direction` links from `url`, returning the slugs of every
+        page and the last page itself.
+        """
+        pages = []
+        page = self.get_feed(url, **params)
+        pages.append([card['slug'] for card in page['results']])
+        while page[direction]:
+            page = self.get_feed(page[direction])
+            pages.append([card['slug'] for card in page['results']])
+        return pages, page
+
+
+populate_listing_cards = import_module('listings.migrations.0007_listingcard').populate_listing_cards
+
+
+def cursor(raw):
+    return b64encode(raw.encode(), altchars=b'-_').decode()
+
+
+# =================================================================
+#  LISTING CARDS
+# =================================================================
+
+class PopulateListingCardsMigrationTests(ListingTestCase):
+
+    def test_every_listing_gets_a_card(self):
+        listings = [self.create_listing(f'Listing {i}', is_active=i != 1) for i in range(3)]
+        # As the tables were before the migration: listings without cards.
+        ListingCard.objects.all().delete()
+
+        populate_listing_cards(apps, None)
+
+        cards = {card.pk: card for card in ListingCard.objects.all()}
+        self.assertEqual(set(cards), {listing.pk for listing in listings})
+        card = cards[listings[1].pk]
+        self.assertEqual((card.slug, card.title_en, card.is_active), (listings[1].slug, 'Listing 1', False))
+        self.assertEqual((card.category_path_en, card.city_name), (['Cars'], 'Gibraltar'))
+        self.assertEqual((card.seller_username, card.rating_count), ('seller', 0))
+        self.assertEqual(self.get_feed()['results'][0]['slug'], listings[2].slug)
+
+
+# =================================================================
+#  KEYSET PAGINATION
+# =================================================================
+
+class CursorCodecTests(SimpleTestCase):
+
+    def paginator(self, pagination_class=KeysetPagination, **params):
+        paginator = pagination_class()
+        request = Request(APIRequestFactory().get('/api/v1/listings/', params))
+        paginator.base_url = request.build_absolute_uri()
+        return paginator, request
+
+    def decode(self, link, pagination_class=KeysetPagination):
+        paginator, request = self.paginator(pagination_class, **parse_qs(urlsplit(link).query))
+        return paginator.decode_cursor(request)
+
+    def test_cursors_round_trip(self):
+        created_at = datetime(2025, 3, 1, 12, 30, 15, 123456, tzinfo=timezone.utc)
+        paginator, _ = self.paginator(page_size='5')
+        link = paginator.encode_cursor({'created_at': created_at, 'pk': 42}, reverse=False)
+        self.assertIn('page_size=5', link)
+        self.assertEqual(self.decode(link), ((created_at, 42), False))
+
+        link = paginator.encode_cursor({'created_at': created_at, 'pk': 42}, reverse=True)
+        self.assertEqual(self.decode(link), ((created_at, 42), True))
+
+    def test_distance_cursors_round_trip_floats_exactly(self):
+        paginator, _ = self.paginator(DistancePagination)
+        distance = 1234.5678901234567
+        link = paginator.encode_cursor({'distance': distance, 'pk': 7}, reverse=False)
+        self.assertEqual(self.decode(link, DistancePagination), ((distance, 7), False))
+
+    def test_no_cursor_is_the_first_page(self):
+        paginator, request = self.paginator()
+        self.assertEqual(paginator.decode_cursor(request), (None, False))
+
+    def test_tampered_cursors_are_rejected(self):
+        for pagination_class, encoded in (
+            (KeysetPagination, 'not base64!'),
+            (KeysetPagination, cursor('f|yesterday|1')),
+            (KeysetPagination, cursor('f|2025-03-01T12:00:00+00:00')),
+            (KeysetPagination, cursor('x|2025-03-01T12:00:00+00:00|1')),
+            (KeysetPagination, cursor('f|2025-03-01T12:00:00+00:00|0')),
+            (KeysetPagination, cursor(f'f|2025-03-01T12:00:00+00:00|{2 ** 63}')),
+            (KeysetPagination, b64encode('f|é|1'.encode(), altchars=b'-_').decode()),
+            (DistancePagination, cursor('f|nan|1')),
+            (DistancePagination, cursor('f|inf|1')),
+            # Distance pages only go forward.
+            (DistancePagination, cursor('r|1.5|1')),
+        ):
+            with self.subTest(encoded=encoded):
+                paginator, request = self.paginator(pagination_class, cursor=encoded)
+                with self.assertRaises(ValidationError) as raised:
+                    paginator.decode_cursor(request)
+                self.assertIn('cursor', raised.exception.detail)
+
+
+class FeedPaginationTests(ListingTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.slugs = [self.create_listing(f'Listing {i}').slug for i in range(5)]
+        # Newest first: listing 4 down to listing 0, with 2 and 3 created in
+        # the same instant so only the pk breaks their tie.
+        now = datetime(2025, 3, 1, tzinfo=timezone.utc)
+        for slug, minutes in zip(self.slugs, (0, 1, 2, 2, 3)):
+            ListingCard.objects.filter(slug=slug).update(created_at=now + timedelta(minutes=minutes))
+        self.newest_first = self.slugs[::-1]
+
+    def test_walking_forward_and_back(self):
+        url = reverse('api:listing-list-create')
+        pages, last = self.walk(url, page_size=2)
+        self.assertEqual(pages, [self.newest_first[0:2], self.newest_first[2:4], self.newest_first[4:]])
+        self.assertIsNone(last['next'])
+        self.assertIsNotNone(last['previous'])
+
+        pages, first = self.walk(last['previous'], direction='previous')
+        self.assertEqual(pages, [self.newest_first[2:4], self.newest_first[0:2]])
+        self.assertIsNone(first['previous'])
+        self.assertIsNotNone(first['next'])
+
+    def test_edges(self):
+        url = reverse('api:listing-list-create')
+        first = self.get_feed(url, page_size=5)
+        self.assertEqual([card['slug'] for card in first['results']], self.newest_first)
+        self.assertIsNone(first['next'])
+        self.assertIsNone(first['previous'])
+
+        # A page ending exactly on the last row has no next link.
+        second = self.get_feed(self.get_feed(url, page_size=3)['next'])
+        self.assertEqual([card['slug'] for card in second['results']], self.newest_first[3:])
+        self.assertIsNone(second['next'])
+
+    def test_ties_on_created_at_are_neither_skipped_nor_repeated(self):
+        ListingCard.objects.update(created_at=datetime(2025, 3, 1, tzinfo=timezone.utc))
+        pages, _ = self.walk(reverse('api:listing-list-create'), page_size=2)
+        slugs = [slug for page in pages for slug in page]
+        self.assertEqual(slugs, self.slugs[::-1])
+
+    def test_tampered_cursor_is_a_400(self):
+        response = self.client.get(reverse('api:listing-list-create'), {'cursor': 'garbage'})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('cursor', response.json())
+
+
+class DistancePaginationTests(ListingTestCase):
+
+    def setUp(self):
+        super().setUp()
+        # North of the search point, nearest first; 'Tied' is exactly as
+        # far as 'Third', so only the pk orders them.
+        offsets = [('First', 1), ('Second', 2), ('Third', 3), ('Tied', 3), ('Fifth', 5), ('Sixth', 8), ('Last', 13)]
+        self.nearest_first = [
+            self.create_listing(title, location=Point(-5.35, 36.14 + offset * 0.001, srid=4326)).slug
+            for title, offset in offsets
+        ]
+        self.create_listing('Nowhere', city=None)
+
+    def test_walking_forward_over_several_pages(self):
+        url = reverse('api:listing-list-create')
+        with CaptureQueriesContext(connection) as queries:
+            pages, last = self.walk(url, near='36.14,-5.35', page_size=2)
+
+        self.assertEqual(pages, [
+            self.nearest_first[0:2], self.nearest_first[2:4], self.nearest_first[4:6], self.nearest_first[6:],
+        ])
+        self.assertIsNone(last['next'])
+        self.assertIsNone(last['previous'])
+        # Later pages are bounded by the distance of the cursor.
+        paged = [query['sql'] for query in queries.captured_queries if '<->' in query['sql'] and '>=' in query['sql']]
+        self.assertEqual(len(paged), 3)
+
+    def test_every_page_is_ordered_by_distance_without_previous_links(self):
+        page = self.get_feed(near='36.14,-5.35', page_size=3)
+        distances = []
+        while True:
+            self.assertIsNone(page['previous'])
+            distances += [card['distance'] for card in page['results']]
+            if not page['next']:
+                break
+            page = self.get_feed(page['next'])
+        self.assertEqual(len(distances), len(self.nearest_first))
+        self.assertEqual(distances, sorted(distances))
+
+    def test_radius_bounds_the_pages(self):
+        pages, _ = self.walk(reverse('api:listing-list-create'), near='36.14,-5.35', radius='0.6', page_size=2)
+        self.assertEqual(pages, [self.nearest_first[0:2], self.nearest_first[2:4], self.nearest_first[4:5]])
+
+
+# =================================================================
+#  FACETS
+# =================================================================
+
+class FacetTests(ListingTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.vans = Category.objects.create(name='Vans', slug='vans', parent=self.category)
+        self.create_listing('Car', price=50)
+        self.create_listing('Van', category=self.vans, price=700)
+        self.create_listing('Sold van', category=self.vans, price=700, is_sold=True)
+
+    def test_two_round_trips_with_a_cached_tree(self):
+        base = ListingCard.objects.filter(is_active=True)
+        compute_facets(base, {})
+        with self.assertNumQueries(2):
+            facets = compute_facets(base, {'is_sold': Q(is_sold=False)})
+
+        self.assertEqual(facets['total'], 2)
+        self.assertEqual(
+            [(category['slug'], category['count']) for category in facets['category']],
+            [('cars', 2), ('vans', 1)],
+        )
+        self.assertEqual(facets['city'], [{'id': self.city.pk, 'name': 'Gibraltar', 'count': 2}])
+        # Disjunctive: the is_sold counts ignore the is_sold filter.
+        self.assertEqual(facets['is_sold'], [{'value': True, 'count': 1}, {'value': False, 'count': 2}])
+
+    def test_the_tree_is_reloaded_after_a_category_change(self):
+        base = ListingCard.objects.filter(is_active=True)
+        compute_facets(base, {})
+        self.vans.name = 'Vans and trucks'
+        with self.captureOnCommitCallbacks(execute=True):
+            self.vans.save()
+        names = [category['name'] for category in compute_facets(base, {})['category']]
+        self.assertEqual(names, ['Cars', 'Vans and trucks'])
+
+
+# =================================================================
+#  ATTRIBUTE FILTERS
+# =================================================================
+
+class AttributeFilterTests(ListingTestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.mileage = CategoryField.objects.create(
+            category=cls.category,
+            field=Field.objects.create(name='Mileage', field_type=Field.FieldType.NUMBER),
+        )
+        cls.colour = CategoryField.objects.create(
+            category=cls.category,
+            field=Field.objects.create(name='Colour', field_type=Field.FieldType.TEXT),
+        )
+        cls.automatic = CategoryField.objects.create(
+            category=cls.category,
+            field=Field.objects.create(name='Automatic', field_type=Field.FieldType.BOOLEAN),
+        )
+
+    def setUp(self):
+        super().setUp()
+        self.cheap = self.create_listing('Old car')
+        self.new = self.create_listing('New car')
+        for listing, mileage, colour, automatic in (
+            (self.cheap, '150000', 'red', 'no'),
+            (self.new, '9000.5', 'blue', 'yes'),
+        ):
+            ListingFieldValue.objects.create(listing=listing, field=self.mileage, value=mileage)
+            ListingFieldValue.objects.create(listing=listing, field=self.colour, value=colour)
+            ListingFieldValue.objects.create(listing=listing, field=self.automatic, value=automatic)
+
+    def titles(self, **params):
+        return {card['title'] for card in self.get_feed(**params)['results']}
+
+    def test_number_lookups_use_the_typed_column(self):
+        self.assertEqual(self.titles(**{'attr.mileage__lt': '100000'}), {'New car'})
+        self.assertEqual(self.titles(**{'attr.mileage__gte': '150000'}), {'Old car'})
+        self.assertEqual(self.titles(**{'attr.mileage__gte': '9000', 'attr.mileage__lt': '9001'}), {'New car'})
+        self.assertEqual(self.titles(**{'attr.mileage__in': '150000,1'}), {'Old car'})
+
+    def test_text_and_boolean_lookups(self):
+        self.assertEqual(self.titles(**{'attr.colour__in': 'red,blue'}), {'Old car', 'New car'})
+        self.assertEqual(self.titles(**{'attr.colour': 'blue'}), {'New car'})
+        self.assertEqual(self.titles(**{'attr.automatic': 'yes'}), {'New car'})
+        self.assertEqual(self.titles(**{'attr.automatic': 'false'}), {'Old car'})
+
+    def test_invalid_attribute_filters_return_400(self):
+        url = reverse('api:listing-list-create')
+        for param, value in (
+            ('attr.unknown__lt', '1'),
+            ('attr.mileage__contains', '1'),
+            ('attr.colour__lt', 'red'),
+            ('attr.mileage__lt', 'many'),
+            ('attr.mileage__in', '1,many'),
+            ('attr.automatic', 'maybe'),
+        ):
+            with self.subTest(param=param, value=value):
+                response = self.client.get(url, {param: value})
+                self.assertEqual(response.status_code, 400)
+                self.assertIn(param, response.json())
+
+
+class CategoryChangeTests(ListingTestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.bikes = Category.objects.create(name='Bikes', slug='bikes')
+        cls.colour = Field.objects.create(name='Colour', field_type=Field.FieldType.TEXT)
+        cls.mileage = CategoryField.objects.create(
+            category=cls.category,
+            field=Field.objects.create(name='Mileage', field_type=Field.FieldType.NUMBER),
+        )
+        cls.car_colour = CategoryField.objects.create(category=cls.category, field=cls.colour)
+        cls.bike_colour = CategoryField.objects.create(category=cls.bikes, field=cls.colour)
+
+    def setUp(self):
+        super().setUp()
+        self.client.force_authenticate(self.seller)
+        self.listing = self.create_listing('Moved')
+        ListingFieldValue.objects.create(listing=self.listing, field=self.mileage, value='1000')
+        ListingFieldValue.objects.create(listing=self.listing, field=self.car_colour, value='red')
+
+    def stored_values(self):
+        return set(self.listing.field_values.values_list('field', 'value'))
+
+    def test_update_drops_the_old_category_values(self):
+        url = reverse('api:listing-detail', kwargs={'slug': self.listing.slug})
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.patch(
+                url, {'category': self.bikes.pk, 'attributes': {'colour': 'blue'}}, format='json',
+            )
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(self.stored_values(), {(self.bike_colour.pk, 'blue')})
+        self.assertEqual(self.get_feed(**{'attr.mileage__gte': '0'})['results'], [])
+
+    def test_update_keeping_the_category_keeps_the_values(self):
+        url = reverse('api:listing-detail', kwargs={'slug': self.listing.slug})
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.patch(url, {'title': 'Renamed'}, format='json')
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(self.stored_values(), {(self.mileage.pk, '1000'), (self.car_colour.pk, 'red')})
+
+    def test_batch_update_drops_the_old_category_values(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                reverse('api:listing-batch'), [{'slug': self.listing.slug, 'category': self.bikes.pk}], format='json',
+            )
+        self.assertEqual(response.json()['updated'], 1, response.content)
+        self.assertEqual(self.stored_values(), set())
+
+
+class TypedValueTests(ListingTestCase):
+
+    def typed(self, field_type, raw):
+        value = ListingFieldValue(value=raw)
+        value.set_typed_value(field_type)
+        return value.value_number, value.value_boolean
+
+    def test_numbers(self):
+        self.assertEqual(self.typed(Field.FieldType.NUMBER, ' 12.5 '), (Decimal('12.5'), None))
+        self.assertEqual(self.typed(Field.FieldType.NUMBER, 'twelve'), (None, None))
+        self.assertEqual(self.typed(Field.FieldType.NUMBER, 'NaN'), (None, None))
+        # Too large for the typed column.
+        self.assertEqual(self.typed(Field.FieldType.NUMBER, '1e20'), (None, None))
+
+    def test_booleans(self):
+        self.assertEqual(self.typed(Field.FieldType.BOOLEAN, 'Sí'), (None, True))
+        self.assertEqual(self.typed(Field.FieldType.BOOLEAN, 'off'), (None, False))
+        self.assertEqual(self.typed(Field.FieldType.BOOLEAN, 'maybe'), (None, None))
+
+    def test_text_is_never_typed(self):
+        self.assertEqual(self.typed(Field.FieldType.TEXT, '12'), (None, None))
+
+
+# =================================================================
+#  BATCH CREATE / UPDATE
+# =================================================================
+
+class ListingBatchTests(ListingTestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.mileage = CategoryField.objects.create(
+            category=cls.category,
+            field=Field.objects.create(name='Mileage', field_type=Field.FieldType.NUMBER),
+        )
+
+    def setUp(self):
+        super().setUp()
+        self.client.force_authenticate(self.seller)
+
+    def post_batch(self, items):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(reverse('api:listing-batch'), items, format='json')
+        self.assertEqual(response.status_code, 200, response.content)
+        return response.json()
+
+    def new_item(self, title, **fields):
+        return {'title': title, 'price': '100.00', 'category': self.category.pk, **fields}
+
+    def test_creates_and_updates_in_one_batch(self):
+        existing = self.create_listing('Old car', price=100)
+        body = self.post_batch([
+            {'slug': existing.slug, 'price': '250.00'},
+            self.new_item('New car', attributes={'mileage': 9000}),
+        ])
+
+        self.assertEqual((body['created'], body['updated'], body['invalid']), (1, 1, 0))
+        updated, created = body['results']
+        self.assertEqual((updated['index'], updated['status'], updated['slug']), (0, 'updated', existing.slug))
+        self.assertEqual((created['index'], created['status']), (1, 'created'))
+
+        existing.refresh_from_db()
+        self.assertEqual(existing.price, Decimal('250.00'))
+        self.assertEqual(existing.title, 'Old car')
+
+        # The slug was built before the INSERT, from the pre-generated public_id.
+        listing = Listing.objects.get(slug=created['slug'])
+        self.assertEqual(listing.author, self.seller)
+        self.assertEqual(listing.slug, f'new-car-{str(listing.public_id)[:8]}')
+        # Bulk writes send no post_save: the cards are refreshed explicitly.
+        self.assertTrue(ListingCard.objects.filter(pk=listing.pk, slug=listing.slug).exists())
+
+    def test_attributes_are_bulk_created_with_typed_values(self):
+        items = [self.new_item(f'Car {i}', attributes={'mileage': 1000 * i}) for i in range(3)]
+        with CaptureQueriesContext(connection) as queries:
+            body = self.post_batch(items)
+        self.assertEqual(body['created'], 3)
+
+        inserts = [
+            query for query in queries.captured_queries
+            if query['sql'].startswith('INSERT INTO "listings_listingfieldvalue"')
+        ]
+        self.assertEqual(len(inserts), 1)
+        values = ListingFieldValue.objects.filter(field=self.mileage).order_by('value_number')
+        self.assertEqual([value.value_number for value in values], [0, 1000, 2000])
+        self.assertEqual(values[2].listing.title, 'Car 2')
+
+    def test_invalid_items_are_reported_and_skipped(self):
+        body = self.post_batch([
+            self.new_item('First'),
+            self.new_item('', price='cheap', attributes={'mileage': 'far'}),
+            self.new_item('Third'),
+        ])
+
+        self.assertEqual((body['created'], body['updated'], body['invalid']), (2, 0, 1))
+        invalid = body['results'][1]
+        self.assertEqual((invalid['index'], invalid['status']), (1, 'invalid'))
+        self.assertIn('title', invalid['errors'])
+        self.assertIn('price', invalid['errors'])
+        self.assertEqual(
+            set(Listing.objects.values_list('title', flat=True)), {'First', 'Third'},
+        )
+
+    def test_a_failed_write_rolls_back_the_whole_batch(self):
+        existing = self.create_listing('Old car', price=100)
+        items = [{'slug': existing.slug, 'price': '250.00'}, self.new_item('New car', attributes={'mileage': 1})]
+        with mock.patch('listings.batch.save_field_values', side_effect=DatabaseError):
+            with self.assertRaises(DatabaseError):
+                self.client.post(reverse('api:listing-batch'), items, format='json')
+
+        existing.refresh_from_db()
+        self.assertEqual(existing.price, Decimal('100.00'))
+        self.assertFalse(Listing.objects.filter(title='New car').exists())
+
+    def test_listings_of_other_users_are_not_updated(self):
+        theirs = self.create_listing('Their car', author=self.other, price=100)
+        body = self.post_batch([{'slug': theirs.slug, 'price': '1.00'}])
+
+        self.assertEqual(body['invalid'], 1)
+        self.assertEqual(body['results'][0]['errors'], {'slug': ['You have no listing with this slug.']})
+        theirs.refresh_from_db()
+        self.assertEqual(theirs.price, Decimal('100.00'))
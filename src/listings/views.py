@@ -1,29 +1,90 @@
 # src/listings/views.py
 
+from django.db.models import Count, Max, OuterRef, Subquery
 from rest_framework import generics
+from rest_framework.exceptions import ValidationError
 from rest_framework.permissions import AllowAny, IsAuthenticated
-from .models import Listing
-from .serializers import ListingSerializer, ListingCreateSerializer
+from rest_framework.response import Response
+from .models import Listing, ListingCard, ListingImage
+from .serializers import (
+    ListingSerializer, ListingCardSerializer, ListingCreateSerializer, ListingUpdateSerializer,
+    ListingBatchItemSerializer, NearbyListingCardSerializer,
+)
+from .batch import MAX_BATCH_SIZE, save_listing_batch
 from .permissions import IsOwnerOrReadOnly
+from .filters import ListingCardFilter, ListingFilterBackend, distance_from
+from .facets import compute_facets
+from reviews.models import Review
+from core.cache import cache_response
+from core.conditional import ConditionalGetMixin
+from core.pagination import DistancePagination, KeysetPagination
+from core.tiles import parse_lat_lng
+from core.views import CompiledListMixin, SparseFieldsetsMixin
 
 # =================================================================
 #  API VIEWS
 # =================================================================
 
-class ListingListCreateView(generics.ListCreateAPIView):
+class ListingListCreateView(SparseFieldsetsMixin, CompiledListMixin, generics.ListCreateAPIView):
     """
     API endpoint that allows listings to be viewed or created.
-    - GET: returns a list of all active listings.
+    - GET: returns a cursor-paginated feed of active listing cards, newest
+      first, filtered by `ListingCardFilter`. The first page also carries
+      facet counts. Cards are rendered by the compiled serializer.
+      With `?near=lat,lng` (and optionally `&radius=<km>`), the located
+      cards are sorted by distance instead, nearest first, with their
+      `distance` in metres, still combined with every other filter.
     - POST: creates a new listing.
     """
-    queryset = Listing.objects.filter(is_active=True).select_related(
-        'owner', 'category', 'city'
-    ).prefetch_related('images')
+    queryset = ListingCard.objects.filter(is_active=True)
+    pagination_class = KeysetPagination
+    filter_backends = [ListingFilterBackend]
+    filterset_class = ListingCardFilter
+
+    def get_near(self):
+        """
+        Returns the `(lat, lng)` of a GET `?near=` search, else None (an
+        invalid value is reported by the filterset).
+        """
+        if self.request.method != 'GET':
+            return None
+        try:
+            return parse_lat_lng(self.request.query_params['near'])
+        except (KeyError, ValueError):
+            return None
+
+    @property
+    def paginator(self):
+        if not hasattr(self, '_paginator'):
+            self._paginator = DistancePagination() if self.get_near() else self.pagination_class()
+        return self._paginator
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        near = self.get_near()
+        if near is not None:
+            # Paged on by DistancePagination: ORDER BY location <-> point.
+            queryset = queryset.annotate(distance=distance_from(*near))
+        return queryset
+
+    @cache_response('listings')
+    def list(self, request, *args, **kwargs):
+        response = super().list(request, *args, **kwargs)
+        # Facets don't change from page to page, so only the first page
+        # (the one without a cursor) pays for them.
+        if not request.query_params.get(self.paginator.cursor_query_param):
+            response.data['facets'] = compute_facets(
+                ListingCard.objects.filter(is_active=True),
+                self.filterset.get_predicates(),
+            )
+        return response
 
     def get_serializer_class(self):
         if self.request.method == 'POST':
             return ListingCreateSerializer
-        return ListingSerializer
+        if self.get_near():
+            return NearbyListingCardSerializer
+        return ListingCardSerializer
 
     def get_permissions(self):
         if self.request.method == 'POST':
@@ -31,31 +92,94 @@ class ListingListCreateView(generics.ListCreateAPIView):
         return [AllowAny()]
 
     def perform_create(self, serializer):
-        serializer.save(owner=self.request.user)
+        serializer.save(author=self.request.user)
 
 
-class ListingDetailView(generics.RetrieveUpdateDestroyAPIView):
+class ListingBatchView(generics.GenericAPIView):
+    """
+    API endpoint for professional sellers to create or update many listings
+    at once (e.g. a dealer's stock feed).
+    - POST: a JSON array of listings (see ListingBatchItemSerializer). Items
+      with a `slug` update that listing of the user; the others are created.
+      Every valid item is written in one transaction; the response holds one
+      result per item, in input order, with its status, slug and errors.
+    """
+    serializer_class = ListingBatchItemSerializer
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request, *args, **kwargs):
+        items = request.data
+        if not isinstance(items, list):
+            raise ValidationError({'non_field_errors': ['Expected a list of listings.']})
+        if len(items) > MAX_BATCH_SIZE:
+            raise ValidationError({'non_field_errors': [
+                f'A batch can hold at most {MAX_BATCH_SIZE} listings.'
+            ]})
+
+        results = save_listing_batch(request.user, items, self.get_serializer_context())
+        counts = {'created': 0, 'updated': 0, 'invalid': 0}
+        for result in results:
+            counts[result['status']] += 1
+        return Response({**counts, 'results': results})
+
+
+class ListingDetailView(ConditionalGetMixin, SparseFieldsetsMixin, generics.RetrieveUpdateDestroyAPIView):
     """
     API endpoint to retrieve, update, or delete a single listing by its slug.
-    - GET: retrieve a listing.
-    - PUT/PATCH: update a listing.
+    - GET: retrieve a listing. Supports ETag / If-Modified-Since (304).
+    - PUT/PATCH: update a listing and its dynamic attributes.
     - DELETE: delete a listing.
     """
-    queryset = Listing.objects.all().select_related(
-        'owner', 'category', 'city'
-    ).prefetch_related('images')
+    # Relations are joined/prefetched by SparseFieldsetsMixin, only if rendered.
+    queryset = Listing.objects.all()
     
     serializer_class = ListingSerializer
     permission_classes = [IsOwnerOrReadOnly]
     lookup_field = 'slug'
+    default_expand = ('owner', 'images')
+
+    def get_serializer_class(self):
+        if self.request.method in ('PUT', 'PATCH'):
+            return ListingUpdateSerializer
+        return ListingSerializer
+
+    def get_condition(self, request):
+        """
+        Describes the listing with one query: its own `updated_at`, change
+        stamps (latest `updated_at` and count) of its images and reviews,
+        and the related values rendered in the payload. Nothing is prefetched.
+        """
+        images = ListingImage.objects.filter(listing=OuterRef('pk')).order_by().values('listing')
+        reviews = Review.objects.filter(listing=OuterRef('pk')).order_by().values('listing')
+        state = Listing.objects.filter(slug=self.kwargs[self.lookup_field]).values(
+            'pk', 'updated_at',
+            'author__username', 'author__email', 'author__avatar', 'author__avatar_variants',
+            'category__name_en', 'category__name_es', 'city__name',
+        ).annotate(
+            images_changed=Subquery(images.annotate(value=Max('updated_at')).values('value')),
+            images_count=Subquery(images.annotate(value=Count('pk')).values('value')),
+            reviews_changed=Subquery(reviews.annotate(value=Max('updated_at')).values('value')),
+            reviews_count=Subquery(reviews.annotate(value=Count('pk')).values('value')),
+        ).first()
+        if state is None:
+            return None
+        stamps = (state['updated_at'], state['images_changed'], state['reviews_changed'])
+        return tuple(state.values()), max(stamp for stamp in stamps if stamp is not None)
+
+    @cache_response('listings')
+    def retrieve(self, request, *args, **kwargs):
+        return super().retrieve(request, *args, **kwargs)
 
 
-class MyListingsView(generics.ListAPIView):
+class MyListingsView(ConditionalGetMixin, SparseFieldsetsMixin, CompiledListMixin, generics.ListAPIView):
     """
     API endpoint to list all listings owned by the currently authenticated user.
+    The feed of listing cards is cursor-paginated, newest first, and supports
+    ETag / If-Modified-Since (304).
     """
-    serializer_class = ListingSerializer
+    serializer_class = ListingCardSerializer
     permission_classes = [IsAuthenticated] # Only logged-in users can see their listings
+    pagination_class = KeysetPagination
 
     def get_queryset(self):
         """
@@ -63,6 +187,15 @@ class MyListingsView(generics.ListAPIView):
         for the currently authenticated user.
         """
         user = self.request.user
-        return Listing.objects.filter(owner=user).select_related(
-            'owner', 'category', 'city'
-        ).prefetch_related('images').order_by('-created_at')
\ No newline at end of file
+        # The ordering is applied by the paginator: ('-created_at', '-pk').
+        return ListingCard.objects.filter(author=user)
+
+    def get_condition(self, request):
+        """
+        Every change to one of the user's listings rewrites its card, so the
+        number of cards and their latest `updated_at` describe the whole feed.
+        """
+        state = self.get_queryset().order_by().aggregate(
+            count=Count('pk'), last_modified=Max('updated_at'),
+        )
+        return (request.user.pk, state['count'], state['last_modified']), state['last_modified']
\ No newline at end of file
@@ -10,7 +10,7 @@ class CountryAdmin(admin.ModelAdmin):
 
 @admin.register(City)
 class CityAdmin(admin.ModelAdmin): # <-- THE ONLY CHANGE IS HERE
-    list_display = ('name', 'country')
+    list_display = ('name', 'country', 'population', 'geoname_id')
     list_filter = ('country',)
     search_fields = ('name',)
     # These settings help to center the map by default
@@ -0,0 +1,197 @@
+# src/locations/geocoder.py
+
+import math
+import threading
+import time
+from array import array
+
+from django.db.models import FloatField, Func
+
+from core.cache import get_namespace_versions
+from .models import City
+
+# =================================================================
+#  IN-PROCESS REVERSE GEOCODER
+# =================================================================
+# Answers "which City is nearest to this point?" from memory, with no
+# database round trip: every worker loads the city points once into a
+# static k-d tree and keeps it until the 'cities' cache namespace is bumped
+# (on any City write, see locations/signals.py, and by the gazetteer
+# import). The version is checked at most every VERSION_CHECK_INTERVAL
+# seconds, so a query usually costs only the tree walk: O(log n) node
+# visits, tens of microseconds for 200k cities. The batch form amortizes
+# the version check over a whole import batch.
+#
+# Points are stored as 3-d unit vectors rather than (lng, lat), so the
+# straight-line distance between two of them grows with their great-circle
+# distance: nearest neighbours are exact everywhere, across the
+# antimeridian and near the poles included.
+
+NAMESPACE = 'cities'
+VERSION_CHECK_INTERVAL = 5
+
+EARTH_RADIUS_KM = 6371.0088
+
+
+def _unit_vector(lat, lng):
+    lat, lng = math.radians(lat), math.radians(lng)
+    cos_lat = math.cos(lat)
+    return cos_lat * math.cos(lng), cos_lat * math.sin(lng), math.sin(lat)
+
+
+def _chord_to_km(squared_chord):
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(squared_chord) / 2))
+
+
+def _km_to_chord(km):
+    return (2 * math.sin(min(km / EARTH_RADIUS_KM, math.pi) / 2)) ** 2
+
+
+class KDTree:
+    """
+    A static 3-d tree over `(key, x, y, z)` items, stored implicitly: the
+    node of a slice [lo, hi) of the arrays is its middle item, which splits
+    the slice on the axis of its depth. No per-node objects are allocated.
+    """
+
+    def __init__(self, items):
+        items = list(items)
+        self._build(items, 0, len(items), 0)
+        self.keys = [item[0] for item in items]
+        self.xs = array('d', (item[1] for item in items))
+        self.ys = array('d', (item[2] for item in items))
+        self.zs = array('d', (item[3] for item in items))
+
+    def __len__(self):
+        return len(self.keys)
+
+    @staticmethod
+    def _build(items, lo, hi, depth):
+        # Iterative, so a skewed input can't hit the recursion limit.
+        stack = [(lo, hi, depth)]
+        while stack:
+            lo, hi, depth = stack.pop()
+            if hi - lo <= 1:
+                continue
+            axis = depth % 3 + 1
+            items[lo:hi] = sorted(items[lo:hi], key=lambda item: item[axis])
+            mid = (lo + hi) // 2
+            stack.append((lo, mid, depth + 1))
+            stack.append((mid + 1, hi, depth + 1))
+
+    def nearest(self, x, y, z, max_squared=math.inf):
+        """
+        Returns `(squared distance, key)` of the item nearest to `(x, y, z)`,
+        or `(inf, None)` when none is closer than `max_squared`.
+        """
+        xs, ys, zs = self.xs, self.ys, self.zs
+        best, best_key = max_squared, None
+        # (lo, hi, depth, squared distance from the point to the slab).
+        stack = [(0, len(self.keys), 0, 0.0)]
+        while stack:
+            lo, hi, depth, bound = stack.pop()
+            if lo >= hi or bound >= best:
+                continue
+            mid = (lo + hi) // 2
+            dx, dy, dz = x - xs[mid], y - ys[mid], z - zs[mid]
+            distance = dx * dx + dy * dy + dz * dz
+            if distance < best:
+                best, best_key = distance, self.keys[mid]
+            split = (dx, dy, dz)[depth % 3]
+            below, above = (lo, mid, depth + 1), (mid + 1, hi, depth + 1)
+            near, far = (below, above) if split < 0 else (above, below)
+            # The far side is only searched if the splitting plane is closer
+            # than the best match found by then.
+            stack.append((*far, split * split))
+            stack.append((*near, 0.0))
+        if best_key is None:
+            return math.inf, None
+        return best, best_key
+
+
+def _coordinate(function):
+    return Func('location', function=function, output_field=FloatField())
+
+
+class ReverseGeocoder:
+    """
+    The per-process cache of the city tree. Thread-safe: queries read the
+    current tree, and a reload swaps in a new one.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._tree = None
+        self._version = None
+        self._checked_at = 0.0
+
+    def load(self):
+        """
+        Builds the tree from every located city (one query).
+        """
+        rows = City.objects.filter(location__isnull=False).order_by().values_list(
+            'pk', _coordinate('ST_Y'), _coordinate('ST_X'),
+        )
+        return KDTree((pk, *_unit_vector(lat, lng)) for pk, lat, lng in rows)
+
+    def get_tree(self):
+        """
+        Returns the tree, rebuilt first when the 'cities' version changed.
+        """
+        now = time.monotonic()
+        if self._tree is not None and now - self._checked_at < VERSION_CHECK_INTERVAL:
+            return self._tree
+        with self._lock:
+            if self._tree is not None and now - self._checked_at < VERSION_CHECK_INTERVAL:
+                return self._tree
+            version = get_namespace_versions([NAMESPACE])[NAMESPACE]
+            if self._tree is None or version != self._version:
+                self._tree, self._version = self.load(), version
+            self._checked_at = now
+        return self._tree
+
+    def nearest(self, lat, lng, max_distance=None):
+        """
+        Returns `(city pk, distance in km)` of the city nearest to a WGS84
+        point, or `(None, None)` when there is none within `max_distance` km.
+        """
+        return self.nearest_many([(lat, lng)], max_distance)[0]
+
+    def nearest_many(self, points, max_distance=None):
+        """
+        The batch form of `nearest()`: one result per `(lat, lng)` of
+        `points`, in order (None points give `(None, None)`), for importers.
+        """
+        tree = self.get_tree()
+        max_squared = math.inf if max_distance is None else _km_to_chord(max_distance)
+        results = []
+        for point in points:
+            if point is None:
+                results.append((None, None))
+                continue
+            squared, pk = tree.nearest(*_unit_vector(*point), max_squared=max_squared)
+            results.append((pk, None if pk is None else _chord_to_km(squared)))
+        return results
+
+    def clear(self):
+        with self._lock:
+            self._tree = self._version = None
+
+
+geocoder = ReverseGeocoder()
+
+
+def nearest_city_id(lat, lng, max_distance=None):
+    """
+    Returns the pk of the City nearest to a WGS84 point, or None when there
+    is none within `max_distance` km.
+    """
+    return geocoder.nearest(lat, lng, max_distance)[0]
+
+
+def nearest_city_ids(points, max_distance=None):
+    """
+    Returns the pks of the cities nearest to `(lat, lng)` points (None
+    where there is none within `max_distance` km), in order.
+    """
+    return [pk for pk, _ in geocoder.nearest_many(points, max_distance)]
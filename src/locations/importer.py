@@ -0,0 +1,344 @@
+# src/locations/importer.py
+
+import io
+import json
+import os
+import zipfile
+from collections import Counter, namedtuple
+
+from django.contrib.gis.geos import Point
+from django.db import transaction
+from django.db.models import Q
+
+from core.cache import bump_namespace_on_commit
+from places.vector_tiles import bump_layer_on_commit
+from .geocoder import NAMESPACE as GEOCODER_NAMESPACE
+from .models import City, Country
+
+# =================================================================
+#  STREAMING GAZETTEER IMPORT
+# =================================================================
+# Imports cities from files too large to load at once, one batch at a time:
+#
+# - GeoNames dumps (`ES.txt`, `ES.zip`, `cities500.txt`, ...): tab-separated,
+#   19 columns, one place per line. Only populated places (feature class P)
+#   are imported.
+# - JSON lines: one object per line with "name", "country_code",
+#   "latitude", "longitude" and optionally "geonameid", "population" and
+#   "country_name".
+# - The legacy nested format of data/locations.json (a small array of
+#   countries with their cities, loaded whole).
+#
+# Countries are resolved in memory (loaded once, created on first sight
+# when their name is known). Each batch is upserted with a single
+# INSERT ... ON CONFLICT (country, name) DO UPDATE, in its own transaction,
+# and the number of lines consumed is checkpointed after each commit, so an
+# interrupted import resumes where it stopped. Re-importing is idempotent:
+# since a city name is unique within its country, the most populous place
+# of a shared name wins (ties go to the lowest GeoNames id), whatever the
+# order the rows come in.
+
+DEFAULT_BATCH_SIZE = 5000
+
+# Columns of the GeoNames "geoname" table dump.
+GEONAMES_COLUMNS = (
+    'geonameid', 'name', 'asciiname', 'alternatenames', 'latitude', 'longitude',
+    'feature_class', 'feature_code', 'country_code', 'cc2', 'admin1_code',
+    'admin2_code', 'admin3_code', 'admin4_code', 'population', 'elevation',
+    'dem', 'timezone', 'modification_date',
+)
+POPULATED_PLACE = 'P'
+
+NAME_MAX_LENGTH = City._meta.get_field('name').max_length
+
+GazetteerRow = namedtuple(
+    'GazetteerRow', 'geoname_id name country_code latitude longitude population country_name',
+)
+
+
+# --- Reading ---
+
+def open_lines(path):
+    """
+    Returns an iterator over the text lines of `path`. A .zip archive is
+    read through its first .txt member (as GeoNames ships them), without
+    extracting it.
+    """
+    if path.endswith('.zip'):
+        archive = zipfile.ZipFile(path)
+        member = next(
+            (name for name in archive.namelist() if name.endswith('.txt') and not name.startswith('readme')),
+            None,
+        )
+        if member is None:
+            raise ValueError(f'{path} contains no .txt file.')
+        return io.TextIOWrapper(archive.open(member), encoding='utf-8')
+    return open(path, 'r', encoding='utf-8')
+
+
+def parse_geonames(line):
+    """
+    Parses one line of a GeoNames dump. Returns None for lines that are not
+    populated places.
+    """
+    columns = line.rstrip('\n').split('\t')
+    if len(columns) < 15 or columns[6] != POPULATED_PLACE:
+        return None
+    return GazetteerRow(
+        int(columns[0]), columns[1], columns[8].upper(),
+        float(columns[4]), float(columns[5]), int(columns[14] or 0), None,
+    )
+
+
+def parse_json_line(line):
+    """
+    Parses one JSON-lines object. Returns None for blank lines.
+    """
+    if not line.strip():
+        return None
+    data = json.loads(line)
+    geoname_id = data.get('geonameid') or data.get('geoname_id')
+    return GazetteerRow(
+        int(geoname_id) if geoname_id else None,
+        data['name'], data['country_code'].upper(),
+        float(data['latitude']), float(data['longitude']),
+        int(data.get('population') or 0), data.get('country_name'),
+    )
+
+
+def legacy_rows(path):
+    """
+    Yields the rows of a file in the nested data/locations.json format.
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    for entry in data:
+        for city in entry.get('cities', []):
+            location = city.get('location') or {}
+            yield GazetteerRow(
+                None, city['name'], entry['country_code'].upper(),
+                location.get('latitude'), location.get('longitude'), 0, entry['country_name'],
+            )
+
+
+def source_parser(path):
+    """
+    Picks the line parser of `path` from its extension; None for the legacy
+    (non line-oriented) .json format.
+    """
+    if path.endswith(('.jsonl', '.ndjson')):
+        return parse_json_line
+    if path.endswith('.json'):
+        return None
+    return parse_geonames
+
+
+def load_country_names(path):
+    """
+    Reads `{code: name}` from a GeoNames countryInfo.txt.
+    """
+    names = {}
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            if line.startswith('#'):
+                continue
+            columns = line.rstrip('\n').split('\t')
+            if len(columns) > 4:
+                names[columns[0].upper()] = columns[4]
+    return names
+
+
+# --- Checkpoints ---
+
+class Checkpoint:
+    """
+    The number of source lines already imported, stored as JSON next to the
+    source (or at `path`), together with the source's size and mtime so a
+    changed file starts over.
+    """
+
+    def __init__(self, source, path=None):
+        self.path = path or f'{source}.progress'
+        stat = os.stat(source)
+        self.stamp = {'source': os.path.abspath(source), 'size': stat.st_size, 'mtime': stat.st_mtime}
+
+    def load(self):
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (FileNotFoundError, ValueError):
+            return 0
+        if {key: data.get(key) for key in self.stamp} != self.stamp:
+            return 0
+        return data.get('line', 0)
+
+    def save(self, line):
+        temporary = f'{self.path}.tmp'
+        with open(temporary, 'w', encoding='utf-8') as f:
+            json.dump({**self.stamp, 'line': line}, f)
+        os.replace(temporary, self.path)
+
+    def clear(self):
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+
+
+# --- Writing ---
+
+class CountryResolver:
+    """
+    Maps country codes to Country pks in memory. Unknown countries are
+    created when a name is known for them (from the row or `names`), and
+    rows of the others are skipped.
+    """
+
+    def __init__(self, names=None):
+        self.names = names or {}
+        self.ids = dict(Country.objects.values_list('code', 'pk'))
+
+    def resolve(self, code, name=None):
+        if code not in self.ids:
+            name = name or self.names.get(code)
+            if not name:
+                return None
+            self.ids[code] = Country.objects.get_or_create(code=code, defaults={'name': name})[0].pk
+        return self.ids[code]
+
+
+def _rank(population, geoname_id):
+    # Higher ranks win a shared (country, name).
+    return (population, -(geoname_id or 0))
+
+
+def upsert_cities(rows, countries, stats):
+    """
+    Upserts one batch of rows with a single INSERT ... ON CONFLICT, after
+    one query for the stored cities they could collide with. Counts the
+    outcome of every row in `stats`.
+    """
+    candidates = {}
+    for row in rows:
+        if len(row.name) > NAME_MAX_LENGTH:
+            stats['skipped (name too long)'] += 1
+            continue
+        country_id = countries.resolve(row.country_code, row.country_name)
+        if country_id is None:
+            stats['skipped (unknown country)'] += 1
+            continue
+        key = (country_id, row.name)
+        if key in candidates:
+            stats['skipped (shared name)'] += 1
+            if _rank(row.population, row.geoname_id) <= _rank(candidates[key].population, candidates[key].geoname_id):
+                continue
+        candidates[key] = row
+    if not candidates:
+        return
+
+    geoname_ids = {row.geoname_id for row in candidates.values() if row.geoname_id}
+    stored = City.objects.filter(
+        Q(geoname_id__in=geoname_ids)
+        | Q(country_id__in={key[0] for key in candidates}, name__in={key[1] for key in candidates})
+    ).values_list('pk', 'country_id', 'name', 'geoname_id', 'population')
+    by_key = {
+        (country_id, name): (geoname_id, population, pk)
+        for pk, country_id, name, geoname_id, population in stored
+    }
+    by_geoname = {geoname_id: (country_id, name) for _, country_id, name, geoname_id, _ in stored if geoname_id}
+
+    cities = []
+    updated_ids = []
+    for key, row in candidates.items():
+        if row.geoname_id and by_geoname.get(row.geoname_id, key) != key:
+            # Renamed since the city was stored; the stored name is kept.
+            stats['skipped (renamed)'] += 1
+            continue
+        current = by_key.get(key)
+        if current is not None and current[0] not in (None, row.geoname_id) \
+                and _rank(current[1], current[0]) > _rank(row.population, row.geoname_id):
+            stats['skipped (shared name)'] += 1
+            continue
+        if current is not None:
+            updated_ids.append(current[2])
+        stats['updated' if current is not None else 'created'] += 1
+        point = Point(row.longitude, row.latitude, srid=4326) if row.latitude is not None else None
+        cities.append(City(
+            country_id=key[0], name=row.name, location=point,
+            geoname_id=row.geoname_id, population=row.population,
+        ))
+
+    City.objects.bulk_create(
+        cities,
+        update_conflicts=True,
+        unique_fields=['country', 'name'],
+        update_fields=['location', 'geoname_id', 'population'],
+    )
+    if updated_ids:
+        # Bulk writes send no signals: move the listing cards placed at the
+        # updated cities along with them.
+        from listings.cards import refresh_city_locations
+
+        refresh_city_locations(updated_ids)
+
+
+def import_cities(path, batch_size=DEFAULT_BATCH_SIZE, country_codes=None, min_population=0,
+                  country_names=None, checkpoint=None, progress=None):
+    """
+    Streams the cities of `path` into the database in batches of
+    `batch_size` rows, each in its own transaction. Only rows of
+    `country_codes` (if given) with at least `min_population` are imported.
+    With a Checkpoint, starts after the last committed batch of a previous
+    run and records each new one. `progress(lines, stats)` is called after
+    every batch. Returns `(lines read, stats)`.
+    """
+    stats = Counter()
+    countries = CountryResolver(country_names)
+    parser = source_parser(path)
+    start = checkpoint.load() if checkpoint else 0
+    country_codes = {code.upper() for code in country_codes} if country_codes else None
+
+    def flush(batch, line):
+        with transaction.atomic():
+            upsert_cities(batch, countries, stats)
+        if checkpoint:
+            checkpoint.save(line)
+        if progress:
+            progress(line, stats)
+
+    if parser is None:
+        lines = legacy_rows(path)
+    else:
+        lines = open_lines(path)
+    batch = []
+    line = 0
+    try:
+        for line, text in enumerate(lines, 1):
+            if line <= start:
+                continue
+            try:
+                row = text if parser is None else parser(text)
+            except (ValueError, KeyError, IndexError, AttributeError):
+                stats['skipped (malformed)'] += 1
+                continue
+            if row is None or (country_codes and row.country_code not in country_codes):
+                continue
+            if row.population < min_population:
+                continue
+            batch.append(row)
+            if len(batch) >= batch_size:
+                flush(batch, line)
+                batch = []
+        if batch or line > start:
+            flush(batch, line)
+    finally:
+        if hasattr(lines, 'close'):
+            lines.close()
+    if stats['created'] or stats['updated']:
+        # Bulk writes send no signals: reload the reverse geocoder.
+        bump_namespace_on_commit(GEOCODER_NAMESPACE)
+    if stats['updated']:
+        # Cities may have moved, and their listings with them.
+        bump_namespace_on_commit('listings')
+        bump_layer_on_commit('listings')
+    return line, stats
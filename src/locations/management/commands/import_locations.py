@@ -1,53 +1,84 @@
 # src/locations/management/commands/import_locations.py
 
-import json
-from django.core.management.base import BaseCommand
-from django.contrib.gis.geos import Point
-from locations.models import Country, City
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from locations.importer import DEFAULT_BATCH_SIZE, Checkpoint, import_cities, load_country_names
 
 class Command(BaseCommand):
-    help = 'Imports countries and cities from a JSON file'
+    help = (
+        'Imports cities from a GeoNames dump (.txt/.zip), a JSON-lines file or the legacy '
+        'data/locations.json, streaming them in resumable batches (see locations/importer.py)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'path', nargs='?', default='data/locations.json',
+            help='Path of the file to import. Defaults to data/locations.json.',
+        )
+        parser.add_argument(
+            '--country', action='append', dest='countries',
+            help='Import only this country code (repeatable), e.g. --country ES --country GI.',
+        )
+        parser.add_argument(
+            '--country-info', default=None,
+            help='GeoNames countryInfo.txt, to create the countries not in the database yet.',
+        )
+        parser.add_argument('--min-population', type=int, default=0, help='Skip smaller places.')
+        parser.add_argument(
+            '--batch-size', type=int, default=DEFAULT_BATCH_SIZE,
+            help=f'Rows per upsert and transaction (default: {DEFAULT_BATCH_SIZE}).',
+        )
+        parser.add_argument(
+            '--restart', action='store_true',
+            help='Ignore the checkpoint of a previous run and start from the first line.',
+        )
+        parser.add_argument(
+            '--checkpoint', default=None,
+            help='Checkpoint file. Defaults to <path>.progress.',
+        )
 
     def handle(self, *args, **options):
-        file_path = 'data/locations.json'
-        self.stdout.write(self.style.SUCCESS(f'Starting location import from {file_path}...'))
+        path = options['path']
+        try:
+            checkpoint = Checkpoint(path, options['checkpoint'])
+            country_names = load_country_names(options['country_info']) if options['country_info'] else None
+        except FileNotFoundError as exc:
+            raise CommandError(f'File not found: {exc.filename}.')
+        if options['restart']:
+            checkpoint.clear()
+        start = checkpoint.load()
+        if start:
+            self.stdout.write(self.style.WARNING(f'Resuming {path} after line {start}.'))
+
+        started = time.perf_counter()
+
+        def progress(line, stats):
+            elapsed = max(time.perf_counter() - started, 1e-9)
+            written = stats['created'] + stats['updated']
+            self.stdout.write(
+                f'  line {line}: {written} cities written ({written / elapsed:.0f}/s, '
+                f'{(line - start) / elapsed:.0f} lines/s)'
+            )
 
         try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-        except FileNotFoundError:
-            self.stdout.write(self.style.ERROR(f'File not found: {file_path}.'))
-            return
-
-        created_countries = 0
-        created_cities = 0
-
-        for entry in data:
-            # Create Country
-            country, created = Country.objects.get_or_create(
-                code=entry['country_code'],
-                defaults={'name': entry['country_name']}
+            lines, stats = import_cities(
+                path,
+                batch_size=options['batch_size'],
+                country_codes=options['countries'],
+                min_population=options['min_population'],
+                country_names=country_names,
+                checkpoint=checkpoint,
+                progress=progress if options['verbosity'] > 0 else None,
             )
-            if created:
-                created_countries += 1
-                self.stdout.write(f'  Created country: {country.name}')
-
-            # Create Cities
-            for city_data in entry.get('cities', []):
-                location_data = city_data.get('location')
-                point = None
-                if location_data:
-                    point = Point(location_data['longitude'], location_data['latitude'])
-
-                city, created = City.objects.get_or_create(
-                    name=city_data['name'],
-                    country=country,
-                    defaults={'location': point}
-                )
-                if created:
-                    created_cities += 1
-                    self.stdout.write(f'    - Created city: {city.name}')
+        except ValueError as exc:
+            raise CommandError(str(exc))
+        checkpoint.clear()
 
+        elapsed = max(time.perf_counter() - started, 1e-9)
         self.stdout.write(self.style.SUCCESS(
-            f'Import complete. Countries created: {created_countries}, Cities created: {created_cities}'
-        ))
\ No newline at end of file
+            f'Import complete: {lines - start} lines in {elapsed:.1f}s '
+            f'({(lines - start) / elapsed:.0f} lines/s).'
+        ))
+        for outcome, count in sorted(stats.items()):
+            self.stdout.write(f'  {outcome}: {count}')
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.4 on 2026-10-18 17:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('locations', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='city',
+            name='geoname_id',
+            field=models.PositiveIntegerField(blank=True, null=True, unique=True, verbose_name='GeoNames ID'),
+        ),
+        migrations.AddField(
+            model_name='city',
+            name='population',
+            field=models.PositiveBigIntegerField(default=0, verbose_name='Population'),
+        ),
+    ]
@@ -30,6 +30,11 @@ class City(models.Model):
     # It stores longitude and latitude.
     location = PointField(_("Location"), null=True, blank=True) # <-- 2. REMOVE "models." PREFIX
 
+    # Set by `manage.py import_locations` for gazetteer rows (see
+    # locations/importer.py); the most populous place wins a shared name.
+    geoname_id = models.PositiveIntegerField(_("GeoNames ID"), null=True, blank=True, unique=True)
+    population = models.PositiveBigIntegerField(_("Population"), default=0)
+
     class Meta:
         verbose_name = _("City")
         verbose_name_plural = _("Cities")
@@ -0,0 +1,18 @@
+# src/locations/signals.py
+
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from core.cache import bump_namespace_on_commit
+from .geocoder import NAMESPACE as GEOCODER_NAMESPACE
+from .models import City
+
+# =================================================================
+#  REVERSE GEOCODER
+# =================================================================
+# Any City write makes the workers rebuild their city tree (geocoder.py).
+
+@receiver(post_save, sender=City, dispatch_uid='geocoder_city_saved')
+@receiver(post_delete, sender=City, dispatch_uid='geocoder_city_deleted')
+def city_changed(sender, instance, **kwargs):
+    bump_namespace_on_commit(GEOCODER_NAMESPACE)
@@ -1,3 +1,90 @@
-from django.test import TestCase
+import math
+import random
+from unittest import mock
 
-# Create your tests here.
+from django.test import SimpleTestCase
+
+from core.cache import bump_namespace
+from .geocoder import NAMESPACE, KDTree, _unit_vector, geocoder, nearest_city_id, nearest_city_ids
+
+
+def great_circle_km(a, b):
+    lat1, lng1, lat2, lng2 = map(math.radians, (*a, *b))
+    h = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lng2 - lng1) / 2) ** 2
+    return 2 * 6371.0088 * math.asin(math.sqrt(h))
+
+
+class ReverseGeocoderTests(SimpleTestCase):
+    """
+    The geocoder's tree is loaded from `self.cities` instead of the database.
+    """
+
+    def setUp(self):
+        self.random = random.Random(24)
+        self.cities = {}
+        patcher = mock.patch.object(geocoder, 'load', side_effect=self.load_tree)
+        self.load = patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(geocoder.clear)
+        geocoder.clear()
+
+    def load_tree(self):
+        return KDTree((pk, *_unit_vector(lat, lng)) for pk, (lat, lng) in self.cities.items())
+
+    def add_cities(self, points):
+        for point in points:
+            self.cities[len(self.cities) + 1] = point
+
+    def brute_force(self, point):
+        return min(self.cities, key=lambda pk: great_circle_km(point, self.cities[pk]))
+
+    def random_point(self, lat_range=(-90, 90), lng_range=(-180, 180)):
+        return self.random.uniform(*lat_range), self.random.uniform(*lng_range)
+
+    def test_matches_brute_force_on_random_points(self):
+        self.add_cities(self.random_point() for _ in range(2000))
+        queries = [self.random_point() for _ in range(300)]
+        self.assertEqual(nearest_city_ids(queries), [self.brute_force(point) for point in queries])
+
+    def test_matches_brute_force_across_the_antimeridian(self):
+        self.add_cities(self.random_point((-60, 60), (170, 180)) for _ in range(300))
+        self.add_cities(self.random_point((-60, 60), (-180, -170)) for _ in range(300))
+        queries = [self.random_point((-60, 60), (-180, -179)) for _ in range(100)]
+        queries += [self.random_point((-60, 60), (179, 180)) for _ in range(100)]
+        self.assertEqual(nearest_city_ids(queries), [self.brute_force(point) for point in queries])
+
+    def test_nearest_across_the_antimeridian_not_across_the_map(self):
+        self.add_cities([(0, 179.9), (0, -170)])
+        self.assertEqual(nearest_city_id(0, -179.95), 1)
+
+    def test_matches_brute_force_near_the_poles(self):
+        self.add_cities(self.random_point((80, 90)) for _ in range(300))
+        self.add_cities(self.random_point((-90, -80)) for _ in range(300))
+        queries = [self.random_point((85, 90)) for _ in range(100)]
+        queries += [self.random_point((-90, -85)) for _ in range(100)]
+        self.assertEqual(nearest_city_ids(queries), [self.brute_force(point) for point in queries])
+
+    def test_max_distance_cutoff(self):
+        self.add_cities([(36.14, -5.35)])
+        # A degree of latitude is about 111 km.
+        self.assertEqual(nearest_city_id(36.14 + 0.4, -5.35, max_distance=50), 1)
+        self.assertIsNone(nearest_city_id(36.14 + 0.5, -5.35, max_distance=50))
+        self.assertEqual(nearest_city_ids([(36.14 + 0.5, -5.35), None], max_distance=50), [None, None])
+        distance = geocoder.nearest(36.14 + 0.4, -5.35)[1]
+        self.assertAlmostEqual(distance, great_circle_km((36.54, -5.35), (36.14, -5.35)), places=6)
+
+    def test_no_cities(self):
+        self.assertIsNone(nearest_city_id(36.14, -5.35))
+
+    def test_reloads_when_the_version_changes(self):
+        self.add_cities([(36.14, -5.35)])
+        nearest_city_id(0, 0)
+        nearest_city_id(0, 0)
+        self.assertEqual(self.load.call_count, 1)
+
+        self.add_cities([(0, 0)])
+        bump_namespace(NAMESPACE)
+        # Past the version check interval.
+        geocoder._checked_at = 0.0
+        self.assertEqual(nearest_city_id(0, 0), 2)
+        self.assertEqual(self.load.call_count, 2)
@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class PlacesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'places'
+
+    def ready(self):
+        # Connect the signal handlers that invalidate the place caches.
+        from . import signals  # noqa: F401
@@ -0,0 +1,479 @@
+# src/places/importer.py
+
+import json
+import math
+import re
+import unicodedata
+from collections import Counter
+
+from django.contrib.gis.geos import GEOSException, GEOSGeometry, Point
+from django.db import transaction
+from django.db.models.expressions import RawSQL
+from django.utils import timezone
+from django.utils.text import slugify
+
+from core.cache import bump_namespace_on_commit
+from .models import Place, PlaceCategory
+from .vector_tiles import bump_layer_on_commit
+
+# =================================================================
+#  STREAMING GEOJSON IMPORT
+# =================================================================
+# Seeds places from GeoJSON exports of points of interest, too large to
+# load at once: a FeatureCollection (.geojson/.json) is parsed feature by
+# feature from a buffered stream; GeoJSON text sequences and
+# newline-delimited files (.geojsonl/.geojsons/.ndjson) line by line.
+#
+# Feature properties are mapped to the translated fields: `name`/`name_en`/
+# `name:en`, `name_es`/`name:es`, and likewise for `address` (or the OSM
+# `addr:*` tags) and `description`. The category is a PlaceCategory slug,
+# from `category` or the first OSM tag of CATEGORY_PROPERTIES; unknown ones
+# are created. Non-point geometries are placed at a point on their surface.
+#
+# Each batch is de-duplicated against the stored places with one query:
+# the places within `radius` metres of any feature, found by joining the
+# features' points to the GiST index on `location`. A feature matches the place, within the radius,
+# whose name is the most similar (trigram similarity, as pg_trgm computes
+# it) above `similarity`, and features of the same batch are matched with
+# each other the same way. A match only fills in the place's blank fields,
+# so curated data is never overwritten. The rest is written with one
+# bulk_create and one bulk_update per batch, in its own transaction.
+
+DEFAULT_BATCH_SIZE = 1000
+DEFAULT_RADIUS = 50
+DEFAULT_SIMILARITY = 0.5
+
+# OSM tags naming the kind of a point of interest, by priority.
+CATEGORY_PROPERTIES = ('category', 'amenity', 'tourism', 'leisure', 'historic', 'shop')
+
+# Fields a duplicate may fill in on the place it matches.
+FILL_FIELDS = (
+    'name_en', 'name_es', 'address_en', 'address_es',
+    'description_en', 'description_es', 'category_id',
+)
+# The columns read from the stored places.
+STORED_FIELDS = ('location', *(field.removesuffix('_id') for field in FILL_FIELDS))
+
+LINE_SUFFIXES = ('.geojsonl', '.geojsons', '.geojsonseq', '.ndjson', '.jsonl')
+
+# A lower bound of the length of a degree of latitude (or of longitude at
+# the equator), so spans converted to degrees err on the large side.
+METRES_PER_DEGREE = 110000.0
+EARTH_RADIUS_M = 6371008.8
+
+NEARBY_SQL = """
+    SELECT DISTINCT p.id
+    FROM {table} p
+    JOIN (VALUES {rows}) AS feature (lng, lat, degrees)
+      ON ST_DWithin(p.location, ST_SetSRID(ST_MakePoint(feature.lng, feature.lat), 4326), feature.degrees)
+"""
+
+NAME_MAX_LENGTH = Place._meta.get_field('name').max_length
+ADDRESS_MAX_LENGTH = Place._meta.get_field('address').max_length
+SLUG_MAX_LENGTH = PlaceCategory._meta.get_field('slug').max_length
+
+
+# --- Reading ---
+
+class _JSONStream:
+    """
+    A JSON text read from a file in chunks, decoded one value at a time.
+    """
+
+    def __init__(self, f, chunk_size=1 << 16):
+        self.f = f
+        self.chunk_size = chunk_size
+        self.buffer = ''
+        self.pos = 0
+        self.eof = False
+        self.decoder = json.JSONDecoder()
+
+    def _fill(self):
+        chunk = self.f.read(self.chunk_size)
+        if not chunk:
+            self.eof = True
+            return False
+        # Drop what was consumed, so the buffer holds about one value.
+        self.buffer = self.buffer[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def peek(self):
+        """
+        Returns the next non-blank character (consumed only by `expect`),
+        or '' at the end of the input.
+        """
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos] in ' \t\r\n':
+                self.pos += 1
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if not self._fill():
+                return ''
+
+    def expect(self, characters):
+        character = self.peek()
+        if not character or character not in characters:
+            raise ValueError(f'Expected {characters!r}, found {character or "the end of the file"!r}.')
+        self.pos += 1
+        return character
+
+    def value(self):
+        """
+        Decodes the next value, reading until it is complete.
+        """
+        self.peek()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buffer, self.pos)
+            except json.JSONDecodeError as exc:
+                if not self._fill():
+                    raise ValueError(f'Invalid JSON: {exc}')
+                continue
+            # A number at the end of the buffer may continue in the next chunk.
+            if end == len(self.buffer) and not self.eof and self._fill():
+                continue
+            self.pos = end
+            return value
+
+
+def iter_feature_collection(f):
+    """
+    Yields the features of a FeatureCollection read from `f`, holding
+    one feature in memory at a time. Raises ValueError on malformed input.
+    """
+    stream = _JSONStream(f)
+    stream.expect('{')
+    if stream.peek() == '}':
+        return
+    while True:
+        key = stream.value()
+        stream.expect(':')
+        if key == 'features':
+            stream.expect('[')
+            if stream.peek() != ']':
+                while True:
+                    yield stream.value()
+                    if stream.expect(',]') == ']':
+                        break
+            else:
+                stream.expect(']')
+        else:
+            stream.value()
+        if stream.expect(',}') == '}':
+            return
+
+
+def iter_feature_lines(f):
+    """
+    Yields the features of a newline-delimited file or of a GeoJSON text
+    sequence (RFC 8142, records prefixed with an RS character).
+    """
+    for line in f:
+        line = line.strip().lstrip('\x1e')
+        if line:
+            yield json.loads(line)
+
+
+def iter_features(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        if path.endswith(LINE_SUFFIXES):
+            yield from iter_feature_lines(f)
+        else:
+            yield from iter_feature_collection(f)
+
+
+# --- Mapping ---
+
+def _text(properties, *keys, max_length=None):
+    for key in keys:
+        value = properties.get(key)
+        if isinstance(value, (str, int, float)) and not isinstance(value, bool) and str(value).strip():
+            return str(value).strip()[:max_length]
+    return ''
+
+
+def _osm_address(properties):
+    street = ' '.join(part for part in (
+        _text(properties, 'addr:street'), _text(properties, 'addr:housenumber'),
+    ) if part)
+    return ', '.join(part for part in (street, _text(properties, 'addr:city')) if part)[:ADDRESS_MAX_LENGTH]
+
+
+def _point(geometry):
+    if not isinstance(geometry, dict):
+        return None
+    if geometry.get('type') == 'Point':
+        lng, lat = (float(coordinate) for coordinate in geometry['coordinates'][:2])
+    else:
+        point = GEOSGeometry(json.dumps(geometry)).point_on_surface
+        lng, lat = point.x, point.y
+    if not (-90 <= lat <= 90 and -180 <= lng <= 180):
+        raise ValueError('Coordinates out of range.')
+    return lat, lng
+
+
+def parse_feature(feature):
+    """
+    Maps a feature to `(values, (lat, lng), category slug)`, where `values`
+    are Place field values. Raises ValueError, KeyError, TypeError,
+    IndexError or GEOSException on malformed features.
+    """
+    properties = feature.get('properties') or {}
+    values = {
+        'name_en': _text(properties, 'name_en', 'name:en', 'name', max_length=NAME_MAX_LENGTH),
+        'name_es': _text(properties, 'name_es', 'name:es', max_length=NAME_MAX_LENGTH),
+        'address_en': (
+            _text(properties, 'address_en', 'address:en', 'address', max_length=ADDRESS_MAX_LENGTH)
+            or _osm_address(properties)
+        ),
+        'address_es': _text(properties, 'address_es', 'address:es', max_length=ADDRESS_MAX_LENGTH),
+        'description_en': _text(properties, 'description_en', 'description:en', 'description'),
+        'description_es': _text(properties, 'description_es', 'description:es'),
+    }
+    if not values['name_en']:
+        # Spanish-only names are the default-language name as well.
+        values['name_en'] = values['name_es']
+    category = slugify(_text(properties, *CATEGORY_PROPERTIES))[:SLUG_MAX_LENGTH]
+    return values, _point(feature.get('geometry')), category or None
+
+
+# --- De-duplication ---
+
+def _normalize(text):
+    text = unicodedata.normalize('NFKD', text.lower())
+    return ''.join(character for character in text if not unicodedata.combining(character))
+
+
+def trigrams(text):
+    """
+    The trigram set of `text`, as pg_trgm builds it: each word padded with
+    two spaces before and one after, accents and case ignored.
+    """
+    grams = set()
+    for word in re.findall(r'\w+', _normalize(text)):
+        padded = f'  {word} '
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return frozenset(grams)
+
+
+def _similarity(names, other_names):
+    best = 0.0
+    for grams in names:
+        for other in other_names:
+            union = len(grams | other)
+            if union:
+                best = max(best, len(grams & other) / union)
+    return best
+
+
+def _names(place):
+    return [trigrams(name) for name in (place.name_en, place.name_es) if name]
+
+
+def _distance(a, b):
+    # Haversine distance in metres between two (lat, lng) pairs.
+    lat1, lng1, lat2, lng2 = map(math.radians, (*a, *b))
+    h = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lng2 - lng1) / 2) ** 2
+    return 2 * EARTH_RADIUS_M * math.asin(math.sqrt(h))
+
+
+def _degrees(radius, lat):
+    # The radius in degrees along the parallel, the longer of the two spans.
+    return radius / (METRES_PER_DEGREE * max(math.cos(math.radians(lat)), 0.01))
+
+
+class _Candidate:
+    """
+    A place a feature can be matched with: stored, or created by the batch.
+    """
+    __slots__ = ('place', 'point', 'names')
+
+    def __init__(self, place, point):
+        self.place = place
+        self.point = point
+        self.names = _names(place)
+
+
+class _Grid:
+    """
+    Candidates bucketed in cells at least `radius` wide, so those within
+    `radius` of a point are in the 3 x 3 cells around it.
+    """
+
+    def __init__(self, radius):
+        self.radius = radius
+        self.height = radius / METRES_PER_DEGREE
+        self.cells = {}
+
+    def _row(self, lat):
+        return math.floor(lat / self.height)
+
+    def _column(self, row, lng):
+        # A row's cells are as wide as the radius at its edge nearest a pole.
+        edge = min(max(abs(row), abs(row + 1)) * self.height, 90.0)
+        return math.floor(lng / _degrees(self.radius, edge))
+
+    def add(self, candidate):
+        row = self._row(candidate.point[0])
+        self.cells.setdefault((row, self._column(row, candidate.point[1])), []).append(candidate)
+
+    def near(self, point):
+        row = self._row(point[0])
+        for neighbour in (row - 1, row, row + 1):
+            column = self._column(neighbour, point[1])
+            for cell in ((neighbour, column - 1), (neighbour, column), (neighbour, column + 1)):
+                yield from self.cells.get(cell, ())
+
+
+def _best_match(grid, point, names, similarity):
+    best, best_score = None, similarity
+    for candidate in grid.near(point):
+        if _distance(point, candidate.point) > grid.radius:
+            continue
+        score = _similarity(names, candidate.names)
+        if score >= best_score:
+            best, best_score = candidate, score
+    return best
+
+
+def _fill_blanks(place, values):
+    changed = []
+    for field in FILL_FIELDS:
+        if values.get(field) and not getattr(place, field):
+            setattr(place, field, values[field])
+            changed.append(field)
+    return changed
+
+
+# --- Writing ---
+
+class CategoryResolver:
+    """
+    Maps category slugs to PlaceCategory pks in memory, creating unknown
+    categories on first sight (unless `create` is False).
+    """
+
+    def __init__(self, create=True):
+        self.create = create
+        self.ids = dict(PlaceCategory.objects.values_list('slug', 'pk'))
+
+    def resolve(self, slug):
+        if slug is None:
+            return None
+        if slug not in self.ids:
+            if not self.create:
+                return None
+            name = slug.replace('-', ' ').replace('_', ' ').capitalize()
+            self.ids[slug] = PlaceCategory.objects.get_or_create(slug=slug, defaults={'name_en': name})[0].pk
+        return self.ids[slug]
+
+
+def _nearby(points, radius):
+    """
+    The places within about `radius` metres of any of `points`, as one
+    statement: the points are joined as a VALUES list, so each probes the
+    GiST index on `location` (ST_DWithin, in degrees wide enough for the
+    point's latitude); exact distances are checked in Python.
+    """
+    rows = ', '.join(['(%s::float8, %s::float8, %s::float8)'] * len(points))
+    params = [value for lat, lng in points for value in (lng, lat, _degrees(radius, lat))]
+    sql = NEARBY_SQL.format(table=Place._meta.db_table, rows=rows)
+    return Place.objects.filter(pk__in=RawSQL(sql, params)).order_by()
+
+
+def import_batch(rows, stats, radius=DEFAULT_RADIUS, similarity=DEFAULT_SIMILARITY, dry_run=False):
+    """
+    De-duplicates and writes one batch of `(values, (lat, lng))` rows: one
+    query for the stored places near them, one bulk_create and one
+    bulk_update. Counts the outcome of every row in `stats`.
+    """
+    if not rows:
+        return
+    stored = _Grid(radius)
+    for place in _nearby([point for _, point in rows], radius).only(*STORED_FIELDS):
+        stored.add(_Candidate(place, (place.location.y, place.location.x)))
+
+    new = _Grid(radius)
+    creates = []
+    updates = {}
+    for values, point in rows:
+        names = [trigrams(name) for name in (values['name_en'], values['name_es']) if name]
+        match = _best_match(stored, point, names, similarity)
+        if match is not None:
+            changed = _fill_blanks(match.place, values)
+            if changed:
+                updates.setdefault(match.place.pk, (match.place, set()))[1].update(changed)
+            stats['duplicate'] += 1
+            continue
+        match = _best_match(new, point, names, similarity)
+        if match is not None:
+            _fill_blanks(match.place, values)
+            stats['duplicate (in file)'] += 1
+            continue
+        candidate = _Candidate(Place(location=Point(point[1], point[0], srid=4326), **values), point)
+        new.add(candidate)
+        creates.append(candidate)
+
+    stats['created'] += len(creates)
+    stats['updated'] += len(updates)
+    if dry_run:
+        return
+    if creates:
+        Place.objects.bulk_create([candidate.place for candidate in creates])
+    if updates:
+        now = timezone.now()
+        fields = {'updated_at'}
+        for place, changed in updates.values():
+            # bulk_update() doesn't apply auto_now.
+            place.updated_at = now
+            fields.update(changed)
+        Place.objects.bulk_update([place for place, _ in updates.values()], sorted(fields))
+
+
+def import_places(path, batch_size=DEFAULT_BATCH_SIZE, radius=DEFAULT_RADIUS, similarity=DEFAULT_SIMILARITY,
+                  category=None, is_approved=True, dry_run=False, progress=None):
+    """
+    Streams the features of `path` into places in batches of `batch_size`,
+    each de-duplicated and written in its own transaction (nothing is
+    written with `dry_run`). `category` forces the category slug of every
+    place. `progress(features, stats)` is called after every batch.
+    Returns `(features read, stats)`.
+    """
+    stats = Counter()
+    categories = CategoryResolver(create=not dry_run)
+
+    def flush(batch):
+        with transaction.atomic():
+            import_batch(batch, stats, radius, similarity, dry_run)
+        if progress:
+            progress(count, stats)
+
+    batch = []
+    count = 0
+    for count, feature in enumerate(iter_features(path), 1):
+        try:
+            values, point, slug = parse_feature(feature)
+        except (ValueError, KeyError, TypeError, IndexError, AttributeError, GEOSException):
+            stats['skipped (malformed)'] += 1
+            continue
+        if not values['name_en']:
+            stats['skipped (no name)'] += 1
+            continue
+        if point is None:
+            stats['skipped (no geometry)'] += 1
+            continue
+        values['category_id'] = categories.resolve(category or slug)
+        values['is_approved'] = is_approved
+        batch.append((values, point))
+        if len(batch) >= batch_size:
+            flush(batch)
+            batch = []
+    if batch:
+        flush(batch)
+
+    if not dry_run and (stats['created'] or stats['updated']):
+        # Bulk writes send no signals.
+        bump_namespace_on_commit('places')
+        bump_layer_on_commit('places')
+    return count, stats
@@ -0,0 +1,77 @@
+# src/places/management/commands/import_places.py
+
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from places.importer import DEFAULT_BATCH_SIZE, DEFAULT_RADIUS, DEFAULT_SIMILARITY, import_places
+
+class Command(BaseCommand):
+    help = (
+        'Imports places from a GeoJSON FeatureCollection or a newline-delimited GeoJSON file, '
+        'streaming it in batches and merging duplicates of the stored places (see places/importer.py)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Path of the .geojson, .geojsonl or .geojsons file to import.')
+        parser.add_argument(
+            '--category', default=None,
+            help='Slug of the category of every imported place, instead of the one of each feature.',
+        )
+        parser.add_argument(
+            '--radius', type=float, default=DEFAULT_RADIUS,
+            help=f'Distance, in metres, within which a similarly named place is a duplicate (default: {DEFAULT_RADIUS}).',
+        )
+        parser.add_argument(
+            '--similarity', type=float, default=DEFAULT_SIMILARITY,
+            help=f'Minimum name similarity (0-1) of a duplicate (default: {DEFAULT_SIMILARITY}).',
+        )
+        parser.add_argument(
+            '--unapproved', action='store_true',
+            help='Import the new places hidden, to be approved in the admin.',
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=DEFAULT_BATCH_SIZE,
+            help=f'Features per de-duplication query and transaction (default: {DEFAULT_BATCH_SIZE}).',
+        )
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='Report what would change without writing anything.',
+        )
+
+    def handle(self, *args, **options):
+        path = options['path']
+        if options['radius'] <= 0 or not 0 < options['similarity'] <= 1:
+            raise CommandError('--radius must be positive and --similarity between 0 and 1.')
+        started = time.perf_counter()
+
+        def progress(features, stats):
+            elapsed = max(time.perf_counter() - started, 1e-9)
+            self.stdout.write(
+                f'  feature {features}: {stats["created"]} created, {stats["updated"]} updated '
+                f'({features / elapsed:.0f} features/s)'
+            )
+
+        try:
+            features, stats = import_places(
+                path,
+                batch_size=options['batch_size'],
+                radius=options['radius'],
+                similarity=options['similarity'],
+                category=options['category'],
+                is_approved=not options['unapproved'],
+                dry_run=options['dry_run'],
+                progress=progress if options['verbosity'] > 0 else None,
+            )
+        except FileNotFoundError:
+            raise CommandError(f'File not found: {path}.')
+        except ValueError as exc:
+            raise CommandError(f'{path}: {exc}')
+
+        elapsed = max(time.perf_counter() - started, 1e-9)
+        if options['dry_run']:
+            self.stdout.write(self.style.WARNING('Dry run: nothing was written.'))
+        self.stdout.write(self.style.SUCCESS(
+            f'Import complete: {features} features in {elapsed:.1f}s ({features / elapsed:.0f} features/s).'
+        ))
+        for outcome, count in sorted(stats.items()):
+            self.stdout.write(f'  {outcome}: {count}')
@@ -0,0 +1,11 @@
+# src/places/management/commands/prune_tile_cache.py
+
+from django.core.management.base import BaseCommand
+from places.vector_tiles import prune_tile_cache
+
+class Command(BaseCommand):
+    help = 'Deletes the cached vector tiles of past layer versions (see places/vector_tiles.py)'
+
+    def handle(self, *args, **options):
+        removed = prune_tile_cache()
+        self.stdout.write(self.style.SUCCESS(f'Removed {removed} stale tile cache directories.'))
@@ -0,0 +1,132 @@
+# src/places/map.py
+
+from django.conf import settings
+from django.contrib.gis.db.models.functions import Transform
+from django.contrib.gis.geos import Polygon
+from django.core.cache import cache
+from django.db.models import Avg, Count, FloatField, Func, Min
+from django.db.models.functions import Floor
+
+from core.cache import get_namespace_versions
+from core.tiles import ORIGIN_SHIFT, lnglat_to_tile, tile_bounds, tile_size
+from .models import Place
+
+# =================================================================
+#  CLUSTERED PLACE MARKERS
+# =================================================================
+# The map is served as markers per XYZ tile (see core/tiles.py). Below
+# POINTS_ZOOM, every tile is split into a CELLS x CELLS grid in Web
+# Mercator and the places of each cell are grouped in SQL into one marker
+# (count and mean position); a cell with a single place becomes that place.
+# From POINTS_ZOOM on, places are returned individually. Tiles are cached
+# one by one, keyed by the 'places' namespace version, so panning only
+# computes the tiles entering the view; the missing tiles of a request are
+# computed together, with one grouped query whose bounding-box filter uses
+# the GiST index that GeoDjango creates on `location`.
+
+CELLS = 8
+POINTS_ZOOM = 16
+
+# Tiles per request; a larger bbox asks for a lower zoom.
+MAX_TILES = 64
+
+TILE_CACHE_PREFIX = 'places-map'
+
+
+def _coordinate(function, expression):
+    return Func(expression, function=function, output_field=FloatField())
+
+
+def _tile_key(version, language, zoom, x, y):
+    return f'{TILE_CACHE_PREFIX}:{version}:{language}:{zoom}:{x}:{y}'
+
+
+def _envelope(zoom, tiles):
+    xs = [x for x, _ in tiles]
+    ys = [y for _, y in tiles]
+    west, _, _, north = tile_bounds(zoom, min(xs), min(ys))
+    _, south, east, _ = tile_bounds(zoom, max(xs), max(ys))
+    envelope = Polygon.from_bbox((west, south, east, north))
+    envelope.srid = 4326
+    return envelope
+
+
+def _place_marker(place):
+    return {
+        'id': place['id'],
+        'name': place['name'],
+        'category': place['category__slug'],
+        'lng': place['lng'],
+        'lat': place['lat'],
+    }
+
+
+def _places(queryset):
+    return queryset.annotate(
+        lng=_coordinate('ST_X', 'location'),
+        lat=_coordinate('ST_Y', 'location'),
+    ).values('id', 'name', 'category__slug', 'lng', 'lat')
+
+
+def compute_tiles(zoom, tiles):
+    """
+    Computes the markers of `tiles` (`(x, y)` pairs) at `zoom` with one
+    grouped query, plus one for the details of the single places.
+    Returns `{(x, y): {'clusters': [...], 'places': [...]}}`.
+    """
+    result = {tile: {'clusters': [], 'places': []} for tile in tiles}
+    places = Place.objects.filter(
+        is_approved=True, location__bboverlaps=_envelope(zoom, tiles),
+    ).order_by()
+
+    if zoom >= POINTS_ZOOM:
+        for place in _places(places):
+            tile = lnglat_to_tile(place['lng'], place['lat'], zoom)
+            if tile in result:
+                result[tile]['places'].append(_place_marker(place))
+        return result
+
+    cell = tile_size(zoom) / CELLS
+    mercator = Transform('location', 3857)
+    cells = places.annotate(
+        cell_x=Floor((_coordinate('ST_X', mercator) + ORIGIN_SHIFT) / cell),
+        cell_y=Floor((ORIGIN_SHIFT - _coordinate('ST_Y', mercator)) / cell),
+    ).values('cell_x', 'cell_y').annotate(
+        count=Count('pk'),
+        lng=Avg(_coordinate('ST_X', 'location')),
+        lat=Avg(_coordinate('ST_Y', 'location')),
+        place_id=Min('pk'),
+    )
+
+    singles = {}
+    for row in cells:
+        tile = (int(row['cell_x']) // CELLS, int(row['cell_y']) // CELLS)
+        if tile not in result:
+            continue
+        if row['count'] == 1:
+            singles[row['place_id']] = tile
+        else:
+            result[tile]['clusters'].append({'lng': row['lng'], 'lat': row['lat'], 'count': row['count']})
+    for place in _places(Place.objects.filter(pk__in=singles)):
+        result[singles[place['id']]]['places'].append(_place_marker(place))
+    return result
+
+
+def get_tiles(zoom, tiles, language):
+    """
+    Returns the markers of `tiles` at `zoom`, from the cache when possible.
+    Costs two cache round trips, plus compute_tiles() and a cache write
+    when any tile is missing.
+    """
+    version = get_namespace_versions(['places'])['places']
+    keys = {_tile_key(version, language, zoom, x, y): (x, y) for x, y in tiles}
+    found = cache.get_many(keys)
+    missing = [tile for key, tile in keys.items() if key not in found]
+    if missing:
+        computed = compute_tiles(zoom, missing)
+        cache.set_many(
+            {_tile_key(version, language, zoom, x, y): computed[(x, y)] for x, y in missing},
+            settings.API_CACHE_TIMEOUT,
+        )
+        found.update({_tile_key(version, language, zoom, x, y): computed[(x, y)] for x, y in missing})
+    return [found[key] for key in keys]
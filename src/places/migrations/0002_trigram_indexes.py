@@ -0,0 +1,23 @@
+# Generated by Django 5.2.4 on 2026-10-18 16:50
+
+import django.contrib.postgres.indexes
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('search', '0003_trigram_extension'),
+        ('places', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='place',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['name_en'], name='place_name_en_trgm', opclasses=['gin_trgm_ops']),
+        ),
+        migrations.AddIndex(
+            model_name='place',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['name_es'], name='place_name_es_trgm', opclasses=['gin_trgm_ops']),
+        ),
+    ]
@@ -1,5 +1,6 @@
 # src/places/models.py
 
+from django.contrib.postgres.indexes import GinIndex
 from django.db import models
 from django.contrib.gis.db.models import PointField
 from django.utils.translation import gettext_lazy as _
@@ -90,6 +91,11 @@ class Place(models.Model):
         verbose_name = _("Place")
         verbose_name_plural = _("Places")
         ordering = ['name']
+        indexes = [
+            # Typo-tolerant name suggestions (search/suggest.py).
+            GinIndex(fields=['name_en'], opclasses=['gin_trgm_ops'], name='place_name_en_trgm'),
+            GinIndex(fields=['name_es'], opclasses=['gin_trgm_ops'], name='place_name_es_trgm'),
+        ]
 
     def __str__(self):
         return self.name
\ No newline at end of file
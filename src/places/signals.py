@@ -0,0 +1,48 @@
+# src/places/signals.py
+
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from core.cache import bump_namespace_on_commit
+from .models import Place, PlaceCategory
+from .vector_tiles import bump_layer_on_commit, invalidate_points_on_commit
+
+# =================================================================
+#  CACHE INVALIDATION
+# =================================================================
+
+@receiver(post_save, sender=Place, dispatch_uid='places_cache_place_saved')
+@receiver(post_delete, sender=Place, dispatch_uid='places_cache_place_deleted')
+@receiver(post_save, sender=PlaceCategory, dispatch_uid='places_cache_category_saved')
+@receiver(post_delete, sender=PlaceCategory, dispatch_uid='places_cache_category_deleted')
+def place_changed(sender, instance, **kwargs):
+    bump_namespace_on_commit('places')
+
+
+# =================================================================
+#  MAP TILES
+# =================================================================
+# A place write deletes the cached 'places' tiles around its old and new
+# position; a category write (name or icon) invalidates the whole layer.
+
+@receiver(pre_save, sender=Place, dispatch_uid='map_tiles_place_saving')
+def place_tiles_saving(sender, instance, **kwargs):
+    instance._stored_location = None
+    if not instance._state.adding:
+        instance._stored_location = Place.objects.filter(pk=instance.pk).values_list('location', flat=True).first()
+
+
+@receiver(post_save, sender=Place, dispatch_uid='map_tiles_place_saved')
+def place_tiles_saved(sender, instance, **kwargs):
+    invalidate_points_on_commit('places', [instance._stored_location, instance.location])
+
+
+@receiver(post_delete, sender=Place, dispatch_uid='map_tiles_place_deleted')
+def place_tiles_deleted(sender, instance, **kwargs):
+    invalidate_points_on_commit('places', [instance.location])
+
+
+@receiver(post_save, sender=PlaceCategory, dispatch_uid='map_tiles_category_saved')
+@receiver(post_delete, sender=PlaceCategory, dispatch_uid='map_tiles_category_deleted')
+def place_category_tiles_changed(sender, instance, **kwargs):
+    bump_layer_on_commit('places')
@@ -1,3 +1,125 @@
-from django.test import TestCase
+import io
+import json
+import os
+import tempfile
+from collections import Counter
 
-# Create your tests here.
+from django.contrib.gis.geos import Point
+from django.test import SimpleTestCase, TestCase
+
+from .importer import import_batch, import_places, iter_feature_collection, parse_feature, trigrams
+from .models import Place, PlaceCategory
+
+
+def feature(name, lat, lng, **properties):
+    return {
+        'type': 'Feature',
+        'properties': {'name': name, **properties},
+        'geometry': {'type': 'Point', 'coordinates': [lng, lat]},
+    }
+
+
+def row(name, lat, lng, **properties):
+    values, point, _ = parse_feature(feature(name, lat, lng, **properties))
+    values['category_id'] = None
+    return values, point
+
+
+# About 11 metres of latitude.
+STEP = 0.0001
+
+
+class GeoJSONStreamTests(SimpleTestCase):
+
+    def test_features_are_read_one_by_one_across_chunks(self):
+        features = [feature(f'Place {i}', 36.14, -5.35 + i * STEP, description='x' * 50) for i in range(20)]
+        text = json.dumps({
+            'type': 'FeatureCollection',
+            'name': 'export',
+            'features': features,
+            'bbox': [-5.4, 36.1, -5.3, 36.2],
+        }, indent=1)
+
+        class SmallChunks(io.StringIO):
+            def read(self, size=-1):
+                return super().read(7)
+
+        self.assertEqual(list(iter_feature_collection(SmallChunks(text))), features)
+
+    def test_malformed_collection_raises_value_error(self):
+        with self.assertRaises(ValueError):
+            list(iter_feature_collection(io.StringIO('{"features": [{"type": "Feature"}')))
+
+    def test_properties_are_mapped_to_translated_fields(self):
+        values, point, category = parse_feature(feature(
+            'Cathedral', 36.14, -5.35, **{
+                'name:es': 'Catedral', 'addr:street': 'Main Street', 'addr:housenumber': '7',
+                'amenity': 'Place of Worship',
+            },
+        ))
+        self.assertEqual((values['name_en'], values['name_es']), ('Cathedral', 'Catedral'))
+        self.assertEqual(values['address_en'], 'Main Street 7')
+        self.assertEqual(point, (36.14, -5.35))
+        self.assertEqual(category, 'place-of-worship')
+
+    def test_trigrams_ignore_case_and_accents(self):
+        self.assertEqual(trigrams('CAFÉ Central'), trigrams('cafe central'))
+
+
+class ImportBatchTests(TestCase):
+
+    def setUp(self):
+        self.stored = Place.objects.create(
+            name_en='Café Central', description_en='Curated', location=Point(-5.35, 36.14, srid=4326),
+        )
+
+    def import_rows(self, rows):
+        stats = Counter()
+        import_batch(rows, stats, radius=50, similarity=0.5)
+        return stats
+
+    def test_similar_name_within_radius_only_fills_blanks(self):
+        stats = self.import_rows([
+            row('Cafe Central', 36.14 + 2 * STEP, -5.35, description='Imported', address='Main Street 1'),
+        ])
+        self.assertEqual(stats, Counter(duplicate=1, updated=1))
+        self.stored.refresh_from_db()
+        self.assertEqual(self.stored.name_en, 'Café Central')
+        self.assertEqual(self.stored.description_en, 'Curated')
+        self.assertEqual(self.stored.address_en, 'Main Street 1')
+        self.assertEqual(Place.objects.count(), 1)
+
+    def test_same_name_outside_radius_is_created(self):
+        stats = self.import_rows([row('Café Central', 36.14 + 50 * STEP, -5.35)])
+        self.assertEqual(stats, Counter(created=1))
+        self.assertEqual(Place.objects.filter(name_en='Café Central').count(), 2)
+
+    def test_different_name_within_radius_is_created(self):
+        stats = self.import_rows([row('Rock Hotel', 36.14 + STEP, -5.35)])
+        self.assertEqual(stats, Counter(created=1))
+
+    def test_duplicates_within_the_batch_are_merged(self):
+        stats = self.import_rows([
+            row('Rock Hotel', 36.15, -5.35),
+            row('Rock hotel', 36.15 + STEP, -5.35, address='Europa Road 3'),
+        ])
+        self.assertEqual(stats, Counter({'created': 1, 'duplicate (in file)': 1}))
+        hotel = Place.objects.get(name_en='Rock Hotel')
+        self.assertEqual(hotel.address_en, 'Europa Road 3')
+
+    def test_import_places_streams_a_file_in_batches(self):
+        features = [feature(f'Viewpoint {i}', 36.10 + i * 100 * STEP, -5.35, tourism='viewpoint') for i in range(5)]
+        features.append(feature('Cafe Central', 36.14 + STEP, -5.35))
+        features.append({'type': 'Feature', 'properties': {}, 'geometry': None})
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'places.geojson')
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump({'type': 'FeatureCollection', 'features': features}, f)
+            count, stats = import_places(path, batch_size=2)
+
+        self.assertEqual(count, 7)
+        self.assertEqual(stats['created'], 5)
+        self.assertEqual(stats['duplicate'], 1)
+        self.assertEqual(stats['skipped (no name)'], 1)
+        category = PlaceCategory.objects.get(slug='viewpoint')
+        self.assertEqual(category.places.count(), 5)
@@ -0,0 +1,208 @@
+# src/places/vector_tiles.py
+
+import os
+import shutil
+import time
+
+from django.conf import settings
+from django.db import connection, transaction
+from modeltranslation import settings as mt_settings
+from modeltranslation.utils import build_localized_fieldname
+
+from core.cache import bump_namespace_on_commit, get_namespace_versions
+from core.tiles import MAX_ZOOM, tile_size, tiles_touching
+from .models import Place, PlaceCategory
+
+# =================================================================
+#  VECTOR TILES
+# =================================================================
+# Map layers served as Mapbox Vector Tiles, rendered by PostGIS
+# (ST_AsMVT / ST_AsMVTGeom) with the minimal attributes a marker needs, in
+# every language at once (`name_en`, `name_es`, ...), so one tile serves
+# them all.
+#
+# Rendered tiles are cached on disk, under
+# TILE_CACHE_DIR/<layer>/<layer version>/<z>/<x>/<y>.mvt:
+# - an edit to one feature deletes just the tiles, at every zoom, that
+#   contain its old or new position (see invalidate_points);
+# - a change touching a whole layer (e.g. a place category's icon, a city
+#   moving all of its listings) bumps the layer's version, a cache
+#   namespace, which moves the layer to a fresh directory;
+# - any tile older than TILE_CACHE_TIMEOUT is rendered again, which bounds
+#   the staleness of a tile rendered while an edit was committing.
+# `manage.py prune_tile_cache` removes the directories of old versions.
+
+EXTENT = 4096
+# Features are clipped this far (in tile units) beyond the tile's edge, so
+# markers straddling an edge are drawn whole on both tiles.
+BUFFER = 256
+
+# Below this zoom the layers are too dense for raw points: tiles are empty
+# and the clustered markers of /api/v1/places/map/ are used instead.
+MIN_ZOOM = 10
+
+CONTENT_TYPE = 'application/vnd.mapbox-vector-tile'
+
+
+def _names(alias, field):
+    return ', '.join(
+        f'{alias}.{build_localized_fieldname(field, language)} AS {build_localized_fieldname("name", language)}'
+        for language in mt_settings.AVAILABLE_LANGUAGES
+    )
+
+
+def _places_sql():
+    return f"""
+        SELECT p.id, {_names('p', 'name')}, c.slug AS category, c.icon,
+               ST_AsMVTGeom(ST_Transform(p.location, 3857), bounds.geom, {EXTENT}, {BUFFER}, true) AS geom
+        FROM {Place._meta.db_table} p
+        LEFT JOIN {PlaceCategory._meta.db_table} c ON c.id = p.category_id, bounds
+        WHERE p.is_approved AND p.location && ST_Transform(bounds.buffered, 4326)
+    """
+
+
+def _listings_sql():
+    from listings.models import ListingCard
+
+    # Read from the cards, whose location (the listing's, else its city's)
+    # is a geography column with a GiST index.
+    return f"""
+        SELECT l.listing_id AS id, l.slug, {_names('l', 'title')}, l.price::float8 AS price, l.currency,
+               ST_AsMVTGeom(ST_Transform(l.location::geometry, 3857), bounds.geom, {EXTENT}, {BUFFER}, true) AS geom
+        FROM {ListingCard._meta.db_table} l, bounds
+        WHERE l.is_active AND NOT l.is_sold AND l.location && ST_Transform(bounds.buffered, 4326)::geography
+    """
+
+
+# Layer name -> function returning the SELECT of its features, which can
+# refer to `bounds.geom` (the tile) and `bounds.buffered` (with the buffer).
+LAYERS = {
+    'places': _places_sql,
+    'listings': _listings_sql,
+}
+
+TILE_SQL = """
+    WITH bounds AS (
+        SELECT ST_TileEnvelope(%(z)s, %(x)s, %(y)s) AS geom,
+               ST_Expand(ST_TileEnvelope(%(z)s, %(x)s, %(y)s), %(margin)s) AS buffered
+    )
+    SELECT ST_AsMVT(features, %(layer)s, {extent}, 'geom', 'id')
+    FROM ({features}) features
+    WHERE features.geom IS NOT NULL
+"""
+
+
+def render_tile(layer, z, x, y):
+    """
+    Renders one tile of `layer` with a single query. Returns bytes (empty
+    when no feature falls in the tile).
+    """
+    sql = TILE_SQL.format(extent=EXTENT, features=LAYERS[layer]())
+    params = {'z': z, 'x': x, 'y': y, 'layer': layer, 'margin': tile_size(z) * BUFFER / EXTENT}
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        row = cursor.fetchone()
+    return bytes(row[0]) if row and row[0] else b''
+
+
+# --- Disk cache ---
+
+def _namespace(layer):
+    return f'tiles-{layer}'
+
+
+def layer_directory(layer):
+    version = get_namespace_versions([_namespace(layer)])[_namespace(layer)]
+    return os.path.join(settings.TILE_CACHE_DIR, layer, str(version))
+
+
+def _tile_path(directory, z, x, y):
+    return os.path.join(directory, str(z), str(x), f'{y}.mvt')
+
+
+def get_tile(layer, z, x, y):
+    """
+    Returns the tile of `layer`, from the disk cache when it's there and
+    fresh, else rendered and stored (written to a temporary file, then
+    renamed, so readers never see a partial tile).
+    """
+    if z < MIN_ZOOM:
+        return b''
+    path = _tile_path(layer_directory(layer), z, x, y)
+    try:
+        if time.time() - os.path.getmtime(path) < settings.TILE_CACHE_TIMEOUT:
+            with open(path, 'rb') as f:
+                return f.read()
+    except FileNotFoundError:
+        pass
+
+    data = render_tile(layer, z, x, y)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    temporary = f'{path}.{os.getpid()}.tmp'
+    with open(temporary, 'wb') as f:
+        f.write(data)
+    os.replace(temporary, path)
+    return data
+
+
+def invalidate_points(layer, points):
+    """
+    Deletes the cached tiles of `layer`, at every served zoom, that can
+    draw any of `points` (WGS84 Point geometries; None is ignored).
+    """
+    points = [point for point in points if point is not None]
+    if not points:
+        return
+    directory = layer_directory(layer)
+    for point in points:
+        for z in range(MIN_ZOOM, MAX_ZOOM + 1):
+            for x, y in tiles_touching(point.x, point.y, z, BUFFER / EXTENT):
+                try:
+                    os.remove(_tile_path(directory, z, x, y))
+                except FileNotFoundError:
+                    pass
+
+
+def invalidate_points_on_commit(layer, points):
+    points = list(points)
+    transaction.on_commit(lambda: invalidate_points(layer, points))
+
+
+def invalidate_cities_on_commit(city_ids):
+    """
+    Deletes the cached 'listings' tiles around the given cities, where
+    their listings are drawn, once the transaction commits.
+    """
+    from locations.models import City
+
+    city_ids = [city_id for city_id in city_ids if city_id is not None]
+    if city_ids:
+        transaction.on_commit(lambda: invalidate_points(
+            'listings', City.objects.filter(pk__in=city_ids).values_list('location', flat=True),
+        ))
+
+
+def bump_layer_on_commit(layer):
+    """
+    Invalidates every cached tile of `layer`.
+    """
+    bump_namespace_on_commit(_namespace(layer))
+
+
+def prune_tile_cache():
+    """
+    Deletes the cache directories of the past layer versions.
+    Returns the number of directories removed.
+    """
+    removed = 0
+    for layer in LAYERS:
+        current = layer_directory(layer)
+        root = os.path.dirname(current)
+        if not os.path.isdir(root):
+            continue
+        for name in os.listdir(root):
+            path = os.path.join(root, name)
+            if path != current and os.path.isdir(path):
+                shutil.rmtree(path, ignore_errors=True)
+                removed += 1
+    return removed
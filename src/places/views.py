@@ -1,3 +1,66 @@
-from django.shortcuts import render
+# src/places/views.py
 
-# Create your views here.
+from django.http import Http404, HttpResponse
+from modeltranslation.utils import get_language
+from rest_framework.exceptions import ValidationError
+from rest_framework.permissions import AllowAny
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from core.tiles import MAX_ZOOM, parse_bbox, tiles_in_bbox
+from .map import MAX_TILES, get_tiles
+from .vector_tiles import CONTENT_TYPE, LAYERS, get_tile
+
+# =================================================================
+#  API VIEWS
+# =================================================================
+
+class PlaceMapView(APIView):
+    """
+    API endpoint for the places map.
+    - GET ?bbox=<west,south,east,north>&zoom=<0-22>: the markers of the
+      approved places in the box: `clusters` (`lng`, `lat`, `count`) of
+      nearby places at low zoom, and individual `places` (`id`, `name`,
+      `category`, `lng`, `lat`). Computed and cached per map tile (see
+      places/map.py), so markers slightly outside the box may be included.
+    """
+    permission_classes = [AllowAny]
+
+    def get_params(self):
+        params = self.request.query_params
+        errors = {}
+        try:
+            bbox = parse_bbox(params.get('bbox'))
+        except ValueError as exc:
+            errors['bbox'] = [str(exc)]
+        try:
+            zoom = int(params.get('zoom', ''))
+            if not 0 <= zoom <= MAX_ZOOM:
+                raise ValueError
+        except ValueError:
+            errors['zoom'] = [f'An integer between 0 and {MAX_ZOOM} is required.']
+        if errors:
+            raise ValidationError(errors)
+        return bbox, zoom
+
+    def get(self, request, *args, **kwargs):
+        bbox, zoom = self.get_params()
+        tiles = tiles_in_bbox(*bbox, zoom)
+        if len(tiles) > MAX_TILES:
+            raise ValidationError({'zoom': ['The box is too large for this zoom level.']})
+        clusters, places = [], []
+        for tile in get_tiles(zoom, tiles, get_language()):
+            clusters.extend(tile['clusters'])
+            places.extend(tile['places'])
+        return Response({'zoom': zoom, 'clusters': clusters, 'places': places})
+
+
+def vector_tile(request, layer, z, x, y):
+    """
+    Serves one Mapbox Vector Tile of a map layer ('places' or 'listings'),
+    from the disk cache when possible (see places/vector_tiles.py).
+    """
+    if layer not in LAYERS or z > MAX_ZOOM or x >= 1 << z or y >= 1 << z:
+        raise Http404('No such tile.')
+    response = HttpResponse(get_tile(layer, z, x, y), content_type=CONTENT_TYPE)
+    response['Cache-Control'] = 'public, max-age=60'
+    return response
@@ -12,12 +12,17 @@ class Review(models.Model):
     text = models.TextField(_("Review Text"))
     rating = models.PositiveSmallIntegerField(_("Rating"), validators=[MinValueValidator(1), MaxValueValidator(5)])
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         verbose_name = _("Review")
         verbose_name_plural = _("Reviews")
         ordering = ['-created_at']
         unique_together = ('listing', 'author')
+        indexes = [
+            # Backs the keyset-paginated reviews of a single listing.
+            models.Index(fields=['listing', '-created_at', '-id'], name='review_listing_feed_idx'),
+        ]
 
     def __str__(self):
         return f"Review by {self.author} for {self.listing.title}"
\ No newline at end of file
@@ -3,17 +3,19 @@
 from rest_framework import serializers
 from .models import Review
 from accounts.serializers import UserSerializer
+from core.serializers import DynamicFieldsMixin
 
 # =================================================================
 #  REVIEW SERIALIZER (FOR DISPLAYING REVIEWS)
 # =================================================================
 
-class ReviewSerializer(serializers.ModelSerializer):
+class ReviewSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """
     Serializer for displaying a list of reviews.
-    Includes nested author information for a rich display.
+    Includes nested author information for a rich display when expanded.
     """
-    author = UserSerializer(read_only=True)
+    # The model stores the review body in 'text'; the API exposes it as 'comment'.
+    comment = serializers.CharField(source='text', read_only=True)
 
     class Meta:
         model = Review
@@ -25,6 +27,10 @@ class ReviewSerializer(serializers.ModelSerializer):
             'comment',
             'created_at',
         )
+        expandable_fields = {
+            'author': (UserSerializer, {'read_only': True}),
+        }
+        select_related_fields = {'author': 'author'}
 
 
 # =================================================================
@@ -36,6 +42,8 @@ class ReviewCreateSerializer(serializers.ModelSerializer):
     Serializer for creating a new review.
     The 'author' and 'listing' will be set automatically in the view.
     """
+    comment = serializers.CharField(source='text')
+
     class Meta:
         model = Review
         fields = ('rating', 'comment')
\ No newline at end of file
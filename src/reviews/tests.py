@@ -1,3 +1,94 @@
+from datetime import datetime, timezone
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
 from django.test import TestCase
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from categories.models import Category
+from listings.models import Listing
+from .models import Review
+
+User = get_user_model()
+
+
+class ReviewPaginationTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        seller = User.objects.create_user(username='seller', email='seller@example.com', password='secret')
+        category = Category.objects.create(name='Cars', slug='cars')
+        cls.listing = Listing.objects.create(title='Listing', category=category, author=seller, price=100)
+        cls.other_listing = Listing.objects.create(title='Other', category=category, author=seller, price=100)
+        cls.reviews = []
+        for i in range(5):
+            author = User.objects.create_user(username=f'buyer{i}', email=f'buyer{i}@example.com', password='secret')
+            cls.reviews.append(Review.objects.create(listing=cls.listing, author=author, text=f'Review {i}', rating=5))
+            Review.objects.create(listing=cls.other_listing, author=author, text='Elsewhere', rating=1)
+        # Every review in the same instant: only the pk orders them.
+        Review.objects.update(created_at=datetime(2025, 3, 1, tzinfo=timezone.utc))
+        cls.url = reverse('api:listing-reviews', kwargs={'listing_slug': cls.listing.slug})
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+
+    def get_page(self, url, **params):
+        response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 200, response.content)
+        page = response.json()
+        return page, [review['id'] for review in page['results']]
+
+    def test_walking_forward_and_back_through_ties(self):
+        newest_first = [review.pk for review in reversed(self.reviews)]
+
+        page, ids = self.get_page(self.url, page_size=2)
+        self.assertEqual(ids, newest_first[0:2])
+        self.assertIsNone(page['previous'])
+        page, ids = self.get_page(page['next'])
+        self.assertEqual(ids, newest_first[2:4])
+        page, ids = self.get_page(page['next'])
+        self.assertEqual(ids, newest_first[4:])
+        self.assertIsNone(page['next'])
+
+        page, ids = self.get_page(page['previous'])
+        self.assertEqual(ids, newest_first[2:4])
+        page, ids = self.get_page(page['previous'])
+        self.assertEqual(ids, newest_first[0:2])
+        self.assertIsNone(page['previous'])
+        self.assertIsNotNone(page['next'])
+
+    def test_tampered_cursor_is_a_400(self):
+        response = self.client.get(self.url, {'cursor': 'Znw='})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('cursor', response.json())
+
+
+class ReviewConditionalGetTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        seller = User.objects.create_user(username='seller', email='seller@example.com', password='secret')
+        category = Category.objects.create(name='Cars', slug='cars')
+        listing = Listing.objects.create(title='Listing', category=category, author=seller, price=100)
+        cls.buyer = User.objects.create_user(username='buyer', email='buyer@example.com', password='secret')
+        Review.objects.create(listing=listing, author=cls.buyer, text='Great', rating=5)
+        cls.url = reverse('api:listing-reviews', kwargs={'listing_slug': listing.slug})
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+
+    def test_an_author_profile_change_changes_the_etag(self):
+        etag = self.client.get(self.url)['ETag']
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        self.buyer.username = 'renamed'
+        self.buyer.save()
+        cache.clear()
 
-# Create your tests here.
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertEqual(response.json()['results'][0]['author']['username'], 'renamed')
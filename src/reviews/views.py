@@ -1,29 +1,53 @@
 # src/reviews/views.py
 
+from django.db.models import Count, Max
 from rest_framework import generics, permissions, status
 from rest_framework.response import Response
 from rest_framework.exceptions import ValidationError
 from .models import Review
 from listings.models import Listing
 from .serializers import ReviewSerializer, ReviewCreateSerializer
+from core.conditional import ConditionalGetMixin
+from core.pagination import KeysetPagination
+from core.views import CompiledListMixin, SparseFieldsetsMixin
 
 # =================================================================
 #  API VIEWS
 # =================================================================
 
-class ReviewListCreateView(generics.ListCreateAPIView):
+class ReviewListCreateView(ConditionalGetMixin, SparseFieldsetsMixin, CompiledListMixin, generics.ListCreateAPIView):
     """
     API endpoint that allows reviews for a listing to be viewed or created.
-    - GET: returns a list of all reviews for a specific listing.
+    - GET: returns a cursor-paginated list of reviews for a specific listing.
+      Supports ETag / If-Modified-Since (304).
     - POST: creates a new review for a specific listing.
     """
+    pagination_class = KeysetPagination
+    default_expand = ('author',)
+
     def get_queryset(self):
         """
         This view should return a list of all the reviews
         for the listing as determined by the listing_slug portion of the URL.
         """
         listing_slug = self.kwargs['listing_slug']
-        return Review.objects.filter(listing__slug=listing_slug).select_related('author')
+        # The author is joined by SparseFieldsetsMixin, only if rendered.
+        return Review.objects.filter(listing__slug=listing_slug)
+
+    def get_condition(self, request):
+        """
+        The number of reviews of the listing and their latest `updated_at`,
+        and the latest `updated_at` of their authors, who are expanded by
+        default: a profile change (username, avatar) changes the ETag too.
+        """
+        state = Review.objects.filter(listing__slug=self.kwargs['listing_slug']).aggregate(
+            count=Count('pk'), last_modified=Max('updated_at'), authors_modified=Max('author__updated_at'),
+        )
+        stamps = [stamp for stamp in (state['last_modified'], state['authors_modified']) if stamp is not None]
+        return (
+            (self.kwargs['listing_slug'], state['count'], state['last_modified'], state['authors_modified']),
+            max(stamps, default=None),
+        )
 
     def get_serializer_class(self):
         """
@@ -55,7 +79,7 @@ class ReviewListCreateView(generics.ListCreateAPIView):
         user = self.request.user
 
         # --- Business Logic Checks ---
-        if listing.owner == user:
+        if listing.author == user:
             raise ValidationError("You cannot review your own listing.")
 
         if Review.objects.filter(listing=listing, author=user).exists():
@@ -1,3 +1,18 @@
+# src/search/admin.py
+
 from django.contrib import admin
+from .models import SavedSearch
+
+# =================================================================
+#  SAVED SEARCH ADMIN
+# =================================================================
 
-# Register your models here.
+@admin.register(SavedSearch)
+class SavedSearchAdmin(admin.ModelAdmin):
+    """
+    Admin configuration for the SavedSearch model.
+    """
+    list_display = ('name', 'user', 'category', 'min_price', 'max_price', 'is_active', 'created_at')
+    list_filter = ('is_active', 'language')
+    search_fields = ('name', 'keywords', 'user__username', 'user__email')
+    raw_id_fields = ('user',)
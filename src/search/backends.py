@@ -0,0 +1,20 @@
+# src/search/backends.py
+
+from django.conf import settings
+
+# =================================================================
+#  SEARCH BACKEND
+# =================================================================
+
+def get_backend():
+    """
+    Returns the module ranking listing searches, per settings.SEARCH_BACKEND:
+    `search.documents` (Postgres full-text search) or `search.index` (the
+    in-process BM25 snapshot). Both provide `match_listings()`,
+    `search_listings()` and `match_listing_ids()`.
+    """
+    if settings.SEARCH_BACKEND == 'index':
+        from . import index
+        return index
+    from . import documents
+    return documents
@@ -0,0 +1,85 @@
+# src/search/documents.py
+
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.db import connection
+from django.db.models import F
+
+from listings.models import Listing
+
+from .sql import REBUILD_ALL
+
+# =================================================================
+#  FULL-TEXT QUERIES
+# =================================================================
+
+# Postgres text search configuration of each language's search vector.
+SEARCH_CONFIGS = {
+    'en': 'english',
+    'es': 'spanish',
+}
+
+# ts_rank_cd weights for the D, C, B and A labels (other, description,
+# category path, title).
+RANK_WEIGHTS = [0.1, 0.2, 0.4, 1.0]
+
+# Divides the rank by 1 + log(document length), so long descriptions
+# don't outrank short, precise titles.
+RANK_NORMALIZATION = 1
+
+
+def _vector_and_query(queryset, text, language):
+    if language not in SEARCH_CONFIGS:
+        language = 'en'
+    vector = f'search_document__vector_{language}'
+    if queryset.model._meta.model_name != 'listing':
+        # Models keyed by the listing, e.g. ListingCard.
+        vector = f'listing__{vector}'
+    return vector, SearchQuery(text, config=SEARCH_CONFIGS[language], search_type='websearch')
+
+
+def match_listings(queryset, text, language):
+    """
+    Filters a Listing queryset, or a queryset of a model keyed by the listing
+    (e.g. ListingCard), to the rows matching `text` in `language`.
+    `text` uses web search syntax: "quoted phrases", `or` and `-excluded` words.
+    """
+    vector, query = _vector_and_query(queryset, text, language)
+    return queryset.filter(**{vector: query})
+
+
+def search_listings(queryset, text, language):
+    """
+    Like `match_listings()`, ordered by relevance, then recency, with the
+    relevance in a `rank` annotation.
+    """
+    vector, query = _vector_and_query(queryset, text, language)
+    return queryset.filter(**{vector: query}).annotate(
+        rank=SearchRank(
+            F(vector), query, weights=RANK_WEIGHTS, cover_density=True, normalization=RANK_NORMALIZATION,
+        ),
+    ).order_by('-rank', '-created_at', '-pk')
+
+
+def match_listing_ids(listing_ids, text, language):
+    """
+    Returns the subset of `listing_ids` matching `text` in `language`.
+    """
+    return set(match_listings(
+        Listing.objects.filter(pk__in=listing_ids), text, language,
+    ).values_list('pk', flat=True))
+
+
+# =================================================================
+#  MAINTENANCE
+# =================================================================
+
+def refresh_documents(listing_ids=None):
+    """
+    Rebuilds the search documents of `listing_ids`, or of every listing.
+    Only needed for repairs: the database triggers keep them up to date.
+    """
+    with connection.cursor() as cursor:
+        if listing_ids is None:
+            cursor.execute(REBUILD_ALL)
+        else:
+            cursor.execute('SELECT search_refresh_documents(%s::bigint[])', [list(listing_ids)])
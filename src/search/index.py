@@ -0,0 +1,516 @@
+# src/search/index.py
+
+import json
+import logging
+import math
+import mmap
+import os
+import sys
+import tempfile
+import threading
+import time
+from array import array
+from bisect import bisect_left
+from collections import Counter
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.db.models import Case, FloatField, Value, When
+from django.db.models.expressions import RawSQL
+from django.utils import timezone
+from modeltranslation import settings as mt_settings
+from modeltranslation.utils import build_localized_fieldname
+
+from listings.cards import category_paths
+from listings.models import Listing
+from . import documents
+from .suggest import normalize
+
+logger = logging.getLogger(__name__)
+
+# =================================================================
+#  BM25 INDEX SNAPSHOT
+# =================================================================
+# `manage.py build_search_index` compiles the active listings into one
+# inverted index file per language, which the search app memory-maps and
+# scores with BM25 in-process: no database round trip to rank, and no
+# dependency on the Postgres text search machinery.
+#
+# File layout (native byte order, every section 8-byte aligned):
+#
+#   MAGIC | uint32 header length | JSON header | sections...
+#
+#   doc_ids           int64[N]    listing ids, ascending (doc number = position)
+#   doc_lengths       uint32[N]   weighted token counts
+#   term_offsets      uint64[T+1] into term_bytes
+#   term_bytes        bytes       vocabulary, UTF-8, sorted bytewise
+#   posting_offsets   uint64[T+1] into posting_docs / posting_tfs
+#   posting_docs      uint32[P]   doc numbers, ascending within a term
+#   posting_tfs       uint32[P]   weighted term frequencies
+#
+# The header holds the language, the build time, N, the average document
+# length and the offset, type code and length of every section.
+#
+# Listings written after the build are applied on top of the snapshot as a
+# small in-memory delta (see LiveSearchIndex), until the next build.
+
+MAGIC = b'GBM25\x00\x01\x00'
+
+SECTIONS = (
+    ('doc_ids', 'q'),
+    ('doc_lengths', 'I'),
+    ('term_offsets', 'Q'),
+    ('term_bytes', 'B'),
+    ('posting_offsets', 'Q'),
+    ('posting_docs', 'I'),
+    ('posting_tfs', 'I'),
+)
+
+# BM25 parameters.
+K1 = 1.2
+B = 0.75
+
+# Term frequency weight of each part of a listing (a light BM25F).
+FIELD_WEIGHTS = {'title': 3, 'category': 2, 'description': 1}
+
+# Ranked results returned per query, counted after the feed filters.
+MAX_RESULTS = 500
+
+# Seconds between two polls for listings written since the snapshot.
+REFRESH_INTERVAL = 30
+
+# Changed listings are re-read with this overlap (see search/suggest.py).
+WATERMARK_OVERLAP = timedelta(minutes=1)
+
+
+def tokenize(text):
+    return [token for token in normalize(text or '').split() if len(token) > 1]
+
+
+def index_path(language, directory=None):
+    return os.path.join(directory or settings.SEARCH_INDEX_DIR, f'listings-{language}.idx')
+
+
+# --- Documents ---
+
+def _listing_columns():
+    columns = ['pk', 'category_id', 'is_active']
+    for field in ('title', 'description'):
+        columns.extend(
+            build_localized_fieldname(field, language) for language in mt_settings.AVAILABLE_LANGUAGES
+        )
+    return columns
+
+
+def _localized(row, field, language):
+    # The same fallback as the API: missing translations read as English.
+    return row[build_localized_fieldname(field, language)] or row[build_localized_fieldname(field, 'en')] or ''
+
+
+def document_terms(row, paths, language):
+    """
+    Returns the weighted term frequencies of a listing (a `values()` row of
+    `_listing_columns()`) in `language`, and the document length.
+    """
+    path_en, path_es = paths.get(row['category_id'], ([], []))
+    parts = {
+        'title': _localized(row, 'title', language),
+        'category': ' '.join(path_es if language == 'es' else path_en),
+        'description': _localized(row, 'description', language),
+    }
+    terms = Counter()
+    for name, text in parts.items():
+        for token in tokenize(text):
+            terms[token] += FIELD_WEIGHTS[name]
+    return terms, sum(terms.values())
+
+
+# --- Building ---
+
+def _align(handle):
+    padding = -handle.tell() % 8
+    handle.write(b'\x00' * padding)
+
+
+def build_index(language, directory=None, chunk_size=2000):
+    """
+    Builds the index file of `language` from the active listings and
+    atomically replaces the previous one. Returns the number of documents.
+    """
+    built_at = timezone.now()
+    rows = Listing.objects.filter(is_active=True).order_by('pk').values(*_listing_columns())
+    paths = category_paths(Listing.objects.values_list('category_id', flat=True).distinct())
+
+    doc_ids = array('q')
+    doc_lengths = array('I')
+    postings = {}
+    for row in rows.iterator(chunk_size=chunk_size):
+        terms, length = document_terms(row, paths, language)
+        doc = len(doc_ids)
+        doc_ids.append(row['pk'])
+        doc_lengths.append(length)
+        for term, frequency in terms.items():
+            entry = postings.get(term)
+            if entry is None:
+                entry = postings[term] = (array('I'), array('I'))
+            entry[0].append(doc)
+            entry[1].append(frequency)
+
+    vocabulary = sorted(postings, key=lambda term: term.encode('utf-8'))
+    term_offsets, term_bytes = array('Q', [0]), bytearray()
+    posting_offsets, posting_docs, posting_tfs = array('Q', [0]), array('I'), array('I')
+    for term in vocabulary:
+        term_bytes += term.encode('utf-8')
+        term_offsets.append(len(term_bytes))
+        docs, frequencies = postings[term]
+        posting_docs.extend(docs)
+        posting_tfs.extend(frequencies)
+        posting_offsets.append(len(posting_docs))
+
+    data = {
+        'doc_ids': doc_ids,
+        'doc_lengths': doc_lengths,
+        'term_offsets': term_offsets,
+        'term_bytes': array('B', term_bytes),
+        'posting_offsets': posting_offsets,
+        'posting_docs': posting_docs,
+        'posting_tfs': posting_tfs,
+    }
+    header = {
+        'language': language,
+        'built_at': built_at.isoformat(),
+        'byteorder': sys.byteorder,
+        'documents': len(doc_ids),
+        'average_length': (sum(doc_lengths) / len(doc_lengths)) if doc_lengths else 0.0,
+        'sections': {},
+    }
+    # Section offsets depend on the header length: lay them out against a
+    # header padded to a fixed size.
+    header_size = 4096
+    offset = len(MAGIC) + 4 + header_size
+    for name, typecode in SECTIONS:
+        offset += -offset % 8
+        header['sections'][name] = [offset, typecode, len(data[name])]
+        offset += len(data[name]) * data[name].itemsize
+    encoded = json.dumps(header).encode('utf-8')
+    if len(encoded) > header_size:
+        raise ValueError('The index header is too large.')
+    encoded = encoded.ljust(header_size)
+
+    path = index_path(language, directory)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    handle = tempfile.NamedTemporaryFile('wb', dir=os.path.dirname(path), delete=False)
+    try:
+        with handle:
+            handle.write(MAGIC)
+            handle.write(len(encoded).to_bytes(4, sys.byteorder))
+            handle.write(encoded)
+            for name, _ in SECTIONS:
+                _align(handle)
+                data[name].tofile(handle)
+        os.replace(handle.name, path)
+    except BaseException:
+        os.unlink(handle.name)
+        raise
+    return len(doc_ids)
+
+
+# --- Reading ---
+
+class IndexSnapshot:
+    """
+    A memory-mapped index file. Sections are read in place, as memoryviews;
+    only the postings of the query terms are ever touched.
+    """
+
+    def __init__(self, path):
+        with open(path, 'rb') as handle:
+            self._mmap = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+        view = memoryview(self._mmap)
+        if bytes(view[:len(MAGIC)]) != MAGIC:
+            raise ValueError(f'{path} is not a search index file.')
+        length = int.from_bytes(view[len(MAGIC):len(MAGIC) + 4], sys.byteorder)
+        start = len(MAGIC) + 4
+        self.header = json.loads(bytes(view[start:start + length]).decode('utf-8'))
+        if self.header['byteorder'] != sys.byteorder:
+            raise ValueError(f'{path} was built on a machine of another byte order.')
+        for name, (offset, typecode, count) in self.header['sections'].items():
+            itemsize = array(typecode).itemsize
+            setattr(self, name, view[offset:offset + count * itemsize].cast(typecode))
+        self.path = path
+        self.language = self.header['language']
+        self.built_at = datetime.fromisoformat(self.header['built_at'])
+        self.documents = self.header['documents']
+        self.average_length = self.header['average_length'] or 1.0
+
+    def close(self):
+        for name, _ in SECTIONS:
+            getattr(self, name).release()
+        self._mmap.close()
+
+    def _term_at(self, position):
+        return bytes(self.term_bytes[self.term_offsets[position]:self.term_offsets[position + 1]])
+
+    def find_term(self, term):
+        """
+        Returns the position of `term` in the vocabulary, or None.
+        """
+        encoded = term.encode('utf-8')
+        low, high = 0, len(self.term_offsets) - 1
+        while low < high:
+            middle = (low + high) // 2
+            if self._term_at(middle) < encoded:
+                low = middle + 1
+            else:
+                high = middle
+        if low < len(self.term_offsets) - 1 and self._term_at(low) == encoded:
+            return low
+        return None
+
+    def postings(self, position):
+        start, end = self.posting_offsets[position], self.posting_offsets[position + 1]
+        return self.posting_docs[start:end], self.posting_tfs[start:end]
+
+    def doc_number(self, listing_id):
+        position = bisect_left(self.doc_ids, listing_id)
+        if position < len(self.doc_ids) and self.doc_ids[position] == listing_id:
+            return position
+        return None
+
+
+def _idf(documents, frequency):
+    return math.log(1 + (documents - frequency + 0.5) / (frequency + 0.5))
+
+
+def _bm25(frequency, length, average_length, idf):
+    return idf * frequency * (K1 + 1) / (frequency + K1 * (1 - B + B * length / average_length))
+
+
+class LiveSearchIndex:
+    """
+    The snapshot of one language plus the listings written since it was
+    built: `{listing_id: (terms, length)}`, or None for listings that are
+    no longer active. Every query term must match (as in the Postgres
+    search); results are ranked by BM25.
+    """
+
+    def __init__(self, language, directory=None):
+        self.language = language
+        self.directory = directory
+        self._lock = threading.RLock()
+        self._snapshot = None
+        self._mtime = None
+        self._delta = {}
+        self._watermark = None
+        self._refreshed_at = 0.0
+
+    # --- Maintenance ---
+
+    def _load(self):
+        path = index_path(self.language, self.directory)
+        if not os.path.exists(path):
+            raise FileNotFoundError(f'No search index at {path}: run `manage.py build_search_index`.')
+        mtime = os.stat(path).st_mtime
+        if mtime == self._mtime:
+            return
+        snapshot = IndexSnapshot(path)
+        previous, self._snapshot, self._mtime = self._snapshot, snapshot, mtime
+        self._delta = {}
+        self._watermark = snapshot.built_at
+        # Lookups may still be reading the previous snapshot: let it be
+        # unmapped by the garbage collector rather than closing it here.
+        del previous
+
+    def apply_changes(self, listing_ids=None):
+        """
+        Re-reads the given listings, or those written since the last call,
+        into the delta.
+        """
+        with self._lock:
+            self._apply_changes(listing_ids)
+
+    def _apply_changes(self, listing_ids):
+        queryset = Listing.objects.all()
+        if listing_ids is not None:
+            queryset = queryset.filter(pk__in=listing_ids)
+        elif self._watermark is not None:
+            queryset = queryset.filter(updated_at__gte=self._watermark - WATERMARK_OVERLAP)
+        rows = list(queryset.values(*_listing_columns(), 'updated_at'))
+        paths = category_paths({row['category_id'] for row in rows})
+        seen = {row['pk'] for row in rows}
+        for row in rows:
+            self._delta[row['pk']] = document_terms(row, paths, self.language) if row['is_active'] else None
+            if listing_ids is None and (self._watermark is None or row['updated_at'] > self._watermark):
+                self._watermark = row['updated_at']
+        for listing_id in set(listing_ids or ()) - seen:
+            # Deleted.
+            self._delta[listing_id] = None
+
+    def _maybe_refresh(self):
+        now = time.monotonic()
+        if self._snapshot is not None and now - self._refreshed_at < REFRESH_INTERVAL:
+            return
+        if not self._lock.acquire(blocking=self._snapshot is None):
+            return
+        try:
+            self._load()
+            self.apply_changes()
+            self._refreshed_at = now
+        finally:
+            self._lock.release()
+
+    # --- Queries ---
+
+    def search(self, text, limit=None):
+        """
+        Returns `(listing_id, score)` pairs for the listings containing every
+        term of `text`, best first: all of them, or the first `limit`.
+        """
+        self._maybe_refresh()
+        snapshot, delta = self._snapshot, dict(self._delta)
+        terms = list(dict.fromkeys(tokenize(text)))
+        if not terms:
+            return []
+
+        positions = [snapshot.find_term(term) for term in terms]
+        frequencies = [
+            0 if position is None else snapshot.posting_offsets[position + 1] - snapshot.posting_offsets[position]
+            for position in positions
+        ]
+        idfs = [_idf(snapshot.documents, frequency) for frequency in frequencies]
+        scores = {}
+
+        if all(position is not None for position in positions):
+            # Candidates come from the rarest term; the others are probed
+            # by binary search in their (sorted) postings.
+            order = sorted(range(len(terms)), key=frequencies.__getitem__)
+            docs, tfs = snapshot.postings(positions[order[0]])
+            candidates = {doc: [tf] for doc, tf in zip(docs, tfs)}
+            for term_index in order[1:]:
+                docs, tfs = snapshot.postings(positions[term_index])
+                survivors = {}
+                for doc, found in candidates.items():
+                    position = bisect_left(docs, doc)
+                    if position < len(docs) and docs[position] == doc:
+                        survivors[doc] = found + [tfs[position]]
+                candidates = survivors
+                if not candidates:
+                    break
+            for doc, found in candidates.items():
+                listing_id = snapshot.doc_ids[doc]
+                if listing_id in delta:
+                    continue
+                length = snapshot.doc_lengths[doc]
+                scores[listing_id] = sum(
+                    _bm25(tf, length, snapshot.average_length, idfs[term_index])
+                    for term_index, tf in zip(order, found)
+                )
+
+        for listing_id, document in delta.items():
+            if document is None:
+                continue
+            counts, length = document
+            if all(term in counts for term in terms):
+                scores[listing_id] = sum(
+                    _bm25(counts[term], length, snapshot.average_length, idf)
+                    for term, idf in zip(terms, idfs)
+                )
+        return sorted(scores.items(), key=lambda item: (-item[1], -item[0]))[:limit]
+
+
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+
+def get_search_index(language):
+    """
+    The process-wide LiveSearchIndex of `language` (or of the default
+    language), loaded on first use.
+    """
+    if language not in mt_settings.AVAILABLE_LANGUAGES:
+        language = mt_settings.DEFAULT_LANGUAGE
+    with _indexes_lock:
+        if language not in _indexes:
+            _indexes[language] = LiveSearchIndex(language)
+    return _indexes[language]
+
+
+def loaded_indexes():
+    """
+    The indexes this process has loaded a snapshot into.
+    """
+    return [index for index in list(_indexes.values()) if index._snapshot is not None]
+
+
+# --- Query helpers, mirroring search/documents.py ---
+# Unlike the Postgres backend, queries are plain words, all required:
+# there's no phrase, `or` or `-excluded` syntax. Until an index file has
+# been built for the language, searches go to the Postgres backend.
+
+def _ranked(text, language):
+    """
+    Returns every `(listing_id, score)` match of `text`, best first, or
+    None when there's no index file to search.
+    """
+    try:
+        return get_search_index(language).search(text)
+    except FileNotFoundError:
+        logger.warning('No search index for %r: searching with Postgres.', language)
+        return None
+
+
+def _in_ids(listing_ids):
+    # One array parameter, however many ids.
+    return RawSQL('SELECT unnest(%s::bigint[])', (list(listing_ids),))
+
+
+def match_listings(queryset, text, language):
+    """
+    Filters a Listing queryset, or one of a model keyed by the listing
+    (e.g. ListingCard), to every match of `text`.
+    """
+    ranked = _ranked(text, language)
+    if ranked is None:
+        return documents.match_listings(queryset, text, language)
+    if not ranked:
+        return queryset.none()
+    return queryset.filter(pk__in=_in_ids(listing_id for listing_id, _ in ranked))
+
+
+def search_listings(queryset, text, language):
+    """
+    Like `match_listings()`, ordered by BM25 score, then recency, with the
+    score in a `rank` annotation. Only the best MAX_RESULTS matches are
+    kept, chosen among the rows of `queryset`: filter it first, so filters
+    never drop matches that rank below others they exclude.
+    """
+    ranked = _ranked(text, language)
+    if ranked is None:
+        return documents.search_listings(queryset, text, language)
+    if not ranked:
+        return queryset.none()
+    scores = dict(ranked)
+    matching = queryset.filter(pk__in=_in_ids(scores)).order_by().values_list('pk', flat=True)
+    best = sorted(matching, key=lambda listing_id: (-scores[listing_id], -listing_id))[:MAX_RESULTS]
+    if not best:
+        return queryset.none()
+    return queryset.filter(pk__in=best).annotate(
+        rank=Case(
+            *[When(pk=listing_id, then=Value(scores[listing_id])) for listing_id in best],
+            output_field=FloatField(),
+        ),
+    ).order_by('-rank', '-created_at', '-pk')
+
+
+def match_listing_ids(listing_ids, text, language):
+    """
+    Returns the subset of `listing_ids` (active listings) containing every
+    term of `text`, checked on the listings themselves, not the snapshot.
+    """
+    terms = set(tokenize(text))
+    rows = list(Listing.objects.filter(pk__in=listing_ids, is_active=True).values(*_listing_columns()))
+    paths = category_paths({row['category_id'] for row in rows})
+    return {
+        row['pk'] for row in rows
+        if terms.issubset(document_terms(row, paths, language)[0])
+    }
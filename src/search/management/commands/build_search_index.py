@@ -0,0 +1,32 @@
+# src/search/management/commands/build_search_index.py
+
+import os
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from modeltranslation import settings as mt_settings
+from search.index import build_index, index_path
+
+class Command(BaseCommand):
+    help = 'Builds the on-disk BM25 index of the active listings, one file per language (see search/index.py)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--language', action='append', dest='languages',
+            help='Build only this language (repeatable). Defaults to every available language.',
+        )
+        parser.add_argument(
+            '--directory', default=None,
+            help=f'Output directory. Defaults to SEARCH_INDEX_DIR ({settings.SEARCH_INDEX_DIR}).',
+        )
+
+    def handle(self, *args, **options):
+        for language in options['languages'] or mt_settings.AVAILABLE_LANGUAGES:
+            started = time.perf_counter()
+            documents = build_index(language, options['directory'])
+            path = index_path(language, options['directory'])
+            self.stdout.write(self.style.SUCCESS(
+                f'{language}: {documents} listings indexed into {path} '
+                f'({os.path.getsize(path) / 1024:.0f} KiB) in {time.perf_counter() - started:.1f}s'
+            ))
@@ -0,0 +1,33 @@
+# src/search/management/commands/percolate_saved_searches.py
+
+import time
+
+from django.core.management.base import BaseCommand
+from search.percolator import DEFAULT_BATCH_SIZE, process_queue
+
+class Command(BaseCommand):
+    help = 'Matches the queued listings against the saved searches and notifies the matches'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE, help='Listings per batch.')
+        parser.add_argument(
+            '--loop', action='store_true',
+            help='Keep running, polling the queue when it is empty (for a worker process).',
+        )
+        parser.add_argument('--interval', type=float, default=5.0, help='Seconds between polls with --loop.')
+
+    def handle(self, *args, **options):
+        listings = notifications = 0
+        while True:
+            processed, notified = process_queue(options['batch_size'])
+            listings += processed
+            notifications += notified
+            if processed:
+                self.stdout.write(f'Percolated {processed} listings, {notified} notifications.')
+                continue
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Queue drained. Listings: {listings}, notifications: {notifications}'
+        ))
@@ -0,0 +1,15 @@
+# src/search/management/commands/rebuild_search_documents.py
+
+from django.core.management.base import BaseCommand
+from search.documents import refresh_documents
+from search.models import SearchDocument
+
+class Command(BaseCommand):
+    help = 'Rebuilds the full-text search documents of every listing (they are normally kept up to date by triggers)'
+
+    def handle(self, *args, **options):
+        self.stdout.write(self.style.SUCCESS('Rebuilding search documents...'))
+        refresh_documents()
+        self.stdout.write(self.style.SUCCESS(
+            f'Rebuild complete. Documents: {SearchDocument.objects.count()}'
+        ))
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.4 on 2026-10-18 16:47
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('listings', '0009_image_variants'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchDocument',
+            fields=[
+                ('listing', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='search_document', serialize=False, to='listings.listing')),
+                ('vector_en', django.contrib.postgres.search.SearchVectorField(null=True, verbose_name='Search Vector (English)')),
+                ('vector_es', django.contrib.postgres.search.SearchVectorField(null=True, verbose_name='Search Vector (Spanish)')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Updated At')),
+            ],
+            options={
+                'verbose_name': 'Search Document',
+                'verbose_name_plural': 'Search Documents',
+                'indexes': [django.contrib.postgres.indexes.GinIndex(fields=['vector_en'], name='searchdoc_vector_en_gin'), django.contrib.postgres.indexes.GinIndex(fields=['vector_es'], name='searchdoc_vector_es_gin')],
+            },
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 5.2.4 on 2026-10-18 16:48
+
+from django.db import migrations
+
+from search.sql import CATEGORY_TRIGGERS, DROP_TRIGGERS, LISTING_TRIGGERS, REBUILD_ALL, REFRESH_FUNCTION
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('search', '0001_initial'),
+        ('categories', '0004_field_key'),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            sql=[REFRESH_FUNCTION, LISTING_TRIGGERS, CATEGORY_TRIGGERS, REBUILD_ALL],
+            reverse_sql=[DROP_TRIGGERS],
+        ),
+    ]
@@ -0,0 +1,18 @@
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    """
+    pg_trgm, for the typo-tolerant suggestions (see search/suggest.py).
+    The trigram indexes themselves belong to the listings, categories and
+    places apps, whose migrations depend on this one.
+    """
+
+    dependencies = [
+        ('search', '0002_document_triggers'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+    ]
@@ -0,0 +1,74 @@
+# Generated by Django 5.2.4 on 2026-10-18 16:53
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('categories', '0005_trigram_indexes'),
+        ('listings', '0010_trigram_indexes'),
+        ('locations', '0001_initial'),
+        ('search', '0003_trigram_extension'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PercolationQueueItem',
+            fields=[
+                ('listing', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='+', serialize=False, to='listings.listing')),
+                ('enqueued_at', models.DateTimeField(auto_now_add=True, db_index=True, verbose_name='Enqueued At')),
+            ],
+            options={
+                'verbose_name': 'Percolation Queue Item',
+                'verbose_name_plural': 'Percolation Queue',
+            },
+        ),
+        migrations.CreateModel(
+            name='SavedSearch',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, verbose_name='Name')),
+                ('min_price', models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True, verbose_name='Min Price')),
+                ('max_price', models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True, verbose_name='Max Price')),
+                ('keywords', models.CharField(blank=True, help_text='Web search syntax, as in the search endpoint.', max_length=200, verbose_name='Keywords')),
+                ('language', models.CharField(choices=[('en', 'English'), ('es', 'Spanish')], default='en', help_text='The language the keywords are matched in.', max_length=10, verbose_name='Language')),
+                ('attributes', models.JSONField(blank=True, default=dict, verbose_name='Attributes')),
+                ('is_active', models.BooleanField(default=True, verbose_name='Is Active')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Created At')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Updated At')),
+                ('category', models.ForeignKey(blank=True, help_text='Matches the category and all of its descendants.', null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='categories.category', verbose_name='Category')),
+                ('city', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='locations.city', verbose_name='City')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='saved_searches', to=settings.AUTH_USER_MODEL, verbose_name='User')),
+            ],
+            options={
+                'verbose_name': 'Saved Search',
+                'verbose_name_plural': 'Saved Searches',
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='SavedSearchMatch',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Created At')),
+                ('listing', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='listings.listing')),
+                ('saved_search', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='matches', to='search.savedsearch')),
+            ],
+            options={
+                'verbose_name': 'Saved Search Match',
+                'verbose_name_plural': 'Saved Search Matches',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='savedsearch',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['category', 'min_price'], name='savedsearch_active_cat_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='savedsearchmatch',
+            constraint=models.UniqueConstraint(fields=('saved_search', 'listing'), name='unique_saved_search_match'),
+        ),
+    ]
@@ -1,3 +1,160 @@
+# src/search/models.py
+
+from django.conf import settings
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
+from django.utils.translation import gettext_lazy as _
+
+# =================================================================
+#  FULL-TEXT SEARCH DOCUMENTS
+# =================================================================
+
+class SearchDocument(models.Model):
+    """
+    The full-text search document of a listing: one weighted `tsvector` per
+    language, built with that language's text search configuration from
+    the listing's title (weight A), its category path (B) and its
+    description (C). Missing Spanish texts fall back to English, as the
+    API does.
+
+    Rows are maintained by database triggers on the listings and category
+    tables (see search/sql.py), so every write path is covered, including
+    bulk writes and raw SQL, within the writing transaction.
+    """
+    listing = models.OneToOneField(
+        'listings.Listing',
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='search_document',
+    )
+    vector_en = SearchVectorField(_("Search Vector (English)"), null=True)
+    vector_es = SearchVectorField(_("Search Vector (Spanish)"), null=True)
+    updated_at = models.DateTimeField(_("Updated At"), auto_now=True)
+
+    class Meta:
+        verbose_name = _("Search Document")
+        verbose_name_plural = _("Search Documents")
+        indexes = [
+            GinIndex(fields=['vector_en'], name='searchdoc_vector_en_gin'),
+            GinIndex(fields=['vector_es'], name='searchdoc_vector_es_gin'),
+        ]
+
+    def __str__(self):
+        return f'Search document of listing {self.listing_id}'
+
+
+# =================================================================
+#  SAVED SEARCHES
+# =================================================================
+
+class SavedSearch(models.Model):
+    """
+    A search a user asked to be notified about: every new or changed listing
+    matching it creates a notification (see search/percolator.py).
+    All criteria are optional and combined with AND; they mean the same as
+    the listings feed filters and the search endpoint.
+    """
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='saved_searches',
+        verbose_name=_("User"),
+    )
+    name = models.CharField(_("Name"), max_length=100)
+    category = models.ForeignKey(
+        'categories.Category',
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='+',
+        verbose_name=_("Category"),
+        help_text=_("Matches the category and all of its descendants."),
+    )
+    city = models.ForeignKey(
+        'locations.City',
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='+',
+        verbose_name=_("City"),
+    )
+    min_price = models.DecimalField(_("Min Price"), max_digits=10, decimal_places=2, null=True, blank=True)
+    max_price = models.DecimalField(_("Max Price"), max_digits=10, decimal_places=2, null=True, blank=True)
+    keywords = models.CharField(
+        _("Keywords"),
+        max_length=200,
+        blank=True,
+        help_text=_("Web search syntax, as in the search endpoint."),
+    )
+    language = models.CharField(
+        _("Language"),
+        max_length=10,
+        choices=settings.LANGUAGES,
+        default=settings.LANGUAGE_CODE,
+        help_text=_("The language the keywords are matched in."),
+    )
+    # {key: {lookup: value}}, e.g. {"mileage": {"lt": 100000}}; see
+    # listings.filters.ATTRIBUTE_LOOKUPS for the lookups of each field type.
+    attributes = models.JSONField(_("Attributes"), default=dict, blank=True)
+    is_active = models.BooleanField(_("Is Active"), default=True)
+    created_at = models.DateTimeField(_("Created At"), auto_now_add=True)
+    updated_at = models.DateTimeField(_("Updated At"), auto_now=True)
+
+    class Meta:
+        verbose_name = _("Saved Search")
+        verbose_name_plural = _("Saved Searches")
+        ordering = ['-created_at']
+        indexes = [
+            # Candidate lookup of the percolator.
+            models.Index(
+                fields=['category', 'min_price'],
+                condition=models.Q(is_active=True),
+                name='savedsearch_active_cat_idx',
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.name} ({self.user})'
+
+
+class SavedSearchMatch(models.Model):
+    """
+    A listing that matched a saved search (and was notified), so a listing
+    that is edited later is never notified twice for the same search.
+    """
+    saved_search = models.ForeignKey(SavedSearch, on_delete=models.CASCADE, related_name='matches')
+    listing = models.ForeignKey('listings.Listing', on_delete=models.CASCADE, related_name='+')
+    created_at = models.DateTimeField(_("Created At"), auto_now_add=True)
+
+    class Meta:
+        verbose_name = _("Saved Search Match")
+        verbose_name_plural = _("Saved Search Matches")
+        constraints = [
+            models.UniqueConstraint(fields=['saved_search', 'listing'], name='unique_saved_search_match'),
+        ]
+
+    def __str__(self):
+        return f'Listing {self.listing_id} for saved search {self.saved_search_id}'
+
+
+class PercolationQueueItem(models.Model):
+    """
+    A listing waiting to be matched against the saved searches. Listings are
+    queued when they're written and percolated in batches, off the request
+    path, by `manage.py percolate_saved_searches`.
+    """
+    listing = models.OneToOneField(
+        'listings.Listing',
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='+',
+    )
+    enqueued_at = models.DateTimeField(_("Enqueued At"), auto_now_add=True, db_index=True)
+
+    class Meta:
+        verbose_name = _("Percolation Queue Item")
+        verbose_name_plural = _("Percolation Queue")
 
-# Create your models here.
+    def __str__(self):
+        return f'Listing {self.listing_id}'
@@ -0,0 +1,260 @@
+# src/search/percolator.py
+
+import operator
+from bisect import bisect_right
+from collections import defaultdict
+
+from django.contrib.contenttypes.models import ContentType
+from django.db import transaction
+from django.db.models import Q
+from django.utils.translation import gettext as _
+
+from categories.models import Category, Field
+from listings.filters import ATTRIBUTE_LOOKUPS
+from listings.models import Listing, ListingFieldValue
+from notifications.models import Notification
+from .backends import get_backend
+from .models import PercolationQueueItem, SavedSearch, SavedSearchMatch
+
+# =================================================================
+#  SAVED-SEARCH PERCOLATOR
+# =================================================================
+# Instead of running every saved search against the listings, each batch
+# of queued listings is run against the saved searches ("percolation"):
+#
+# 1. one query loads the candidate searches of the batch: active searches
+#    on any ancestor-or-self category of a listing, or on no category;
+# 2. they're indexed in memory by (category, price bucket), so each listing
+#    is only checked against the searches of its category path whose price
+#    range overlaps its price bucket;
+# 3. the remaining criteria are checked exactly: price, city and dynamic
+#    attributes in memory, keywords with one full-text query per distinct
+#    (keywords, language) over the whole batch;
+# 4. new matches are recorded and notified, in bulk.
+
+DEFAULT_BATCH_SIZE = 500
+
+# Lower bounds of the price buckets.
+PRICE_BUCKETS = (
+    0, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000,
+    25000, 50000, 100000, 250000, 500000, 1000000,
+)
+
+COMPARATORS = {
+    'exact': operator.eq,
+    'lt': operator.lt,
+    'lte': operator.le,
+    'gt': operator.gt,
+    'gte': operator.ge,
+    'in': lambda value, expected: value in expected,
+}
+
+
+def price_bucket(price):
+    return max(bisect_right(PRICE_BUCKETS, price) - 1, 0)
+
+
+def enqueue_listings(listing_ids):
+    """
+    Queues listings for percolation. Listings already queued (and not yet
+    being processed) stay queued once.
+    """
+    PercolationQueueItem.objects.bulk_create(
+        [PercolationQueueItem(listing_id=listing_id) for listing_id in listing_ids],
+        ignore_conflicts=True,
+    )
+
+
+def enqueue_listings_on_commit(listing_ids):
+    listing_ids = list(listing_ids)
+    transaction.on_commit(lambda: enqueue_listings(listing_ids))
+
+
+# --- Candidate index ---
+
+def category_ancestors(category_ids):
+    """
+    Returns `{category_id: [category_id, parent_id, ..., root_id]}`, built
+    from a single query over the (small) category table.
+    """
+    parents = dict(Category.objects.values_list('id', 'parent_id'))
+    ancestors = {}
+    for category_id in category_ids:
+        path = []
+        node = category_id
+        while node is not None:
+            path.append(node)
+            node = parents.get(node)
+        ancestors[category_id] = path
+    return ancestors
+
+
+class SavedSearchIndex:
+    """
+    Saved searches indexed by (category, price bucket). A search with a
+    price range is posted under every bucket the range overlaps; a search
+    without a category under the category None.
+    """
+
+    def __init__(self, searches):
+        self._postings = defaultdict(list)
+        last = len(PRICE_BUCKETS) - 1
+        for search in searches:
+            low = price_bucket(search.min_price) if search.min_price is not None else 0
+            high = price_bucket(search.max_price) if search.max_price is not None else last
+            for bucket in range(low, high + 1):
+                self._postings[(search.category_id, bucket)].append(search)
+
+    def candidates(self, ancestors, price):
+        bucket = price_bucket(price)
+        for category_id in (*ancestors, None):
+            yield from self._postings.get((category_id, bucket), ())
+
+
+# --- Exact matching ---
+
+def _load_attributes(listing_ids):
+    """
+    Returns `{listing_id: {key: (field_type, typed value)}}`.
+    """
+    attributes = defaultdict(dict)
+    rows = ListingFieldValue.objects.filter(listing_id__in=listing_ids).values_list(
+        'listing_id', 'field__field__key', 'field__field__field_type',
+        'value', 'value_number', 'value_boolean',
+    )
+    for listing_id, key, field_type, value, value_number, value_boolean in rows:
+        column = ATTRIBUTE_LOOKUPS[field_type][0]
+        typed = {'value': value, 'value_number': value_number, 'value_boolean': value_boolean}[column]
+        if typed is not None:
+            attributes[listing_id][key] = (field_type, typed)
+    return attributes
+
+
+def _attributes_match(conditions, values):
+    for key, lookups in conditions.items():
+        if key not in values:
+            return False
+        field_type, value = values[key]
+        for lookup, expected in lookups.items():
+            try:
+                if lookup == 'in':
+                    expected = [Field.coerce_value(field_type, item) for item in expected]
+                else:
+                    expected = Field.coerce_value(field_type, expected)
+            except ValueError:
+                return False
+            if lookup not in COMPARATORS or not COMPARATORS[lookup](value, expected):
+                return False
+    return True
+
+
+def _matches(search, listing, attributes):
+    if search.user_id == listing['author_id']:
+        return False
+    if search.min_price is not None and listing['price'] < search.min_price:
+        return False
+    if search.max_price is not None and listing['price'] > search.max_price:
+        return False
+    if search.city_id is not None and search.city_id != listing['city_id']:
+        return False
+    return _attributes_match(search.attributes, attributes.get(listing['id'], {}))
+
+
+def _keyword_hits(pairs):
+    """
+    Filters `(search, listing_id)` pairs on the keywords of the search, with
+    one full-text query per distinct (keywords, language).
+    """
+    groups = defaultdict(list)
+    hits = []
+    for search, listing_id in pairs:
+        if search.keywords.strip():
+            groups[(search.keywords, search.language)].append((search, listing_id))
+        else:
+            hits.append((search, listing_id))
+    for (keywords, language), group in groups.items():
+        matching = get_backend().match_listing_ids(
+            {listing_id for _, listing_id in group}, keywords, language,
+        )
+        hits.extend((search, listing_id) for search, listing_id in group if listing_id in matching)
+    return hits
+
+
+# --- Percolation ---
+
+def percolate(listing_ids):
+    """
+    Matches the given listings against every active saved search and
+    notifies the owners of the searches with new matches. Inactive and sold
+    listings match nothing. Returns the number of notifications created.
+    """
+    listings = list(Listing.objects.filter(
+        pk__in=listing_ids, is_active=True, is_sold=False,
+    ).values('id', 'title', 'author_id', 'category_id', 'city_id', 'price'))
+    if not listings:
+        return 0
+
+    ancestors = category_ancestors({listing['category_id'] for listing in listings})
+    category_ids = {category_id for path in ancestors.values() for category_id in path}
+    index = SavedSearchIndex(SavedSearch.objects.filter(
+        Q(category__isnull=True) | Q(category_id__in=category_ids), is_active=True,
+    ))
+    attributes = _load_attributes([listing['id'] for listing in listings])
+
+    pairs = []
+    for listing in listings:
+        for search in index.candidates(ancestors.get(listing['category_id'], ()), listing['price']):
+            if _matches(search, listing, attributes):
+                pairs.append((search, listing['id']))
+    if not pairs:
+        return 0
+    pairs = _keyword_hits(pairs)
+
+    # Listings edited after being notified match again: only new pairs count.
+    notified = set(SavedSearchMatch.objects.filter(
+        saved_search_id__in={search.pk for search, _ in pairs},
+        listing_id__in={listing_id for _, listing_id in pairs},
+    ).values_list('saved_search_id', 'listing_id'))
+    pairs = [(search, listing_id) for search, listing_id in pairs if (search.pk, listing_id) not in notified]
+    if not pairs:
+        return 0
+
+    titles = {listing['id']: listing['title'] for listing in listings}
+    listing_type = ContentType.objects.get_for_model(Listing)
+    SavedSearchMatch.objects.bulk_create(
+        [SavedSearchMatch(saved_search=search, listing_id=listing_id) for search, listing_id in pairs],
+        ignore_conflicts=True,
+    )
+    Notification.objects.bulk_create([
+        Notification(
+            recipient_id=search.user_id,
+            message=_('New listing for your saved search "%(name)s": %(title)s') % {
+                'name': search.name, 'title': titles[listing_id],
+            },
+            content_type=listing_type,
+            object_id=listing_id,
+        )
+        for search, listing_id in pairs
+    ])
+    return len(pairs)
+
+
+def process_queue(batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Percolates one batch of queued listings, oldest first, and removes them
+    from the queue. Batches are claimed with SKIP LOCKED, so several workers
+    can drain the queue concurrently; a listing written again while its
+    batch is processed is queued again once the batch commits.
+    Returns `(listings processed, notifications created)`.
+    """
+    with transaction.atomic():
+        listing_ids = list(
+            PercolationQueueItem.objects.select_for_update(skip_locked=True)
+            .order_by('enqueued_at')
+            .values_list('listing_id', flat=True)[:batch_size]
+        )
+        if not listing_ids:
+            return 0, 0
+        notified = percolate(listing_ids)
+        PercolationQueueItem.objects.filter(listing_id__in=listing_ids).delete()
+    return len(listing_ids), notified
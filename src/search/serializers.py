@@ -0,0 +1,89 @@
+# src/search/serializers.py
+
+from rest_framework import serializers
+from categories.models import Category, Field
+from listings.filters import ATTRIBUTE_LOOKUPS
+from .models import SavedSearch
+
+# =================================================================
+#  SAVED SEARCH SERIALIZER
+# =================================================================
+
+class SavedSearchSerializer(serializers.ModelSerializer):
+    """
+    Serializer for the current user's saved searches.
+    `category` is a category slug, as in the listings feed filter, and
+    `attributes` maps dynamic field keys to `{lookup: value}` conditions,
+    e.g. `{"mileage": {"lt": 100000}, "fuel": {"in": ["diesel", "petrol"]}}`.
+    """
+    category = serializers.SlugRelatedField(
+        slug_field='slug',
+        queryset=Category.objects.filter(is_active=True),
+        required=False,
+        allow_null=True,
+    )
+    attributes = serializers.DictField(child=serializers.DictField(), required=False)
+
+    class Meta:
+        model = SavedSearch
+        fields = (
+            'id',
+            'name',
+            'category',
+            'city',
+            'min_price',
+            'max_price',
+            'keywords',
+            'language',
+            'attributes',
+            'is_active',
+            'created_at',
+        )
+        read_only_fields = ('created_at',)
+
+    def validate_attributes(self, value):
+        """
+        Checks every condition against the field's type and stores the values
+        in their canonical form (numbers as strings, booleans as booleans).
+        """
+        field_types = dict(Field.objects.filter(key__in=value).values_list('key', 'field_type'))
+        errors = {}
+        cleaned = {}
+        for key, lookups in value.items():
+            if key not in field_types:
+                errors[key] = [f"Unknown attribute '{key}'."]
+                continue
+            field_type = field_types[key]
+            allowed_lookups = ATTRIBUTE_LOOKUPS[field_type][1]
+            cleaned[key] = {}
+            for lookup, raw in lookups.items():
+                if lookup not in allowed_lookups:
+                    errors[key] = [f"Unsupported lookup '{lookup}' for this attribute."]
+                    continue
+                try:
+                    if lookup == 'in':
+                        if not isinstance(raw, list):
+                            raise ValueError('Expected a list of values.')
+                        typed = [Field.coerce_value(field_type, item) for item in raw]
+                    else:
+                        typed = Field.coerce_value(field_type, raw)
+                except ValueError as exc:
+                    errors[key] = [str(exc)]
+                    continue
+                cleaned[key][lookup] = (
+                    [self._canonical(item) for item in typed] if lookup == 'in' else self._canonical(typed)
+                )
+        if errors:
+            raise serializers.ValidationError(errors)
+        return cleaned
+
+    @staticmethod
+    def _canonical(value):
+        return value if isinstance(value, bool) else str(value)
+
+    def validate(self, attrs):
+        min_price = attrs.get('min_price', getattr(self.instance, 'min_price', None))
+        max_price = attrs.get('max_price', getattr(self.instance, 'max_price', None))
+        if min_price is not None and max_price is not None and min_price > max_price:
+            raise serializers.ValidationError({'max_price': ['Must be greater than or equal to min_price.']})
+        return attrs
@@ -0,0 +1,48 @@
+# src/search/signals.py
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from listings.models import Listing, ListingFieldValue
+from .index import loaded_indexes
+from .percolator import enqueue_listings_on_commit
+
+# =================================================================
+#  SAVED-SEARCH PERCOLATION QUEUE
+# =================================================================
+# Written listings are only queued here (once the transaction commits, so
+# the attribute values saved with them are queued too); they're matched
+# against the saved searches in batches by `percolate_saved_searches`.
+# Batch writes, which send no signals, queue their listings themselves.
+
+@receiver(post_save, sender=Listing, dispatch_uid='search_percolate_listing_saved')
+def listing_saved(sender, instance, **kwargs):
+    enqueue_listings_on_commit([instance.pk])
+
+
+@receiver(post_save, sender=ListingFieldValue, dispatch_uid='search_percolate_field_value_saved')
+def listing_field_value_saved(sender, instance, **kwargs):
+    enqueue_listings_on_commit([instance.listing_id])
+
+
+# =================================================================
+#  BM25 INDEX DELTA
+# =================================================================
+# Listings written in this process are applied to its loaded BM25 indexes
+# right away; other processes pick them up on their next poll (see
+# LiveSearchIndex), except deletions, which the search results drop anyway
+# when they're read from the listing cards.
+
+@receiver(post_save, sender=Listing, dispatch_uid='search_index_listing_saved')
+@receiver(post_delete, sender=Listing, dispatch_uid='search_index_listing_deleted')
+def listing_changed(sender, instance, **kwargs):
+    indexes = loaded_indexes()
+    if not indexes:
+        return
+    listing_id = instance.pk
+
+    def apply():
+        for index in indexes:
+            index.apply_changes([listing_id])
+    transaction.on_commit(apply)
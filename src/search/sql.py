@@ -0,0 +1,115 @@
+# src/search/sql.py
+
+# =================================================================
+#  SEARCH DOCUMENT MAINTENANCE (DATABASE TRIGGERS)
+# =================================================================
+# `search_refresh_documents(ids)` (re)builds the SearchDocument rows of the
+# given listings with one set-based upsert. It's called by statement-level
+# triggers with transition tables, so a bulk insert/update of N listings
+# rebuilds their documents in a single statement, not N:
+# - listings inserted, or updated with a change to a searched column;
+# - categories renamed or re-parented: every listing in their subtree
+#   (the category path is part of the document).
+# Installed by the search app's migrations.
+
+REFRESH_FUNCTION = """
+CREATE OR REPLACE FUNCTION search_refresh_documents(listing_ids bigint[]) RETURNS void AS $$
+    INSERT INTO search_searchdocument (listing_id, vector_en, vector_es, updated_at)
+    SELECT
+        l.id,
+        setweight(to_tsvector('english', coalesce(nullif(l.title_en, ''), l.title, '')), 'A')
+        || setweight(to_tsvector('english', coalesce(
+            string_agg(a.name_en, ' ' ORDER BY a.lft), ''
+        )), 'B')
+        || setweight(to_tsvector('english', coalesce(nullif(l.description_en, ''), l.description, '')), 'C'),
+        setweight(to_tsvector('spanish', coalesce(
+            nullif(l.title_es, ''), nullif(l.title_en, ''), l.title, ''
+        )), 'A')
+        || setweight(to_tsvector('spanish', coalesce(
+            string_agg(coalesce(nullif(a.name_es, ''), a.name_en), ' ' ORDER BY a.lft), ''
+        )), 'B')
+        || setweight(to_tsvector('spanish', coalesce(
+            nullif(l.description_es, ''), nullif(l.description_en, ''), l.description, ''
+        )), 'C'),
+        now()
+    FROM listings_listing l
+    JOIN categories_category c ON c.id = l.category_id
+    -- The category path: every ancestor of the category, and itself.
+    LEFT JOIN categories_category a
+        ON a.tree_id = c.tree_id AND a.lft <= c.lft AND a.rght >= c.rght
+    WHERE l.id = ANY(listing_ids)
+    GROUP BY l.id
+    ON CONFLICT (listing_id) DO UPDATE SET
+        vector_en = EXCLUDED.vector_en,
+        vector_es = EXCLUDED.vector_es,
+        updated_at = EXCLUDED.updated_at;
+$$ LANGUAGE sql;
+"""
+
+LISTING_TRIGGERS = """
+CREATE OR REPLACE FUNCTION search_listings_inserted() RETURNS trigger AS $$
+BEGIN
+    PERFORM search_refresh_documents(ARRAY(SELECT id FROM new_rows));
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION search_listings_updated() RETURNS trigger AS $$
+BEGIN
+    PERFORM search_refresh_documents(ARRAY(
+        SELECT n.id
+        FROM new_rows n
+        JOIN old_rows o ON o.id = n.id
+        WHERE (n.title, n.title_en, n.title_es, n.description, n.description_en, n.description_es, n.category_id)
+            IS DISTINCT FROM
+            (o.title, o.title_en, o.title_es, o.description, o.description_en, o.description_es, o.category_id)
+    ));
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER search_listings_inserted
+    AFTER INSERT ON listings_listing
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION search_listings_inserted();
+
+CREATE TRIGGER search_listings_updated
+    AFTER UPDATE ON listings_listing
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION search_listings_updated();
+"""
+
+CATEGORY_TRIGGERS = """
+CREATE OR REPLACE FUNCTION search_categories_updated() RETURNS trigger AS $$
+BEGIN
+    PERFORM search_refresh_documents(ARRAY(
+        SELECT DISTINCT l.id
+        FROM new_rows n
+        JOIN old_rows o ON o.id = n.id
+        JOIN categories_category c ON c.id = n.id
+        JOIN categories_category d
+            ON d.tree_id = c.tree_id AND d.lft >= c.lft AND d.rght <= c.rght
+        JOIN listings_listing l ON l.category_id = d.id
+        WHERE (n.name_en, n.name_es, n.parent_id) IS DISTINCT FROM (o.name_en, o.name_es, o.parent_id)
+    ));
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER search_categories_updated
+    AFTER UPDATE ON categories_category
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION search_categories_updated();
+"""
+
+DROP_TRIGGERS = """
+DROP TRIGGER IF EXISTS search_categories_updated ON categories_category;
+DROP TRIGGER IF EXISTS search_listings_updated ON listings_listing;
+DROP TRIGGER IF EXISTS search_listings_inserted ON listings_listing;
+DROP FUNCTION IF EXISTS search_categories_updated();
+DROP FUNCTION IF EXISTS search_listings_updated();
+DROP FUNCTION IF EXISTS search_listings_inserted();
+DROP FUNCTION IF EXISTS search_refresh_documents(bigint[]);
+"""
+
+REBUILD_ALL = "SELECT search_refresh_documents(ARRAY(SELECT id FROM listings_listing));"
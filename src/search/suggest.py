@@ -0,0 +1,403 @@
+# src/search/suggest.py
+
+import threading
+import time
+import unicodedata
+from bisect import bisect_left
+from collections import namedtuple
+from datetime import timedelta
+
+from django.contrib.postgres.search import TrigramWordSimilarity
+from django.db.models import CharField, F, FloatField, Max, Q, Value
+from django.db.models.functions import Coalesce, Greatest, NullIf
+from modeltranslation import settings as mt_settings
+
+from categories.models import Category
+from core.cache import get_namespace_versions
+from listings.models import ListingCard
+from places.models import Place
+
+# =================================================================
+#  AUTOCOMPLETE
+# =================================================================
+# Suggestions come from two sources:
+# - an in-process prefix index over the titles of active listings, the
+#   names of active categories and approved places, answering the common
+#   case (the user typed the start of a word) without touching the database;
+# - when it has too few hits (typically a typo), a trigram word-similarity
+#   query (pg_trgm) over the same columns, backed by their GIN indexes.
+#
+# The prefix index is refreshed incrementally every REFRESH_INTERVAL seconds
+# (rows changed since the last refresh, and the categories whenever their
+# cache namespace version moves) and rebuilt every REBUILD_INTERVAL seconds,
+# which is also when deleted rows disappear from it.
+
+MIN_QUERY_LENGTH = 2
+DEFAULT_LIMIT = 8
+MAX_LIMIT = 20
+
+REFRESH_INTERVAL = 30
+REBUILD_INTERVAL = 15 * 60
+
+# Changed rows are re-read with this overlap, so rows committed late, with
+# an `updated_at` just below the watermark, aren't missed.
+WATERMARK_OVERLAP = timedelta(minutes=1)
+
+# The most recent active listings kept in the prefix index.
+MAX_LISTINGS = 50000
+
+# Pending changes merged into the sorted snapshot past this size.
+MERGE_THRESHOLD = 2000
+
+# Index keys examined per lookup; a two-letter prefix can match thousands.
+MAX_SCAN = 500
+
+# Ranking between kinds on equal match quality.
+KIND_WEIGHTS = {'category': 3, 'place': 2, 'listing': 1}
+
+
+def normalize(text):
+    """
+    Lowercases `text`, strips accents and collapses everything but letters
+    and digits into single spaces: "Cámara  Réflex!" -> "camara reflex".
+    """
+    decomposed = unicodedata.normalize('NFKD', text.casefold())
+    characters = [
+        character if character.isalnum() else ' '
+        for character in decomposed
+        if not unicodedata.combining(character)
+    ]
+    return ' '.join(''.join(characters).split())
+
+
+class Suggestion(namedtuple('Suggestion', 'kind id slug_en slug_es label_en label_es')):
+    """
+    One suggestable object, with its label (and slug) in every language.
+    """
+    __slots__ = ()
+
+    @property
+    def key(self):
+        return (self.kind, self.id)
+
+    def label(self, language):
+        return (self.label_es or self.label_en) if language == 'es' else self.label_en
+
+    def slug(self, language):
+        return (self.slug_es or self.slug_en) if language == 'es' else self.slug_en
+
+    def as_dict(self, language):
+        return {
+            'type': self.kind,
+            'id': self.id,
+            'slug': self.slug(language),
+            'text': self.label(language),
+        }
+
+
+def _terms(label):
+    """
+    The keys a label is found under: its normalized form starting at every
+    word, so "Toyota Corolla 2015" matches "cor" and "toyota co".
+    """
+    words = normalize(label or '').split()
+    return [' '.join(words[position:]) for position in range(len(words))]
+
+
+class PrefixIndex:
+    """
+    Word-prefix index over the labels of one language: a sorted snapshot of
+    `(term, key)` pairs searched with bisect, plus a small dict of pending
+    changes (upserts and removals) that is merged into a new snapshot once
+    it grows past MERGE_THRESHOLD.
+
+    Lookups don't lock: the snapshot is replaced in one assignment, and a
+    lookup racing a merge at worst sees a change twice.
+    """
+
+    def __init__(self, language, suggestions=()):
+        self.language = language
+        self._delta = {}
+        self._build({suggestion.key: suggestion for suggestion in suggestions})
+
+    def __len__(self):
+        return len(self._snapshot[2]) + len(self._delta)
+
+    def _build(self, suggestions):
+        pairs = sorted(
+            (term, key)
+            for key, suggestion in suggestions.items()
+            for term in _terms(suggestion.label(self.language))
+        )
+        self._snapshot = ([term for term, _ in pairs], [key for _, key in pairs], suggestions)
+        self._delta = {}
+
+    def merge(self):
+        suggestions = dict(self._snapshot[2])
+        for key, change in list(self._delta.items()):
+            if change is None:
+                suggestions.pop(key, None)
+            else:
+                suggestions[key] = change[0]
+        self._build(suggestions)
+
+    def _change(self, key, change):
+        self._delta[key] = change
+        if len(self._delta) > MERGE_THRESHOLD:
+            self.merge()
+
+    def upsert(self, suggestion):
+        self._change(suggestion.key, (suggestion, _terms(suggestion.label(self.language))))
+
+    def remove(self, key):
+        if key in self._snapshot[2] or key in self._delta:
+            self._change(key, None)
+
+    def search(self, prefix, limit):
+        """
+        Returns up to `limit` Suggestions with a word starting with `prefix`
+        (normalized), labels starting with it first, then by kind and length.
+        """
+        terms, keys, suggestions = self._snapshot
+        delta = dict(self._delta)
+        found = {}
+        start = bisect_left(terms, prefix)
+        for position in range(start, min(start + MAX_SCAN, len(terms))):
+            if not terms[position].startswith(prefix):
+                break
+            key = keys[position]
+            if key not in delta:
+                found[key] = suggestions[key]
+        for key, change in delta.items():
+            if change is not None and any(term.startswith(prefix) for term in change[1]):
+                found[key] = change[0]
+
+        def rank(suggestion):
+            label = normalize(suggestion.label(self.language))
+            return (not label.startswith(prefix), -KIND_WEIGHTS[suggestion.kind], len(label), label)
+        return sorted(found.values(), key=rank)[:limit]
+
+
+# --- Sources ---
+
+def _listing_suggestions(queryset):
+    for pk, slug, title_en, title_es in queryset.values_list('pk', 'slug', 'title_en', 'title_es'):
+        yield Suggestion('listing', pk, slug, slug, title_en, title_es)
+
+
+def _category_suggestions():
+    rows = Category.objects.filter(is_active=True).values_list(
+        'pk', 'slug_en', 'slug_es', 'name_en', 'name_es',
+    )
+    for pk, slug_en, slug_es, name_en, name_es in rows:
+        yield Suggestion('category', pk, slug_en, slug_es, name_en, name_es)
+
+
+def _place_suggestions(queryset):
+    for pk, name, name_en, name_es in queryset.values_list('pk', 'name', 'name_en', 'name_es'):
+        yield Suggestion('place', pk, None, None, name_en or name, name_es)
+
+
+class SuggestIndex:
+    """
+    The process-wide prefix indexes (one per language) and their refresh
+    state. Lookups never wait for a refresh running in another thread.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._indexes = None
+        self._rebuilt_at = 0.0
+        self._refreshed_at = 0.0
+        self._watermarks = {}
+        self._category_version = None
+        self._category_keys = set()
+
+    def _each(self, method, *args):
+        for index in self._indexes.values():
+            getattr(index, method)(*args)
+
+    def rebuild(self):
+        # Watermarks are read first: rows changing during the load are
+        # read again by the next refresh.
+        self._watermarks = {
+            'listing': ListingCard.objects.aggregate(value=Max('updated_at'))['value'],
+            'place': Place.objects.aggregate(value=Max('updated_at'))['value'],
+        }
+        self._category_version = get_namespace_versions(['categories'])['categories']
+        categories = list(_category_suggestions())
+        suggestions = [
+            *_listing_suggestions(
+                ListingCard.objects.filter(is_active=True).order_by('-created_at')[:MAX_LISTINGS]
+            ),
+            *categories,
+            *_place_suggestions(Place.objects.filter(is_approved=True)),
+        ]
+        self._category_keys = {suggestion.key for suggestion in categories}
+        self._indexes = {
+            language: PrefixIndex(language, suggestions)
+            for language in mt_settings.AVAILABLE_LANGUAGES
+        }
+        self._rebuilt_at = self._refreshed_at = time.monotonic()
+
+    def _changed(self, name, queryset, *columns):
+        """
+        Yields `columns` of the rows of `queryset` changed since the last
+        refresh, and moves the watermark of `name` past them.
+        """
+        watermark = self._watermarks.get(name)
+        if watermark is not None:
+            queryset = queryset.filter(updated_at__gte=watermark - WATERMARK_OVERLAP)
+        for *values, updated_at in queryset.values_list(*columns, 'updated_at'):
+            if watermark is None or updated_at > watermark:
+                watermark = updated_at
+            yield values
+        self._watermarks[name] = watermark
+
+    def _apply(self, suggestion, visible):
+        if visible:
+            self._each('upsert', suggestion)
+        else:
+            self._each('remove', suggestion.key)
+
+    def refresh(self):
+        """
+        Applies the rows changed since the last refresh.
+        """
+        cards = self._changed(
+            'listing', ListingCard.objects.all(), 'pk', 'slug', 'title_en', 'title_es', 'is_active',
+        )
+        for pk, slug, title_en, title_es, is_active in cards:
+            self._apply(Suggestion('listing', pk, slug, slug, title_en, title_es), is_active)
+
+        places = self._changed(
+            'place', Place.objects.all(), 'pk', 'name', 'name_en', 'name_es', 'is_approved',
+        )
+        for pk, name, name_en, name_es, is_approved in places:
+            self._apply(Suggestion('place', pk, None, None, name_en or name, name_es), is_approved)
+
+        version = get_namespace_versions(['categories'])['categories']
+        if version != self._category_version:
+            # Small table: reloaded whole, which also catches deletions.
+            categories = list(_category_suggestions())
+            keys = {suggestion.key for suggestion in categories}
+            for key in self._category_keys - keys:
+                self._each('remove', key)
+            for suggestion in categories:
+                self._each('upsert', suggestion)
+            self._category_keys = keys
+            self._category_version = version
+        self._refreshed_at = time.monotonic()
+
+    def _maybe_refresh(self):
+        now = time.monotonic()
+        if self._indexes is not None and now - self._refreshed_at < REFRESH_INTERVAL:
+            return
+        # The first load is waited for; later refreshes are left to
+        # whichever thread got there first.
+        if not self._lock.acquire(blocking=self._indexes is None):
+            return
+        try:
+            if self._indexes is None or now - self._rebuilt_at >= REBUILD_INTERVAL:
+                self.rebuild()
+            elif now - self._refreshed_at >= REFRESH_INTERVAL:
+                self.refresh()
+        finally:
+            self._lock.release()
+
+    def search(self, prefix, language, limit):
+        self._maybe_refresh()
+        index = self._indexes.get(language) or self._indexes[mt_settings.DEFAULT_LANGUAGE]
+        return index.search(prefix, limit)
+
+
+_index = SuggestIndex()
+
+
+def get_suggest_index():
+    return _index
+
+
+# --- Typo tolerance ---
+
+def _label(column, language):
+    """
+    The label of a translated column in `language`, falling back to English.
+    """
+    if language == 'en':
+        return F(f'{column}_en')
+    return Coalesce(NullIf(f'{column}_{language}', Value('')), f'{column}_en', output_field=CharField())
+
+
+def _similar(queryset, kind, column, slug, text, language, limit):
+    columns = [f'{column}_en'] if language == 'en' else [f'{column}_{language}', f'{column}_en']
+    match = Q()
+    for name in columns:
+        match |= Q(**{f'{name}__trigram_word_similar': text})
+    similarities = [TrigramWordSimilarity(text, name) for name in columns]
+    return queryset.filter(match).annotate(
+        suggestion_kind=Value(kind, output_field=CharField()),
+        suggestion_id=F('pk'),
+        suggestion_label=_label(column, language),
+        suggestion_slug=slug,
+        score=Greatest(*similarities, output_field=FloatField()) if len(similarities) > 1 else similarities[0],
+    ).values(
+        'suggestion_kind', 'suggestion_id', 'suggestion_label', 'suggestion_slug', 'score',
+    ).order_by('-score')[:limit]
+
+
+def similar_suggestions(text, language, limit):
+    """
+    Returns up to `limit` suggestion dicts whose label contains a word
+    similar to `text` (pg_trgm word similarity, so typos still match),
+    most similar first, using the trigram indexes.
+    """
+    if language not in mt_settings.AVAILABLE_LANGUAGES:
+        language = mt_settings.DEFAULT_LANGUAGE
+    no_slug = Value(None, output_field=CharField())
+    listings = _similar(
+        ListingCard.objects.filter(is_active=True), 'listing', 'title', F('slug'), text, language, limit,
+    )
+    categories = _similar(
+        Category.objects.filter(is_active=True), 'category', 'name',
+        _label('slug', language), text, language, limit,
+    )
+    places = _similar(
+        Place.objects.filter(is_approved=True), 'place', 'name', no_slug, text, language, limit,
+    )
+    # Three small indexed queries: a UNION isn't an option, as the
+    # modeltranslation manager doesn't keep the column order of values().
+    rows = sorted(
+        [*listings, *categories, *places],
+        key=lambda row: (-row['score'], -KIND_WEIGHTS[row['suggestion_kind']]),
+    )[:limit]
+    return [
+        {
+            'type': row['suggestion_kind'],
+            'id': row['suggestion_id'],
+            'slug': row['suggestion_slug'],
+            'text': row['suggestion_label'],
+        }
+        for row in rows
+    ]
+
+
+def suggest(text, language, limit=DEFAULT_LIMIT):
+    """
+    Autocomplete for `text`: word-prefix matches from the in-process index
+    first, completed with similar (misspelled) matches from the database.
+    Returns a list of `{'type', 'id', 'slug', 'text'}` dicts.
+    """
+    prefix = normalize(text)
+    if len(prefix) < MIN_QUERY_LENGTH:
+        return []
+    results = [
+        suggestion.as_dict(language)
+        for suggestion in get_suggest_index().search(prefix, language, limit)
+    ]
+    if len(results) < limit:
+        seen = {(result['type'], result['id']) for result in results}
+        for result in similar_suggestions(text.strip(), language, limit):
+            if (result['type'], result['id']) not in seen and len(results) < limit:
+                results.append(result)
+    return results
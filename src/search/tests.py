@@ -1,3 +1,141 @@
+import tempfile
+from datetime import timedelta
+from unittest import mock
+
+from django.contrib.auth import get_user_model
 from django.test import TestCase
+from django.utils import timezone
+
+from categories.models import Category
+from listings.models import Listing
+from . import documents, index
+from .index import IndexSnapshot, LiveSearchIndex, build_index, index_path
+
+User = get_user_model()
+
+
+class SearchIndexTestCase(TestCase):
+    """
+    Builds a real index file into a temporary directory.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.seller = User.objects.create_user(username='seller', email='seller@example.com', password='secret')
+        cls.category = Category.objects.create(name='Vehicles', slug='vehicles')
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+
+        self.road_bike = self.create_listing('Red bicycle', 'Fast road bike')
+        self.blue_bike = self.create_listing('Blue bicycle', 'Red paint')
+        self.car = self.create_listing('Red car')
+        self.create_listing('Red bicycle', 'Sold', is_active=False)
+        # Written well before the build, so the index starts without a delta.
+        Listing.objects.update(updated_at=timezone.now() - timedelta(days=1))
+
+        self.assertEqual(build_index('en', self.directory), 3)
+        self.index = LiveSearchIndex('en', self.directory)
+
+    def create_listing(self, title, description='', **fields):
+        return Listing.objects.create(
+            title=title, description=description, category=self.category, author=self.seller, price=100, **fields,
+        )
+
+
+class SearchIndexTests(SearchIndexTestCase):
+
+    def ids(self, text):
+        return [listing_id for listing_id, _ in self.index.search(text)]
+
+    def test_find_term(self):
+        snapshot = IndexSnapshot(index_path('en', self.directory))
+        self.addCleanup(snapshot.close)
+        self.assertEqual(snapshot.documents, 3)
+
+        position = snapshot.find_term('bicycle')
+        docs, frequencies = snapshot.postings(position)
+        self.assertEqual(
+            {snapshot.doc_ids[doc]: tf for doc, tf in zip(docs, frequencies)},
+            # Title words weigh 3; the inactive listing isn't indexed.
+            {self.road_bike.pk: 3, self.blue_bike.pk: 3},
+        )
+        for term in ('aaa', 'missing', 'zzz', 'sold'):
+            self.assertIsNone(snapshot.find_term(term))
+        # Every term of the vocabulary is found at its own position.
+        for position in range(len(snapshot.term_offsets) - 1):
+            self.assertEqual(snapshot.find_term(snapshot._term_at(position).decode()), position)
+
+    def test_every_term_must_match(self):
+        self.assertCountEqual(self.ids('red bicycle'), [self.road_bike.pk, self.blue_bike.pk])
+        self.assertEqual(self.ids('RED car!'), [self.car.pk])
+        self.assertEqual(self.ids('bicycle missing'), [])
+        self.assertEqual(self.ids('a'), [])
+
+    def test_results_are_ranked_by_bm25(self):
+        # 'red' weighs 3 in the titles of the car and the road bike, and the
+        # car's document is shorter; it's only in the blue bike's description.
+        self.assertEqual(self.ids('red'), [self.car.pk, self.road_bike.pk, self.blue_bike.pk])
+        scores = dict(self.index.search('red bicycle'))
+        self.assertGreater(scores[self.road_bike.pk], scores[self.blue_bike.pk])
+
+    def test_changes_override_the_snapshot(self):
+        self.assertEqual(self.ids('car'), [self.car.pk])
+
+        self.road_bike.title = 'Green bicycle'
+        self.road_bike.save()
+        self.car.is_active = False
+        self.car.save()
+        blue_bike_pk = self.blue_bike.pk
+        self.blue_bike.delete()
+        self.index.apply_changes([self.road_bike.pk, self.car.pk, blue_bike_pk])
+
+        self.assertEqual(self.ids('green bicycle'), [self.road_bike.pk])
+        self.assertEqual(self.ids('red bicycle'), [])
+        self.assertEqual(self.ids('car'), [])
+        self.assertEqual(self.ids('bicycle'), [self.road_bike.pk])
+
+        # Listings written since the build are picked up by the watermark.
+        tandem = self.create_listing('Red tandem bicycle')
+        self.index.apply_changes()
+        self.assertEqual(self.ids('red bicycle'), [tandem.pk])
+
+
+class SearchHelperTests(SearchIndexTestCase):
+    """
+    The queryset helpers the search view calls with the index backend.
+    """
+
+    def setUp(self):
+        super().setUp()
+        patcher = mock.patch.object(index, 'get_search_index', return_value=self.index)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_matches_are_not_capped(self):
+        with mock.patch.object(index, 'MAX_RESULTS', 1):
+            matching = index.match_listings(Listing.objects.all(), 'red', 'en')
+            self.assertCountEqual(
+                matching.values_list('pk', flat=True), [self.car.pk, self.road_bike.pk, self.blue_bike.pk],
+            )
+
+    def test_the_best_results_are_chosen_after_filtering(self):
+        with mock.patch.object(index, 'MAX_RESULTS', 1):
+            # The blue bike ranks last for 'red', yet is the best filtered match.
+            ranked = index.search_listings(Listing.objects.filter(title_en__startswith='Blue'), 'red', 'en')
+            self.assertEqual([listing.pk for listing in ranked], [self.blue_bike.pk])
+            ranked = index.search_listings(Listing.objects.all(), 'red', 'en')
+            self.assertEqual([listing.pk for listing in ranked], [self.car.pk])
 
-# Create your tests here.
+    def test_missing_index_falls_back_to_postgres(self):
+        with tempfile.TemporaryDirectory() as empty:
+            self.index.directory = empty
+            self.index._snapshot = None
+            queryset = Listing.objects.all()
+            with mock.patch.object(documents, 'search_listings') as search_listings:
+                self.assertEqual(index.search_listings(queryset, 'red', 'en'), search_listings.return_value)
+            search_listings.assert_called_once_with(queryset, 'red', 'en')
+            with mock.patch.object(documents, 'match_listings') as match_listings:
+                self.assertEqual(index.match_listings(queryset, 'red', 'en'), match_listings.return_value)
@@ -1,3 +1,140 @@
-from django.shortcuts import render
+# src/search/views.py
 
-# Create your views here.
+from modeltranslation.utils import get_language
+from rest_framework import generics
+from rest_framework.exceptions import ValidationError
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.permissions import AllowAny, IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from core.cache import cache_response
+from core.views import CompiledListMixin, SparseFieldsetsMixin
+from listings.facets import compute_facets
+from listings.filters import ListingCardFilter, ListingFilterBackend
+from listings.models import ListingCard
+from listings.serializers import ListingCardSerializer
+from .backends import get_backend
+from .models import SavedSearch
+from .serializers import SavedSearchSerializer
+from .suggest import DEFAULT_LIMIT, MAX_LIMIT, suggest
+
+# =================================================================
+#  PAGINATION
+# =================================================================
+
+class SearchPagination(PageNumberPagination):
+    """
+    Page-number pagination for ranked results: unlike the feeds, they aren't
+    ordered by an indexed key, so there's no keyset to paginate on.
+    """
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+
+
+# =================================================================
+#  API VIEWS
+# =================================================================
+
+class ListingSearchView(SparseFieldsetsMixin, CompiledListMixin, generics.ListAPIView):
+    """
+    API endpoint for full-text search over active listings.
+    - GET ?q=<text>: listing cards matching the text in the active language
+      (title, category path and description), most relevant first. Accepts
+      every filter of the listings feed (see ListingCardFilter). The first
+      page also carries facet counts for the matching listings.
+    """
+    serializer_class = ListingCardSerializer
+    permission_classes = [AllowAny]
+    pagination_class = SearchPagination
+    filter_backends = [ListingFilterBackend]
+    filterset_class = ListingCardFilter
+    search_query_param = 'q'
+
+    def get_search_text(self):
+        text = self.request.query_params.get(self.search_query_param, '').strip()
+        if not text:
+            raise ValidationError({self.search_query_param: ['This parameter is required.']})
+        return text
+
+    def get_queryset(self):
+        return ListingCard.objects.filter(is_active=True)
+
+    def filter_queryset(self, queryset):
+        # Ranked after the feed filters, so a backend keeping only the best
+        # matches keeps the best of the filtered ones.
+        return get_backend().search_listings(
+            super().filter_queryset(queryset), self.get_search_text(), get_language(),
+        )
+
+    @cache_response('listings')
+    def list(self, request, *args, **kwargs):
+        response = super().list(request, *args, **kwargs)
+        if request.query_params.get(self.paginator.page_query_param, '1') == '1':
+            response.data['facets'] = compute_facets(
+                get_backend().match_listings(
+                    ListingCard.objects.filter(is_active=True), self.get_search_text(), get_language(),
+                ),
+                self.filterset.get_predicates(),
+            )
+        return response
+
+
+class SuggestView(APIView):
+    """
+    API endpoint for search-box autocomplete.
+    - GET ?q=<text>[&limit=8]: listings, categories and places whose name
+      has a word starting with the text, or similar to it when misspelled.
+      Each result has `type` ('listing', 'category' or 'place'), `id`,
+      `slug` (None for places) and `text`, in the active language.
+    """
+    permission_classes = [AllowAny]
+
+    def get_limit(self):
+        try:
+            limit = int(self.request.query_params.get('limit', DEFAULT_LIMIT))
+        except ValueError:
+            raise ValidationError({'limit': ['A valid integer is required.']})
+        return max(1, min(limit, MAX_LIMIT))
+
+    # The prefix index trails the writes by up to REFRESH_INTERVAL seconds
+    # (see search/suggest.py), hence the short timeout.
+    @cache_response('listings', 'categories', 'places', timeout=60)
+    def get(self, request, *args, **kwargs):
+        text = request.query_params.get('q', '')
+        return Response({
+            'query': text,
+            'results': suggest(text, get_language(), self.get_limit()),
+        })
+
+
+class SavedSearchListCreateView(generics.ListCreateAPIView):
+    """
+    API endpoint for the current user's saved searches.
+    - GET: the user's saved searches, newest first.
+    - POST: saves a search. New listings matching it are notified to the
+      user (see search/percolator.py). `language` defaults to the active one.
+    """
+    serializer_class = SavedSearchSerializer
+    permission_classes = [IsAuthenticated]
+
+    def get_queryset(self):
+        return SavedSearch.objects.filter(user=self.request.user).select_related('category')
+
+    def perform_create(self, serializer):
+        serializer.save(
+            user=self.request.user,
+            language=serializer.validated_data.get('language', get_language()),
+        )
+
+
+class SavedSearchDetailView(generics.RetrieveUpdateDestroyAPIView):
+    """
+    API endpoint to view, update (e.g. pause with `is_active`) or delete one
+    of the current user's saved searches.
+    """
+    serializer_class = SavedSearchSerializer
+    permission_classes = [IsAuthenticated]
+
+    def get_queryset(self):
+        return SavedSearch.objects.filter(user=self.request.user).select_related('category')